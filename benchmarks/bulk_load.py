@@ -0,0 +1,40 @@
+## Compares add throughput when loading a segment,
+## one row at a time against Segment.add_many and validated against trusted rows
+## Usage: python -m benchmarks.bulk_load
+from ezycore import Segment
+from ezycore.models import Model, Config
+from time import perf_counter
+
+
+class Entry(Model):
+    id: int
+    value: str
+
+    _config: Config = {'search_by': 'id', 'indexes': {'value': 'hash'}}
+
+
+ROWS = 200_000
+
+
+def bench(bulk: bool, trusted: bool, models: bool) -> float:
+    rows = [{'id': i, 'value': str(i % 100)} for i in range(ROWS * 2)]
+    if models:
+        rows = [Entry(**row) for row in rows]
+    seg = Segment('bench', Entry, max_size=ROWS)
+
+    start = perf_counter()
+    if bulk:
+        seg.add_many(rows, trusted=trusted)
+    else:
+        for row in rows:
+            seg.add(row, trusted=trusted)
+    return perf_counter() - start
+
+
+if __name__ == '__main__':
+    for bulk in (False, True):
+        for models in (False, True):
+            for trusted in (False, True):
+                name = f"{'add_many' if bulk else 'add'} ({'models' if models else 'dicts'}, {'trusted' if trusted else 'validated'})"
+                taken = bench(bulk, trusted, models)
+                print(f"{name:>32}\t{taken:.3f}s\t{ROWS * 2 / taken:>10,.0f} rows/s")
@@ -0,0 +1,57 @@
+## Compares hit throughput of a Segment guarded by a single lock against ConcurrentSegment
+## Usage: python -m benchmarks.concurrent_hits
+from ezycore import Segment, ConcurrentSegment
+from ezycore.models import Model, Config
+from random import Random
+from threading import Lock, Thread
+from time import perf_counter
+
+
+class Entry(Model):
+    id: int
+    value: str
+
+    _config: Config = {'search_by': 'id'}
+
+
+SIZE = 10_000
+HITS = 50_000
+THREADS = (1, 2, 4, 8)
+
+
+class LockedSegment:
+    def __init__(self) -> None:
+        self.segment = Segment('bench', Entry, max_size=SIZE)
+        self.lock = Lock()
+
+    def get(self, key: int) -> Entry:
+        with self.lock:
+            return self.segment.get(key)
+
+
+def bench(seg, threads: int) -> float:
+    def work(seed: int) -> None:
+        rng = Random(seed)
+        get = seg.get
+        for key in [rng.randrange(SIZE) for _ in range(HITS)]:
+            get(key)
+
+    workers = [Thread(target=work, args=(i,)) for i in range(threads)]
+    start = perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return threads * HITS / (perf_counter() - start)
+
+
+if __name__ == '__main__':
+    locked = LockedSegment()
+    concurrent = ConcurrentSegment('bench', Entry, max_size=SIZE)
+    for i in range(SIZE):
+        locked.segment.add({'id': i, 'value': str(i)})
+        concurrent.add({'id': i, 'value': str(i)})
+
+    print(f"{'threads':>8}\t{'locked hits/s':>14}\t{'concurrent hits/s':>18}")
+    for threads in THREADS:
+        print(f"{threads:>8}\t{bench(locked, threads):>14,.0f}\t{bench(concurrent, threads):>18,.0f}")
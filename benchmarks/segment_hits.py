@@ -0,0 +1,37 @@
+## Measures Segment.get hit latency as max_size grows
+## Usage: python -m benchmarks.segment_hits
+from ezycore import Segment
+from ezycore.models import Model, Config
+from random import randrange
+from time import perf_counter
+
+
+class Entry(Model):
+    id: int
+    value: str
+
+    _config: Config = {'search_by': 'id'}
+
+
+SIZES = (1_000, 10_000, 100_000, 200_000)
+HITS = 50_000
+
+
+def bench(size: int) -> float:
+    seg = Segment('bench', Entry, max_size=size)
+    for i in range(size):
+        seg.add({'id': i, 'value': str(i)})
+
+    keys = [randrange(size) for _ in range(HITS)]
+    get = seg.get
+
+    start = perf_counter()
+    for key in keys:
+        get(key)
+    return (perf_counter() - start) / HITS
+
+
+if __name__ == '__main__':
+    print(f"{'max_size':>10}\t{'us/hit':>8}")
+    for size in SIZES:
+        print(f"{size:>10}\t{bench(size) * 1e6:>8.3f}")
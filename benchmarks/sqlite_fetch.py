@@ -0,0 +1,63 @@
+## Compares rows/s when materializing SQLiteDriver.fetch results,
+## the previous per-row dict + validation against row factories, trusted construction and plain dicts
+## Usage: python -m benchmarks.sqlite_fetch
+from ezycore import SQLiteDriver
+from ezycore.models import Model, Config
+from tempfile import TemporaryDirectory
+from sqlite3 import connect
+from os import path
+from time import perf_counter
+
+
+class Entry(Model):
+    id: int
+    value: str
+    score: float
+
+    _config: Config = {'search_by': 'id'}
+
+
+ROWS = 1_000_000
+
+
+def legacy(driver: SQLiteDriver) -> int:
+    ## Conversion done by _result_to_output before row factories
+    headers = driver._columns('entries')
+    count = 0
+    for result in driver.fetch('entries', no_handle=True):
+        data = {headers[i]: v for i, v in enumerate(result)}
+        Entry(**data)
+        count += 1
+    return count
+
+
+def bench(driver: SQLiteDriver, **kwds) -> float:
+    start = perf_counter()
+    if kwds.pop('legacy', False):
+        count = legacy(driver)
+    else:
+        count = sum(1 for _ in driver.fetch('entries', **kwds))
+    assert count == ROWS
+    return perf_counter() - start
+
+
+if __name__ == '__main__':
+    with TemporaryDirectory() as tmp:
+        database = path.join(tmp, 'bench.db')
+        with connect(database) as conn:
+            conn.execute('CREATE TABLE entries (id INTEGER PRIMARY KEY, value TEXT, score REAL)')
+            conn.executemany('INSERT INTO entries VALUES (?, ?, ?)', ((i, str(i % 100), i / 7) for i in range(ROWS)))
+        conn.close()
+
+        driver = SQLiteDriver(database, models={'entries': Entry}, chunk_size=5000)
+        cases = (
+            ('legacy (validated)', {'legacy': True}),
+            ('row factory (validated)', {}),
+            ('row factory (trusted)', {'trusted': True}),
+            ('tuples', {'no_handle': True}),
+            ('dicts', {'ignore_model': True}),
+        )
+        for name, kwds in cases:
+            taken = bench(driver, **kwds)
+            print(f"{name:>24}\t{taken:.3f}s\t{ROWS / taken:>10,.0f} rows/s")
+        driver.close()
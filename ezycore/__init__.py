@@ -1,12 +1,32 @@
 from .drivers import (
     Driver,
-    SQLiteDriver
+    SQLiteDriver,
+    AsyncDriver,
+    ThreadedDriver,
+    AsyncSQLiteDriver
 )
 from .manager import (
     BaseSegment,
     Segment,
+    ConcurrentSegment,
+    ShardedSegment,
+    TieredSegment,
     BaseManager,
-    Manager
+    Manager,
+    AsyncSegment,
+    AsyncManager,
+    WriteBehind,
+    ChangeWatcher,
+    BasePolicy,
+    LRUPolicy,
+    LFUPolicy,
+    FIFOPolicy,
+    ARCPolicy,
+    TinyLFUPolicy
+)
+from .query import (
+    F,
+    Query
 )
 from .models import (
     M,
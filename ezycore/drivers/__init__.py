@@ -1,2 +1,3 @@
 from .core import Driver
-from .sqlite_driver import SQLiteDriver
+from .sqlite_driver import SQLiteDriver, ExportStats
+from .aio import AsyncDriver, ThreadedDriver, AsyncSQLiteDriver
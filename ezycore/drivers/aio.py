@@ -0,0 +1,176 @@
+from __future__ import annotations
+from abc import ABC, abstractmethod
+
+from typing import Any, AsyncIterator, Callable, Iterable, Iterator, List, Optional, Union
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from itertools import islice
+from asyncio import get_running_loop
+
+from .core import Driver, RESULT, StrOrBytesPath
+from .sqlite_driver import SQLiteDriver
+from ezycore.models import Model
+from ezycore.query import F
+
+
+class AsyncDriver(ABC):
+    """ Base class for drivers used from asyncio, see :class:`Driver` for the meaning of each argument """
+
+    @abstractmethod
+    async def fetch(self, location: str, condition: Any = None, limit_result: int = -1,
+                    model: Model = None, **kwds) -> List[RESULT]:
+        """ Fetches as many results as possible based of query given, see :meth:`Driver.fetch` """
+
+    @abstractmethod
+    async def fetch_one(self, location: str, condition: Any = None, model: Model = None, **kwds) -> Optional[RESULT]:
+        """ Fetches only one result which matches the query, see :meth:`Driver.fetch_one` """
+
+    async def fetch_chunks(self, location: str, condition: Any = None, limit_result: int = -1,
+                           model: Model = None, *, chunk_size: int = 1000, **kwds) -> AsyncIterator[List[RESULT]]:
+        """ Fetches results in lists of at most ``chunk_size`` results, see :meth:`AsyncDriver.fetch`.
+            The default implementation splits the result of :meth:`AsyncDriver.fetch`,
+            drivers which can stream results should override it.
+        """
+        rows = iter(await self.fetch(location, condition, limit_result, model, **kwds) or ())
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                return
+            yield chunk
+
+    async def fetch_many_by_keys(self, location: str, keys: Iterable[Any], model: Model = None, *,
+                                 key: Optional[str] = None, **kwds) -> List[RESULT]:
+        """ Fetches the results stored under many keys, see :meth:`Driver.fetch_many_by_keys`.
+            The default implementation awaits :meth:`AsyncDriver.fetch_one` for every key.
+        """
+        if key is None:
+            assert model, 'Provide a model or key'
+            key = model._config.search_by
+        results = list()
+        for obj_key in keys:
+            res = await self.fetch_one(location, F(key) == obj_key, model, **kwds)
+            if res is not None:
+                results.append(res)
+        return results
+
+    @abstractmethod
+    async def export(self, location: str, stream: Iterable[Union[dict, Model]], **kwds) -> None:
+        """ Exports data, see :meth:`Driver.export` """
+
+    async def close(self) -> None:
+        """ Releases resources held by the driver """
+
+    async def __aenter__(self) -> AsyncDriver:
+        return self
+
+    async def __aexit__(self, *_) -> None:
+        await self.close()
+
+
+class ThreadedDriver(AsyncDriver):
+    """
+    Runs a blocking :class:`Driver` on a dedicated worker thread,
+    calls are queued so the wrapped driver is only ever used by that thread.
+
+    Parameters
+    ----------
+    driver: Union[:class:`Driver`, Callable[[], :class:`Driver`]]
+        Driver to wrap, or a callable creating it.
+        Drivers bound to the thread creating them, such as :class:`SQLiteDriver`, must be passed as a callable
+        so they're created on the worker thread.
+    """
+    def __init__(self, driver: Union[Driver, Callable[[], Driver]]) -> None:
+        self.__executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='ezycore-driver')
+        if isinstance(driver, Driver):
+            self.__driver = driver
+        else:
+            assert callable(driver), 'driver must be a Driver or a callable returning one'
+            self.__driver = self.__executor.submit(driver).result()
+
+    @property
+    def driver(self) -> Driver:
+        """ Returns the wrapped driver, it should only be used through :meth:`ThreadedDriver.run` """
+        return self.__driver
+
+    async def run(self, func: Callable[..., Any], *args, **kwds) -> Any:
+        """ Runs ``func(driver, *args, **kwds)`` on the worker thread
+
+        Parameters
+        ----------
+        func: Callable[..., Any]
+            Function to call with the wrapped driver as its first argument
+        """
+        return await get_running_loop().run_in_executor(self.__executor, partial(func, self.__driver, *args, **kwds))
+
+    @staticmethod
+    def __fetch(driver: Driver, *args, **kwds) -> List[RESULT]:
+        ## Results are converted on the worker thread, not the event loop
+        return list(driver.fetch(*args, **kwds) or ())
+
+    async def fetch(self, location: str, condition: Any = None, limit_result: int = -1,
+                    model: Model = None, **kwds) -> List[RESULT]:
+        if condition is not None:
+            kwds['condition'] = condition
+        return await self.run(self.__fetch, location, limit_result=limit_result, model=model, **kwds)
+
+    @staticmethod
+    def __stream(driver: Driver, *args, **kwds) -> Iterator[RESULT]:
+        return iter(driver.fetch(*args, **kwds) or ())
+
+    @staticmethod
+    def __next_chunk(_: Driver, rows: Iterator[RESULT], chunk_size: int) -> List[RESULT]:
+        return list(islice(rows, chunk_size))
+
+    @staticmethod
+    def __close_stream(_: Driver, rows: Iterator[RESULT]) -> None:
+        close = getattr(rows, 'close', None)
+        if close is not None:
+            close()
+
+    async def fetch_chunks(self, location: str, condition: Any = None, limit_result: int = -1,
+                           model: Model = None, *, chunk_size: int = 1000, **kwds) -> AsyncIterator[List[RESULT]]:
+        """ Streams results from the worker thread, only one chunk of rows is read at a time """
+        if condition is not None:
+            kwds['condition'] = condition
+        ## The driver's iterator is created, advanced and closed on the worker thread
+        rows = await self.run(self.__stream, location, limit_result=limit_result, model=model, **kwds)
+        try:
+            while True:
+                chunk = await self.run(self.__next_chunk, rows, chunk_size)
+                if not chunk:
+                    return
+                yield chunk
+        finally:
+            await self.run(self.__close_stream, rows)
+
+    async def fetch_one(self, location: str, condition: Any = None, model: Model = None, **kwds) -> Optional[RESULT]:
+        return await self.run(type(self.__driver).fetch_one, location, condition, model, **kwds)
+
+    @staticmethod
+    def __fetch_many_by_keys(driver: Driver, *args, **kwds) -> List[RESULT]:
+        return list(driver.fetch_many_by_keys(*args, **kwds))
+
+    async def fetch_many_by_keys(self, location: str, keys: Iterable[Any], model: Model = None, *,
+                                 key: Optional[str] = None, **kwds) -> List[RESULT]:
+        return await self.run(self.__fetch_many_by_keys, location, list(keys), model, key=key, **kwds)
+
+    async def export(self, location: str, stream: Iterable[Union[dict, Model]], **kwds) -> Any:
+        ## Segments aren't safe to iterate from another thread, snapshot them first
+        rows = list(stream)
+        return await self.run(type(self.__driver).export, location, rows, **kwds)
+
+    async def close(self) -> None:
+        self.__executor.shutdown(wait=False)
+
+
+class AsyncSQLiteDriver(ThreadedDriver):
+    """
+    :class:`SQLiteDriver` running on a worker thread, takes the same arguments as :class:`SQLiteDriver`.
+    The connection is created and used by the worker thread only.
+    """
+    def __init__(self, database: StrOrBytesPath, **kwds) -> None:
+        super().__init__(partial(SQLiteDriver, database, **kwds))
+
+    async def close(self) -> None:
+        await self.run(SQLiteDriver.close)
+        await super().close()
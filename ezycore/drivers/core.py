@@ -1,11 +1,12 @@
 from __future__ import annotations
 from abc import ABC, abstractmethod
 
-from typing import Any, Dict, Iterator, Optional, Tuple, Union
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple, Union
 from typing_extensions import TypeAlias
 from os import PathLike
 
 from ezycore.models import Model
+from ezycore.query import F
 
 
 # Iterator class used to accomodate varying data structs such as SQLs tuples
@@ -16,6 +17,11 @@
 class Driver(ABC):
     """ Base class for defining custom drivers """
 
+    @property
+    def thread_bound(self) -> bool:
+        """ Whether the driver may only be used by the thread which created it """
+        return False
+
     @abstractmethod
     def fetch(self, location: str, condition: Any = None, limit_result: int = -1, 
               model: Model = None, *, raw: Any = None, no_handle: bool = False, ignore_model: bool = False,
@@ -76,6 +82,40 @@ def fetch_one(self, location: str, condition: Any = None, model: Model = None,
             Additional kwargs may be provided by other drivers which may require any
         """
 
+    def fetch_many_by_keys(self, location: str, keys: Iterable[Any], model: Model = None, *, key: Optional[str] = None,
+                           no_handle: bool = False, ignore_model: bool = False, **kwds) -> Iterator[RESULT]:
+        """ Fetches the results stored under many keys, keys which aren't found are skipped
+            and results aren't guaranteed to be in the same order as keys.
+
+            Drivers should override this with a batched lookup,
+            the default implementation calls :meth:`Driver.fetch_one` for every key.
+
+        Parameters
+        ----------
+        location: :class:`str`
+            Place to fetch data from, varies between drivers.
+        keys: Iterable[Any]
+            Values of the key field to fetch
+        model: :class:`Model`
+            Model to return data as,
+            if no model binded to location, this model becomes the default
+        key: Optional[:class:`str`]
+            Field keys are stored under, defaults to ``search_by`` of the model binded to location
+        no_handle: :class:`bool`
+            Whether to just return the raw fetched data
+        ignore_model: :class:`bool`
+            Whether to return data as dict instead of model
+        **kwds:
+            Additional kwargs may be provided by other drivers which may require any
+        """
+        if key is None:
+            assert model, 'Provide a model or key'
+            key = model._config.search_by
+        for obj_key in keys:
+            res = self.fetch_one(location, F(key) == obj_key, model, no_handle=no_handle, ignore_model=ignore_model, **kwds)
+            if res is not None:
+                yield res
+
     @abstractmethod
     def map_to_model(self, **kwds) -> None:
         """ Maps locations to internal data spots.
@@ -108,3 +148,20 @@ def export(self, location: str, stream: Iterator[Union[dict, Model]], include: s
         exclude: :class:`set`
             set of IDs to exclude
         """
+
+    def delete(self, location: str, keys: Iterable[Any], *, key: Optional[str] = None) -> None:
+        """ Deletes stored data by key, drivers which can't delete data raise `NotImplementedError`
+
+        Parameters
+        ----------
+        location: :class:`str`
+            Location to delete data from
+        keys: Iterable[Any]
+            Keys of data to delete
+        key: Optional[:class:`str`]
+            Field keys are stored under, defaults to ``search_by`` of the model binded to location
+        """
+        raise NotImplementedError(f'{self.__class__.__name__} does not support deleting data')
+
+    def commit(self) -> None:
+        """ Makes pending writes durable, does nothing for drivers which write straight away """
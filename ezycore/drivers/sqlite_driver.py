@@ -1,9 +1,41 @@
 from __future__ import annotations
-from typing import Any, Dict, Iterator, Tuple, Type, Optional, Union
-from sqlite3 import connect, Connection
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Tuple, Type, Optional, Union
+from sqlite3 import connect, Connection, Cursor, OperationalError
+from threading import Lock, local
+from functools import partial
+from itertools import islice
+from operator import attrgetter, itemgetter
+from time import perf_counter
 
 from .core import Driver, RESULT, StrOrBytesPath
-from ezycore.models import Model
+from ezycore.models import Model, PartialRef
+from pydantic import ValidationError
+from ezycore.query import Expr, Query, quote
+
+
+class ExportStats(NamedTuple):
+    """ Summary of an export returned by :meth:`SQLiteDriver.export` """
+    rows: int
+    chunks: int
+    seconds: float
+
+
+def _reference_key(column: str, obj: Model) -> Any:
+    value = getattr(obj, column)
+    return getattr(value, value._config.search_by) if isinstance(value, Model) else value
+
+
+class _Connections:
+    """ Connections used by one thread, see :class:`SQLiteDriver` """
+    __slots__ = ('connection', 'cursor', 'reader', 'key_tables')
+
+    def __init__(self, connection: Connection, cursor: Cursor) -> None:
+        self.connection = connection
+        self.cursor = cursor
+        ## Query only connection used by fetches
+        self.reader: Optional[Connection] = None
+        ## Emptied temporary tables used by fetch_many_by_keys
+        self.key_tables: List[str] = list()
 
 
 class SQLiteDriver(Driver):
@@ -19,10 +51,39 @@ class SQLiteDriver(Driver):
         Models to convert fetched results to, mapping must be table name to model
     model_maps: Dict[:class:`str`, :class:`str`]
         Mapping from model key to database table name
+    chunk_size: :class:`int`
+        Number of rows read from the database at once by :meth:`SQLiteDriver.fetch`
+    threaded: :class:`bool`
+        Whether every thread using the driver gets its own connection, opened on first use.
+        Writes are made in the calling thread's transaction, so :meth:`SQLiteDriver.commit` commits that thread's writes.
+        ``check_same_thread`` is ignored, connections may be closed by any thread using :meth:`SQLiteDriver.close`
+    read_only: :class:`bool`
+        Whether fetches use a separate query only connection,
+        in which case fetches don't see writes which haven't been committed yet
+    journal_mode: Optional[:class:`str`]
+        ``PRAGMA journal_mode`` set when connecting, ``'WAL'`` lets reads run alongside a write
+    synchronous: Optional[:class:`str`]
+        ``PRAGMA synchronous`` of every connection, e.g. ``'NORMAL'``
+    cache_size: Optional[:class:`int`]
+        ``PRAGMA cache_size`` of every connection, pages if positive, KiB if negative
+    trusted: :class:`bool`
+        Whether fetched rows are converted to models without validation by default,
+        only used for tables whose columns match the model's fields
+
+    .. code-block:: py
+
+        driver = SQLiteDriver('cache.db', threaded=True, read_only=True, journal_mode='WAL', synchronous='NORMAL')
     """
 
-    ## auto gen tables which we generally dont care about
-    _IGNORE_LISTINGS = ('sqlite_sequence',)
+    ## Stays below SQLite's default limit of bound parameters
+    _DELETE_BATCH = 500
+    _KEY_BATCH = 500
+    ## Key lists longer than this are joined through a temporary table instead of IN batches
+    _KEY_TABLE_THRESHOLD = 10_000
+    _JOURNAL_MODES = ('DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF')
+    _SYNCHRONOUS = ('OFF', 'NORMAL', 'FULL', 'EXTRA')
+    ## Table written to by the triggers of install_change_log
+    _CHANGE_LOG = '_ezycore_changes'
 
     def __init__(self,
                  database: StrOrBytesPath,
@@ -35,43 +96,292 @@ def __init__(self,
                  uri: bool = False,
                  cursorClass: Any = None,
                  models: Dict[str, Model] = dict(),
-                 model_maps: Dict[str, str] = dict()
+                 model_maps: Dict[str, str] = dict(),
+                 chunk_size: int = 1000,
+                 *,
+                 threaded: bool = False,
+                 read_only: bool = False,
+                 journal_mode: Optional[str] = None,
+                 synchronous: Optional[str] = None,
+                 cache_size: Optional[int] = None,
+                 trusted: bool = False
                 ) -> None:
-        self.__connection: Connection = connect(
+        assert type(chunk_size) == int and chunk_size > 0, 'Chunk size must be a positive integer'
+        assert journal_mode is None or journal_mode.upper() in self._JOURNAL_MODES, 'Unknown journal mode'
+        assert synchronous is None or str(synchronous).upper() in self._SYNCHRONOUS, 'Unknown synchronous setting'
+        assert cache_size is None or type(cache_size) == int, 'Cache size must be an integer'
+        assert not (threaded or read_only) or database not in (':memory:', ''), \
+            'Private in-memory databases can\'t be shared by several connections'
+
+        self.__connect = partial(
+            connect,
             database=database,
             timeout=timeout,
             detect_types=detect_types,
             isolation_level=isolation_level,
-            check_same_thread=check_same_thread,
+            check_same_thread=check_same_thread and not threaded,
             factory=factory,
             cached_statements=cached_statements,
             uri=uri
         )
-        self.__cursor = self.__connection.cursor(**({'cursorClass': cursorClass} if cursorClass else {}))
+        self.__cursor_kwds = {'cursorClass': cursorClass} if cursorClass else {}
+        self.__chunk_size = chunk_size
+        self.__read_only = read_only
+        self.__journal_mode = journal_mode
+        self.__pragmas: List[str] = []
+        if synchronous is not None:
+            self.__pragmas.append(f'PRAGMA synchronous = {str(synchronous).upper()}')
+        if cache_size is not None:
+            self.__pragmas.append(f'PRAGMA cache_size = {cache_size}')
+        self.__key_table_ids = 0
+        self.__export_plans: Dict[Tuple[Any, ...], Tuple[str, Callable[[Model], Tuple[Any]]]] = dict()
+        self.__row_factories: Dict[Tuple[Any, ...], Callable[[Tuple[Any]], RESULT]] = dict()
+        self.__trusted = trusted
+
+        ## Every connection opened, closed together
+        self.__opened: List[_Connections] = list()
+        self.__opened_lock = Lock()
+        self.__local = local() if threaded else None
+        self.__shared = None if threaded else self.__open()
 
         self.__models: Dict[str, Model] = models
+        ## table_name: (col, col, col), read on first use of a table
         self.__headers: Dict[str, Tuple[str]] = dict()
+        self.__schema_version: Optional[int] = None
         self.__maps: Dict[str, str] = model_maps
         self.__rev_map: Dict[str, str] = {v: k for k, v in self.__maps.items()}
-        # table_name: (col, col, col)
 
+    def __trust(self, trusted: Optional[bool]) -> bool:
+        return self.__trusted if trusted is None else trusted
+
+    @property
+    def threaded(self) -> bool:
+        """ Whether every thread gets its own connection """
+        return self.__local is not None
+
+    @property
+    def thread_bound(self) -> bool:
+        """ Whether the driver may only be used by the thread which created it,
+            which is the case unless ``threaded`` or ``check_same_thread=False``
+        """
+        return self.__connect.keywords['check_same_thread']
+
+    def __open(self) -> _Connections:
+        connection = self.__connect()
+        if self.__journal_mode:
+            connection.execute(f'PRAGMA journal_mode = {self.__journal_mode.upper()}')
+        for pragma in self.__pragmas:
+            connection.execute(pragma)
+
+        conns = _Connections(connection, connection.cursor(**self.__cursor_kwds))
+        with self.__opened_lock:
+            self.__opened.append(conns)
+        return conns
+
+    def __conns(self) -> _Connections:
+        ## Connections of the calling thread
+        if self.__local is None:
+            return self.__shared
+        conns = getattr(self.__local, 'conns', None)
+        if conns is None:
+            conns = self.__local.conns = self.__open()
+        return conns
+
+    @property
+    def __connection(self) -> Connection:
+        return self.__conns().connection
+
+    @property
+    def __cursor(self) -> Cursor:
+        return self.__conns().cursor
+
+    def __reader(self) -> Connection:
+        ## Connection used by fetches
+        conns = self.__conns()
+        if not self.__read_only:
+            return conns.connection
+        if conns.reader is None:
+            ## Autocommit, so a reader never holds on to an old snapshot
+            reader = self.__connect(isolation_level=None)
+            for pragma in self.__pragmas:
+                reader.execute(pragma)
+            reader.execute('PRAGMA query_only = ON')
+            conns.reader = reader
+        return conns.reader
+
+    def _columns(self, table: str) -> Tuple[str, ...]:
+        """ Returns column names of a table, read using ``PRAGMA table_info`` on first use.
+            Cached columns are checked against ``PRAGMA schema_version`` when a statement fails
+            or a model has fields missing from the table, see :meth:`SQLiteDriver._schema_changed`.
+        """
+        columns = self.__headers.get(table)
+        if columns is None:
+            connection = self.__connection
+            if self.__schema_version is None:
+                self.__schema_version = connection.execute('PRAGMA schema_version').fetchone()[0]
+            columns = tuple(row[1] for row in connection.execute(f'PRAGMA table_info({quote(table)})'))
+            assert columns, f"Table {table} doesn't exist"
+            self.__headers[table] = columns
+        return columns
+
+    def _schema_changed(self) -> bool:
+        """ Forgets cached columns if the schema changed since they were read, returns whether it did """
+        version = self.__connection.execute('PRAGMA schema_version').fetchone()[0]
+        if version == self.__schema_version:
+            return False
         self._read_heads()
+        return True
 
     def _read_heads(self) -> None:
-        self.__cursor.execute('SELECT name FROM sqlite_master where type = "table"')
-        for t_ in self.__cursor.fetchall():
-            if (t_[0] in self._IGNORE_LISTINGS):
-                continue
-            self.__cursor.execute(f'SELECT * FROM {t_[0]} LIMIT 1')
-            self.__headers[t_[0]] = tuple(i[0] for i in self.__cursor.description)
-
-    def _result_to_output(self, head: str, model: Optional[Model], *results) -> Iterator[dict]:
-        for result in results:
-            data = {self.__headers[head][i]: v for i, v in enumerate(result)}
-            if not model:
-                yield data
-            else:
-                yield model(**data)
+        """ Forgets cached columns, they're read again on next use """
+        self.__headers = dict()
+        self.__schema_version = None
+
+    def _select(self, table: str, model: Optional[Type[Model]], columns: Optional[Iterable[str]] = None) -> Tuple[str, ...]:
+        """ Returns columns to fetch from a table, ``columns`` if given,
+            otherwise the model's fields which aren't deferred or every column without a model.
+        """
+        table_columns = self._columns(table)
+        if columns is not None:
+            columns = tuple(columns)
+            if not set(columns).issubset(table_columns) and self._schema_changed():
+                table_columns = self._columns(table)
+            assert columns and set(columns).issubset(table_columns), f'Unknown columns selected from {table}'
+            return columns
+        if model is None:
+            return table_columns
+        fields, deferred = model.__fields__, model._config.deferred
+        if not set(fields).issubset(table_columns) and self._schema_changed():
+            ## Fields missing from cached columns may have been added by a migration
+            table_columns = self._columns(table)
+        selected = tuple(c for c in table_columns if c in fields and c not in deferred)
+        assert selected, f"Model {model.__name__} has no fields stored in {table}"
+        return selected
+
+    def _row_factory(self, table: str, model: Optional[Type[Model]], trusted: bool = False,
+                     columns: Optional[Tuple[str, ...]] = None) -> Callable[[Tuple[Any]], RESULT]:
+        """ Returns function converting a row tuple of a table into a model, or a dict if no model is given.
+            Built once per table, model and columns.
+
+            Trusted rows are constructed without validation when every column is a field of the model
+            and every required field is a column, otherwise they're validated.
+            Fields stored in the table which weren't selected are loaded on first access.
+        """
+        table_columns = self._columns(table)
+        columns = columns or table_columns
+        plan_key = (table, model, trusted, columns, table_columns)
+        factory = self.__row_factories.get(plan_key)
+        if factory is not None:
+            return factory
+
+        lazy = model and [n for n in model.__fields__ if n in table_columns and n not in columns]
+        if model is None:
+            factory = lambda row: dict(zip(columns, row))
+        elif lazy:
+            factory = self.__lazy_constructor(table, model, columns, lazy, not trusted)
+        elif trusted and self.__matches(model, columns):
+            factory = self.__constructor(model, columns)
+        else:
+            factory = lambda row: model(**dict(zip(columns, row)))
+        self.__row_factories[plan_key] = factory
+        return factory
+
+    def __lazy_constructor(self, table: str, model: Type[Model], columns: Tuple[str, ...], lazy: List[str],
+                           validate: bool) -> Callable[[Tuple[Any]], Model]:
+        ## Builds models missing some fields, which are loaded by key on first access
+        fields = model.__fields__
+        key = model._config.search_by
+        assert key in columns, f'{key} must be selected to defer other fields'
+        assert not model.__private_attributes__, 'Models with private attributes cannot defer fields'
+
+        names = [n for n in columns if n in fields]
+        indexes = [columns.index(n) for n in names]
+        key_index = columns.index(key)
+        defaults = [f for n, f in fields.items() if n not in columns and n not in lazy]
+        new, set_attr, load = object.__new__, object.__setattr__, partial(self.__load_fields, table, model, key, tuple(lazy))
+
+        def construct(row: Tuple[Any]) -> Model:
+            values = dict()
+            for name, i in zip(names, indexes):
+                value = row[i]
+                if validate:
+                    value, err = fields[name].validate(value, values, loc=name, cls=model)
+                    if err:
+                        raise ValidationError([err], model)
+                values[name] = value
+            for field in defaults:
+                values[field.name] = field.get_default()
+            obj = new(model)
+            set_attr(obj, '__dict__', values)
+            set_attr(obj, '__fields_set__', set(names))
+            obj._defer(partial(load, row[key_index]))
+            return obj
+        return construct
+
+    def __load_fields(self, table: str, model: Type[Model], key: str, lazy: Tuple[str, ...], key_value: Any,
+                      _name: str) -> Dict[str, Any]:
+        ## Loads every deferred field of a fetched model at once, other rows aren't read so memory follows what's used
+        prefix = quote(table)
+        select = ','.join(f'{prefix}.{quote(c)}' for c in lazy)
+        cursor = self.__reader().cursor(**self.__cursor_kwds)
+        try:
+            cursor.execute(f'SELECT {select} FROM {table} WHERE {quote(key)} = ?', (key_value,))
+            row = cursor.fetchone()
+        finally:
+            cursor.close()
+        if row is None:
+            raise LookupError(f'Row {key_value!r} of {table} no longer exists')
+
+        fields = model.__fields__
+        values = dict()
+        for name, value in zip(lazy, row):
+            value, err = fields[name].validate(value, values, loc=name, cls=model)
+            if err:
+                raise ValidationError([err], model)
+            values[name] = value
+        return values
+
+    @staticmethod
+    def __matches(model: Type[Model], columns: Tuple[str, ...]) -> bool:
+        fields = model.__fields__
+        return set(columns).issubset(fields) and all(not f.required or n in columns for n, f in fields.items()) \
+            and not model.__private_attributes__
+
+    @staticmethod
+    def __constructor(model: Type[Model], columns: Tuple[str, ...]) -> Callable[[Tuple[Any]], Model]:
+        ## Same result as Model.construct, with the column order resolved once instead of per row
+        fields = [name for name in model.__fields__ if name in columns]
+        pick = itemgetter(*(columns.index(name) for name in fields))
+        if len(fields) == 1:
+            pick = lambda row, get=pick: (get(row),)
+        defaults = [field for name, field in model.__fields__.items() if name not in columns]
+        fields_set = frozenset(fields)
+        new, set_attr = object.__new__, object.__setattr__
+
+        def construct(row: Tuple[Any]) -> Model:
+            values = dict(zip(fields, pick(row)))
+            for field in defaults:
+                values[field.name] = field.get_default()
+            obj = new(model)
+            set_attr(obj, '__dict__', values)
+            set_attr(obj, '__fields_set__', set(fields_set))
+            return obj
+        return construct
+
+    def _result_to_output(self, head: str, model: Optional[Model], results: Iterable[Tuple[Any]],
+                          trusted: bool = False, columns: Optional[Tuple[str, ...]] = None) -> Iterator[RESULT]:
+        yield from map(self._row_factory(head, model, trusted, columns), results)
+
+    @staticmethod
+    def _stream(cursor: Cursor, first: list, chunk_size: int) -> Iterator[Tuple[Any]]:
+        ## Yields rows a chunk at a time, closing the cursor once exhausted or abandoned
+        try:
+            rows = first
+            while rows:
+                yield from rows
+                rows = cursor.fetchmany(chunk_size)
+        finally:
+            cursor.close()
 
     def _get_model(self, location: str) -> Optional[Model]:
         # -> __models[loc] -> __models[__maps[loc]] -> __models[__rev_map[loc]]
@@ -84,18 +394,68 @@ def _model_fits(self, location: str) -> bool:
         model = self._get_model(location)
         if not model:
             return False
-        keys = model.__fields__.keys()
-
-        return set(self.__headers[location]).issubset(set(keys))
+        keys = set(model.__fields__.keys())
+        table = self.__maps.get(location, location)
+        if set(self._columns(table)).issubset(keys):
+            return True
+        ## Columns missing from the model may have been dropped by a migration
+        return self._schema_changed() and set(self._columns(table)).issubset(keys)
 
     def map_to_model(self, **kwds) -> None:
         self.__maps.update(kwds)
         self.__rev_map = {v: k for k, v in self.__maps.items()}
 
-
-    def fetch(self, location: str, condition: str = '', limit_result: int = -1, 
+    def commit(self) -> None:
+        self.__connection.commit()
+
+    def close(self) -> None:
+        """ Commits pending changes and closes every connection """
+        with self.__opened_lock:
+            opened, self.__opened = self.__opened, list()
+        for conns in opened:
+            conns.connection.commit()
+            conns.connection.close()
+            if conns.reader is not None:
+                conns.reader.close()
+        if self.__local is not None:
+            self.__local = local()
+
+
+    def __build_select(self, table: str, model: Optional[Type[Model]], condition: Union[str, Expr, Query, None],
+                       limit: int, columns: Optional[Iterable[str]]) -> Tuple[str, Tuple[Any], Tuple[str, ...]]:
+        ## SELECT statement, parameters and selected columns of a fetch, limit overrides the query's limit if > 0
+        selected = self._select(table, model, columns)
+        ## Qualified so dropped columns raise instead of being read as string literals
+        prefix = quote(table)
+        select = ','.join(f'{prefix}.{quote(column)}' for column in selected)
+        if isinstance(condition, (Expr, Query)):
+            query = Query.of(condition)
+            if limit > 0:
+                query = Query(query.where, order_by=query.order_by, descending=query.descending, limit=limit)
+            return (*query.to_sql(table, select), selected)
+
+        condition = f'WHERE {condition}' if condition else ''
+        limit = f'LIMIT {limit}' if limit > 0 else ''
+        return f'SELECT {select} FROM {table} {condition} {limit}', (), selected
+
+    def __execute(self, cursor: Cursor, statement: str, parameters: Tuple[Any],
+                  build: Optional[Callable[[], Tuple[str, Tuple[Any], Tuple[str, ...]]]]) -> Optional[Tuple[str, ...]]:
+        ## Executes a generated statement, rebuilt once if it failed because cached columns were stale.
+        ## Returns the columns selected by the rebuilt statement
+        try:
+            cursor.execute(statement, parameters)
+        except OperationalError:
+            if build is None or not self._schema_changed():
+                raise
+            statement, parameters, selected = build()
+            cursor.execute(statement, parameters)
+            return selected
+        return None
+
+    def fetch(self, location: str, condition: Union[str, Expr, Query] = '', limit_result: int = -1, 
               model: Model = None, *, raw: str = None, no_handle: bool = False, ignore_model: bool = False,
-              parameters: Tuple[Any] = tuple()
+              parameters: Tuple[Any] = tuple(), chunk_size: Optional[int] = None, trusted: Optional[bool] = None,
+              columns: Optional[Iterable[str]] = None
     ) -> Optional[Iterator[RESULT]]:
         """
         Fetches data from a table
@@ -104,12 +464,13 @@ def fetch(self, location: str, condition: str = '', limit_result: int = -1,
         ----------
         location: :class:`str`
             Table to fetch data from
-        condition: Any
+        condition: Union[:class:`str`, :class:`Expr`, :class:`Query`]
             Condition to use in ``WHERE`` statement,
             provide arg without the ``WHERE`` clause.
+            Expressions and queries are converted to a parameterized statement.
         limit_result: :class:`int`
             Limit how many results are returned,
-            if < 0, no limit is set
+            if < 0, no limit is set. Overrides :attr:`Query.limit`
         model: :class:`Model`
             Model to return data as, 
             if no model binded to location, this model becomes the default
@@ -122,68 +483,386 @@ def fetch(self, location: str, condition: str = '', limit_result: int = -1,
             Whether to return data as dict instead of model
         parameters: Tuple[Any]
             Parameters to be supplied with statement, flexibility if using the ``raw`` arg
+        chunk_size: Optional[:class:`int`]
+            Number of rows read from the database at once, defaults to the driver's ``chunk_size``
+        trusted: Optional[:class:`bool`]
+            Whether rows are converted to models without validation, defaults to the driver's ``trusted``
+        columns: Optional[Iterable[:class:`str`]]
+            Columns to fetch, when returning models defaults to the model's fields which aren't ``deferred``.
+            Model fields which aren't fetched are loaded from the table on first access,
+            which requires the ``search_by`` column to be fetched
+
+        .. note::
+            Rows are streamed, only ``chunk_size`` rows are held in memory at once.
+            Each call uses its own cursor, so the driver may be used while results are being consumed.
         """
         if model and not self._get_model(location):
             self.__models[location] = model
         model = self._get_model(location)
         table = self.__maps.get(location, location)
-
-        if not raw:
-            if condition:
-                condition = f'WHERE {condition}'
-            if limit_result > 0:
-                limit_result = f'LIMIT {limit_result}'
-            else:
-                limit_result = ''
-            raw = f'SELECT * FROM {table} {condition} {limit_result}'
-
-        self.__cursor.execute(raw, parameters)
-        res = self.__cursor.fetchall()
-
-        if not res:     return
-        if no_handle:   return iter(res)
-        return self._result_to_output(table, model if not ignore_model else None, *res)
-
-
-    def fetch_one(self, location: str, condition: Any = None, model: Model = None, 
+        chunk_size = chunk_size or self.__chunk_size
+        model = model if not (ignore_model or no_handle) else None
+        build = None if raw else partial(self.__build_select, table, model, condition, limit_result, columns)
+        if raw:
+            selected = tuple(columns) if columns is not None else None
+        else:
+            raw, parameters, selected = build()
+
+        cursor = self.__reader().cursor(**self.__cursor_kwds)
+        try:
+            selected = self.__execute(cursor, raw, parameters, build) or selected
+            ## Read the first chunk straight away, empty results still return None
+            first = cursor.fetchmany(chunk_size)
+        except BaseException:
+            cursor.close()
+            raise
+
+        if not first:
+            cursor.close()
+            return
+        rows = self._stream(cursor, first, chunk_size)
+        if no_handle:   return rows
+        return self._result_to_output(table, model, rows, self.__trust(trusted), selected)
+
+
+    def fetch_one(self, location: str, condition: Union[str, Expr, Query] = None, model: Model = None, 
                   *, raw: Any = None, no_handle: bool = False, ignore_model: bool = False,
-                  parameters: Tuple[Any] = tuple()
+                  parameters: Tuple[Any] = tuple(), trusted: Optional[bool] = None,
+                  columns: Optional[Iterable[str]] = None
     ) -> Optional[RESULT]:
         """
-        Fetches only 1 item
+        Fetches only 1 item, see :meth:`SQLiteDriver.fetch`
         """
         if model and not self._get_model(location):
             self.__models[location] = model
         model = self._get_model(location)
         table = self.__maps.get(location, location)
+        model = model if not (ignore_model or no_handle) else None
+        build = None if raw else partial(self.__build_select, table, model, condition, 1, columns)
+        if raw:
+            selected = tuple(columns) if columns is not None else None
+        else:
+            raw, parameters, selected = build()
+
+        cursor = self.__reader().cursor(**self.__cursor_kwds)
+        try:
+            selected = self.__execute(cursor, raw, parameters, build) or selected
+            r = cursor.fetchone()
+        finally:
+            cursor.close()
 
-        if not raw:
+        if not r:       return
+        if no_handle:   return r
+        return self._row_factory(table, model, self.__trust(trusted), selected)(r)
 
-            if condition:
-                condition = f'WHERE {condition}'
-            raw = f'SELECT * FROM {table} {condition} LIMIT 1'
 
-        self.__cursor.execute(raw, parameters)
-        r = self.__cursor.fetchone()
+    def fetch_many_by_keys(self, location: str, keys: Iterable[Any], model: Model = None, *, key: Optional[str] = None,
+                           no_handle: bool = False, ignore_model: bool = False, chunk_size: Optional[int] = None,
+                           trusted: Optional[bool] = None, columns: Optional[Iterable[str]] = None
+    ) -> Iterator[RESULT]:
+        """
+        Fetches the rows stored under many keys, rows are streamed like :meth:`SQLiteDriver.fetch`.
+        Keys are looked up using parameterized ``IN`` batches,
+        lists longer than ``_KEY_TABLE_THRESHOLD`` are joined through a temporary table instead.
+        Keys which aren't found are skipped and rows aren't returned in the same order as keys.
 
-        if not r:       return
-        if no_handle:   return r
-        return next(self._result_to_output(table, model if not ignore_model else None, r))
+        Parameters
+        ----------
+        location: :class:`str`
+            Table to fetch data from
+        keys: Iterable[Any]
+            Values of the key column to fetch
+        model: :class:`Model`
+            Model to return data as,
+            if no model binded to location, this model becomes the default
+        key: Optional[:class:`str`]
+            Column keys are stored under, defaults to ``search_by`` of the model binded to location
+        no_handle: :class:`bool`
+            Whether to just return the raw fetched data
+        ignore_model: :class:`bool`
+            Whether to return data as dict instead of model
+        chunk_size: Optional[:class:`int`]
+            Number of rows read from the database at once, defaults to the driver's ``chunk_size``
+        trusted: Optional[:class:`bool`]
+            Whether rows are converted to models without validation, defaults to the driver's ``trusted``
+        columns: Optional[Iterable[:class:`str`]]
+            Columns to fetch, see :meth:`SQLiteDriver.fetch`
+        """
+        if model and not self._get_model(location):
+            self.__models[location] = model
+        model = self._get_model(location)
+        table = self.__maps.get(location, location)
+        if key is None:
+            assert model, "No model binded for this table, provide key"
+            key = model._config.search_by
+        model = model if not (ignore_model or no_handle) else None
+        selected = self._select(table, model, columns)
+
+        keys = list(dict.fromkeys(keys))
+        if len(keys) > self._KEY_TABLE_THRESHOLD:
+            rows = self.__rows_by_key_table(table, key, keys, selected, chunk_size or self.__chunk_size)
+        else:
+            rows = self.__rows_by_key_batches(table, key, keys, selected, chunk_size or self.__chunk_size)
+
+        if no_handle:   return rows
+        return self._result_to_output(table, model, rows, self.__trust(trusted), selected)
+
+    def __rows_by_key_batches(self, table: str, key: str, keys: List[Any], columns: Tuple[str, ...],
+                              chunk_size: int) -> Iterator[Tuple[Any]]:
+        prefix = quote(table)
+        select = ','.join(f'{prefix}.{quote(c)}' for c in columns)
+        for i in range(0, len(keys), self._KEY_BATCH):
+            batch = keys[i:i + self._KEY_BATCH]
+            cursor = self.__reader().cursor(**self.__cursor_kwds)
+            try:
+                cursor.execute(f'SELECT {select} FROM {table} WHERE {quote(key)} IN ({",".join("?" * len(batch))})', batch)
+            except OperationalError:
+                ## Rows already streamed used the stale columns, so only later calls see the new schema
+                self._schema_changed()
+                raise
+            yield from self._stream(cursor, cursor.fetchmany(chunk_size), chunk_size)
+
+    def __rows_by_key_table(self, table: str, key: str, keys: List[Any], columns: Tuple[str, ...],
+                            chunk_size: int) -> Iterator[Tuple[Any]]:
+        ## Temporary tables are private to the connection and never touch the main database file.
+        ## They're emptied and reused instead of dropped, dropping fails while other fetches are being consumed
+        conns = self.__conns()
+        connection = conns.connection
+        if conns.key_tables:
+            temp = conns.key_tables.pop()
+        else:
+            self.__key_table_ids += 1
+            temp = quote(f'_ezycore_keys_{self.__key_table_ids}')
+            connection.execute(f'CREATE TEMP TABLE {temp} (k PRIMARY KEY) WITHOUT ROWID')
+
+        ## Filling the table opens a transaction, which is ended again unless one was already open
+        owned = not connection.in_transaction
+        cursor = connection.cursor(**self.__cursor_kwds)
+        try:
+            cursor.executemany(f'INSERT INTO temp.{temp} VALUES (?)', ((k,) for k in keys))
+            select = ','.join(f't.{quote(c)}' for c in columns)
+            try:
+                cursor.execute(f'SELECT {select} FROM {table} AS t JOIN temp.{temp} AS k ON t.{quote(key)} = k.k')
+            except OperationalError:
+                self._schema_changed()
+                raise
+            yield from self._stream(cursor, cursor.fetchmany(chunk_size), chunk_size)
+        finally:
+            cursor.close()
+            connection.execute(f'DELETE FROM temp.{temp}')
+            if owned:
+                connection.commit()
+            conns.key_tables.append(temp)
+
+    def __export_plan(self, location: str, model: Type[Model]) -> Tuple[str, Callable[[Model], Tuple[Any]]]:
+        ## INSERT statement and row builder of a table, built once per table, model and columns
+        table = self.__maps.get(location, location)
+        headers = self._columns(table)
+        plan_key = (table, model, headers)
+        plan = self.__export_plans.get(plan_key)
+        if plan is not None:
+            return plan
+
+        getters = []
+        for column in headers:
+            field = model.__fields__[column]
+            if getattr(field.outer_type_, '__origin__', None) is PartialRef:
+                ## Resolved references are stored by their key
+                getters.append(partial(_reference_key, column))
+            else:
+                getters.append(attrgetter(column))
+
+        if all(isinstance(g, attrgetter) for g in getters):
+            row_of = attrgetter(*headers)
+            if len(headers) == 1:
+                row_of = lambda obj, get=row_of: (get(obj),)
+        else:
+            row_of = lambda obj: tuple(get(obj) for get in getters)
 
+        columns = ','.join(map(quote, headers))
+        statement = f'INSERT OR REPLACE INTO {table} ({columns}) VALUES ({",".join("?" * len(headers))})'
+        plan = self.__export_plans[plan_key] = (statement, row_of)
+        return plan
+
+    def export(self, location: str, stream: Iterator[Union[dict, Model]], *, chunk_size: Optional[int] = None) -> ExportStats:
+        """
+        Inserts or replaces rows of a table, rows are written in chunks with a transaction committed per chunk.
+        When called inside a transaction which is already open, chunks are written to it and left uncommitted.
 
-    def export(self, location: str, stream: Iterator[Union[dict, Model]]) -> None:
+        Parameters
+        ----------
+        location: :class:`str`
+            Table to export data to
+        stream: Iterator[Union[:class:`dict`, :class:`Model`]]
+            Objects to export, dicts are validated using the model binded to location
+        chunk_size: Optional[:class:`int`]
+            Number of rows written per transaction, defaults to the driver's ``chunk_size``
+        """
         assert self._model_fits(location), "Incorrect model or no model binded for this table"
         model = self._get_model(location)
-        include = set(self.__headers[location])
+        statement, row_of = self.__export_plan(location, model)
+        chunk_size = chunk_size or self.__chunk_size
+        connection = self.__connection
+
+        started = perf_counter()
+        rows = chunks = 0
+        stream = iter(stream)
+        while True:
+            objs = [model(**data) if isinstance(data, dict) else data for data in islice(stream, chunk_size)]
+            if not objs:
+                break
+
+            owned = not connection.in_transaction
+            if owned:
+                connection.execute('BEGIN')
+            try:
+                try:
+                    connection.executemany(statement, [row_of(obj) for obj in objs])
+                except OperationalError:
+                    ## Statements failing before any row is written are rebuilt once if the table changed
+                    if not self._schema_changed():
+                        raise
+                    assert self._model_fits(location), "Incorrect model or no model binded for this table"
+                    statement, row_of = self.__export_plan(location, model)
+                    connection.executemany(statement, [row_of(obj) for obj in objs])
+            except BaseException:
+                if owned:
+                    connection.rollback()
+                raise
+            if owned:
+                connection.commit()
+            rows += len(objs)
+            chunks += 1
+
+        return ExportStats(rows, chunks, perf_counter() - started)
+
+    def delete(self, location: str, keys: Iterable[Any], *, key: Optional[str] = None) -> None:
+        table = self.__maps.get(location, location)
+        if key is None:
+            model = self._get_model(location)
+            assert model, "No model binded for this table, provide key"
+            key = model._config.search_by
+
+        keys = list(keys)
+        for i in range(0, len(keys), self._DELETE_BATCH):
+            batch = keys[i:i + self._DELETE_BATCH]
+            self.__cursor.execute(f'DELETE FROM {table} WHERE {quote(key)} IN ({",".join("?" * len(batch))})', batch)
+
+    def data_version(self) -> int:
+        """ Returns ``PRAGMA data_version`` of the calling thread's connection,
+            the value changes whenever another connection commits to the database file
+        """
+        return self.__connection.execute('PRAGMA data_version').fetchone()[0]
 
-        columns = []
+    def install_change_log(self, location: str, *, key: Optional[str] = None) -> None:
+        """
+        Creates the ``_ezycore_changes`` table and triggers which record the key of every row
+        inserted, updated or deleted in a table, by any connection.
+        Installing is idempotent, see :meth:`SQLiteDriver.changes_since` for reading the log.
 
-        for data in stream:
-            if isinstance(data, dict):
-                if model:
-                    data = model(**data)
-            data = data.dict(include=include)
-            columns.append(tuple(data.values()))
+        Parameters
+        ----------
+        location: :class:`str`
+            Table to record changes of
+        key: Optional[:class:`str`]
+            Column keys are stored under, defaults to ``search_by`` of the model binded to location
+        """
+        table = self.__maps.get(location, location)
+        if key is None:
+            model = self._get_model(location)
+            assert model, "No model binded for this table, provide key"
+            key = model._config.search_by
+        assert key in self._columns(table), f'{key} is not a column of {table}'
+
+        log = quote(self._CHANGE_LOG)
+        name = "'{}'".format(table.replace("'", "''"))
+        column = quote(key)
+        statements = (
+            f'CREATE TABLE IF NOT EXISTS {log} (seq INTEGER PRIMARY KEY AUTOINCREMENT, tbl TEXT NOT NULL, key, '
+            f"at REAL NOT NULL DEFAULT ((julianday('now') - 2440587.5) * 86400.0))",
+            f'CREATE INDEX IF NOT EXISTS {quote(self._CHANGE_LOG + "_at")} ON {log} (at)',
+            f'CREATE TRIGGER IF NOT EXISTS {quote(f"_ezycore_{table}_insert")} AFTER INSERT ON {quote(table)} '
+            f'BEGIN INSERT INTO {log} (tbl, key) VALUES ({name}, NEW.{column}); END',
+            f'CREATE TRIGGER IF NOT EXISTS {quote(f"_ezycore_{table}_update")} AFTER UPDATE ON {quote(table)} '
+            f'BEGIN INSERT INTO {log} (tbl, key) VALUES ({name}, NEW.{column}); '
+            f'INSERT INTO {log} (tbl, key) SELECT {name}, OLD.{column} WHERE OLD.{column} IS NOT NEW.{column}; END',
+            f'CREATE TRIGGER IF NOT EXISTS {quote(f"_ezycore_{table}_delete")} AFTER DELETE ON {quote(table)} '
+            f'BEGIN INSERT INTO {log} (tbl, key) VALUES ({name}, OLD.{column}); END',
+        )
+        self.__write(statements)
+
+    def change_log_position(self) -> int:
+        """ Returns sequence number of the latest change recorded in the change log, 0 if nothing was recorded """
+        connection = self.__connection
+        ## sqlite_sequence only exists once a table using AUTOINCREMENT was created
+        if not connection.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_sequence'").fetchone():
+            return 0
+        row = connection.execute('SELECT seq FROM sqlite_sequence WHERE name = ?', (self._CHANGE_LOG,)).fetchone()
+        return row[0] if row else 0
+
+    def changes_since(self, position: int, locations: Iterable[str]) -> Tuple[int, Dict[str, Optional[List[Any]]]]:
+        """
+        Reads keys changed after a position of the change log, see :meth:`SQLiteDriver.install_change_log`.
+        Returns the new position and the changed keys of every location which changed.
+        Keys of a location are ``None`` when the changes were pruned before being read,
+        in which case any key may have changed.
+
+        Parameters
+        ----------
+        position: :class:`int`
+            Position returned by the previous call or :meth:`SQLiteDriver.change_log_position`
+        locations: Iterable[:class:`str`]
+            Tables to read changes of
+        """
+        tables = {self.__maps.get(location, location): location for location in locations}
+        connection = self.__connection
+        log = quote(self._CHANGE_LOG)
+
+        ## Read in one transaction, so rows can't be pruned in between
+        owned = not connection.in_transaction
+        if owned:
+            connection.execute('BEGIN')
+        try:
+            latest = self.change_log_position()
+            if latest <= position:
+                return position, dict()
+            first = connection.execute(f'SELECT min(seq) FROM {log}').fetchone()[0]
+            if first is None or first > position + 1:
+                return latest, dict.fromkeys(tables.values())
+
+            changed: Dict[str, Dict[Any, None]] = dict()
+            rows = connection.execute(f'SELECT tbl, key FROM {log} WHERE seq > ? AND seq <= ?', (position, latest))
+            for table, key in rows:
+                location = tables.get(table)
+                if location is not None:
+                    changed.setdefault(location, dict())[key] = None
+        finally:
+            if owned:
+                connection.commit()
+        return latest, {location: list(keys) for location, keys in changed.items()}
+
+    def prune_change_log(self, before: float) -> int:
+        """ Deletes changes recorded before a time, returns number of changes deleted
 
-        v = ('?',) * len(include)
-        self.__cursor.executemany(f'INSERT OR REPLACE INTO {location} VALUES ({",".join(v)})', columns)
+        Parameters
+        ----------
+        before: :class:`float`
+            Unix timestamp, changes older than this are deleted
+        """
+        return self.__write((f'DELETE FROM {quote(self._CHANGE_LOG)} WHERE at < ?',), (before,))
+
+    def __write(self, statements: Iterable[str], parameters: Tuple[Any, ...] = ()) -> int:
+        ## Runs statements in a transaction, committed unless one was already open
+        connection = self.__connection
+        owned = not connection.in_transaction
+        if owned:
+            connection.execute('BEGIN')
+        try:
+            changed = sum(max(connection.execute(statement, parameters).rowcount, 0) for statement in statements)
+        except BaseException:
+            if owned:
+                connection.rollback()
+            raise
+        if owned:
+            connection.commit()
+        return changed
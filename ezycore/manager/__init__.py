@@ -1,2 +1,11 @@
 from .core import BaseManager, Manager
-from .segment import BaseSegment, Segment
+from .segment import BaseSegment, Segment, ConcurrentSegment
+from .sharded import ShardedSegment
+from .tiered import TieredSegment
+from .locks import RWLock
+from .loaders import SingleFlight, AsyncSingleFlight
+from .aio import AsyncManager, AsyncSegment
+from .writeback import WriteBehind
+from .changes import ChangeTracker, Checkpoint
+from .watcher import ChangeWatcher
+from .policies import BasePolicy, LRUPolicy, LFUPolicy, FIFOPolicy, ARCPolicy, TinyLFUPolicy
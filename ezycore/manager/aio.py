@@ -0,0 +1,223 @@
+from __future__ import annotations
+
+from ezycore.models import Model, M
+from ezycore.drivers.aio import AsyncDriver
+from ezycore.query import F, Expr
+from .core import Manager
+from .segment import BaseSegment, Segment
+from .sharded import ShardedSegment
+from .loaders import AsyncSingleFlight
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Union
+from asyncio import sleep
+
+
+class AsyncSegment:
+    """
+    asyncio front end for a segment.
+
+    Hits are served straight from the wrapped segment without leaving the event loop,
+    only misses loaded through ``driver`` and other I/O yield.
+
+    Parameters
+    ----------
+    segment: :class:`BaseSegment`
+        Segment to wrap
+    driver: Optional[:class:`AsyncDriver`]
+        Driver used by :meth:`AsyncSegment.get_or_load`
+    location: Optional[:class:`str`]
+        Location passed to ``driver``, defaults to the name of the segment
+    loader: Optional[Callable[[Any], Awaitable[Optional[:class:`Model`]]]]
+        Coroutine function returning the object of a key, used instead of ``driver`` when provided
+    trusted: Optional[:class:`bool`]
+        Whether loaded objects are added without validation,
+        defaults to ``True`` for drivers and ``False`` for loaders
+
+    .. note::
+        Concurrent misses for the same key share a single load.
+        Don't bind a blocking loader to the wrapped segment with :meth:`Segment.set_loader`,
+        a miss would then block the event loop.
+    """
+    def __init__(self, segment: BaseSegment, *, driver: Optional[AsyncDriver] = None, location: Optional[str] = None,
+                 loader: Optional[Callable[[Any], Awaitable[Optional[M]]]] = None, trusted: Optional[bool] = None) -> None:
+        assert isinstance(segment, BaseSegment), 'segment must inherit the BaseSegment class'
+        assert driver is None or isinstance(driver, AsyncDriver), 'driver must inherit the AsyncDriver class'
+        assert loader is None or callable(loader), 'loader must be a coroutine function'
+        self.__segment = segment
+        self.__driver = driver
+        self.__location = location
+        self.__loader = loader
+        self.__trusted = (loader is None) if trusted is None else trusted
+        self.__flights = AsyncSingleFlight()
+
+    @property
+    def segment(self) -> BaseSegment:
+        """ Returns the wrapped segment """
+        return self.__segment
+
+    @property
+    def driver(self) -> Optional[AsyncDriver]:
+        """ Returns driver used to load misses """
+        return self.__driver
+
+    @property
+    def location(self) -> str:
+        """ Returns location passed to the driver """
+        return self.__location or self.__segment.name
+
+    async def get(self, obj_key: Any, *flags, default: Any = ..., **export_kwds) -> Optional[M]:
+        """ Retrieves an element from cache, see :meth:`BaseSegment.get` """
+        return self.__segment.get(obj_key, *flags, default=default, **export_kwds)
+
+    async def get_many(self, obj_keys: Iterable[Any], *flags, default: Any = ..., **export_kwds) -> List[M]:
+        """ Retrieves many elements from cache, see :meth:`BaseSegment.get_many` """
+        return self.__segment.get_many(obj_keys, *flags, default=default, **export_kwds)
+
+    async def get_or_load(self, obj_key: Any, *flags, default: Any = ..., **export_kwds) -> Optional[M]:
+        """ Retrieves an element from cache, loading it using the driver when missing.
+            The loaded element is added to the segment before being returned.
+
+        Parameters
+        ----------
+        obj_key: Any
+            value to search for, set in `Model._config.search_by`
+        *flags
+            elements to include in cache, read more in the :class:`Model`'s section
+        default: Any
+            default value if element isn't found by the driver either,
+            if not provided `ValueError` is raised
+        **export_kwds:
+            export kwargs, read more `here <https://docs.pydantic.dev/usage/exporting_models/>`_
+        """
+        segment = self.__segment
+        value = segment.get(obj_key, *flags, default=None, **export_kwds)
+        if value is not None:
+            return value
+        if self.__driver is None and self.__loader is None:
+            raise ValueError('No driver or loader set to load missing objects')
+
+        if not await self.__flights.do(obj_key, self.__load, obj_key):
+            if default is ...:
+                raise ValueError('Object not found')
+            return default
+        return segment.get(obj_key, *flags, default=default, **export_kwds)
+
+    async def __load(self, obj_key: Any) -> bool:
+        segment = self.__segment
+        if self.__loader is not None:
+            obj = await self.__loader(obj_key)
+        else:
+            model = segment.model
+            obj = await self.__driver.fetch_one(self.location, F(model._config.search_by) == obj_key, model=model)
+        if obj is None:
+            return False
+
+        segment.add(obj, overwrite=True, **_loaded(segment, self.__trusted))
+        return True
+
+    async def add(self, obj: M, *, overwrite: bool = False, **kwds) -> None:
+        """ Adds an element, see :meth:`BaseSegment.add` """
+        self.__segment.add(obj, overwrite=overwrite, **kwds)
+
+    async def add_many(self, objs: Iterable[M], *, overwrite: bool = False, **kwds) -> None:
+        """ Adds many elements, see :meth:`BaseSegment.add_many` """
+        self.__segment.add_many(objs, overwrite=overwrite, **kwds)
+
+    async def remove(self, obj_key: Any, *default: Any) -> Optional[Model]:
+        """ Removes an element, see :meth:`BaseSegment.remove` """
+        return self.__segment.remove(obj_key, *default)
+
+    async def search(self, func: Union[Callable[[Model], bool], Expr], *fields, limit: int = -1, **export_kwds) -> Iterable[M]:
+        """ Searches for elements, see :meth:`BaseSegment.search` """
+        return self.__segment.search(func, *fields, limit=limit, **export_kwds)
+
+    async def invalidate_all(self, func: Union[Callable[[Model], bool], Expr], *, limit: int = -1) -> Iterable[Model]:
+        """ Invalidates matching elements, see :meth:`BaseSegment.invalidate_all` """
+        return self.__segment.invalidate_all(func, limit=limit)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(segment={self.__segment!r}, driver={self.__driver!r})"
+
+
+def _loaded(segment: BaseSegment, trusted: bool = True) -> Dict[str, bool]:
+    ## Objects returned by drivers have already been persisted, models have also been validated
+    if not isinstance(segment, (Segment, ShardedSegment)):
+        return dict()
+    return {'trusted': True, 'dirty': False} if trusted else {'dirty': False}
+
+
+class AsyncManager(Manager):
+    """ Manager for asyncio applications, driver I/O is awaited instead of blocking the event loop.
+        Segments are still reached synchronously through the usual methods,
+        :meth:`AsyncManager.segment` returns their :class:`AsyncSegment` front end.
+
+    Parameters
+    ----------
+    locations: List[Union[str, BaseSegment]]
+        List of locations to manage
+    models: Dict[:class:`str`, :class:`Model`]
+        Models to intialise segments with, if segment already has model, model is overwritten
+    location_data: Dict[:class:`str`, Dict[:class:`str`, Any]]
+        Kwargs for defining segment if segment doesn't already exist. Meaning its being passed by string
+    driver: Optional[:class:`AsyncDriver`]
+        Default driver of every :class:`AsyncSegment`
+    chunk_size: :class:`int`
+        Number of elements added before yielding to the event loop while populating
+    """
+    def __init__(self, *args, driver: Optional[AsyncDriver] = None, chunk_size: int = 1000, **kwds) -> None:
+        super().__init__(*args, **kwds)
+        assert driver is None or isinstance(driver, AsyncDriver), 'driver must inherit the AsyncDriver class'
+        assert type(chunk_size) == int and chunk_size > 0, 'Chunk size must be a positive integer'
+        self.__driver = driver
+        self.__chunk_size = chunk_size
+        self.__fronts: Dict[str, AsyncSegment] = dict()
+
+    def segment(self, location: str) -> AsyncSegment:
+        """ Returns the :class:`AsyncSegment` of a segment
+
+        Parameters
+        ----------
+        location: :class:`str`
+            Name of segment
+        """
+        seg = self.get_segment(location)
+        front = self.__fronts.get(location)
+        if front is None or front.segment is not seg:
+            front = self.__fronts[location] = AsyncSegment(seg, driver=self.__driver, location=location)
+        return front
+
+    async def populate_using_driver(self, location: str, driver: Optional[AsyncDriver] = None, **driver_kwargs) -> None:
+        """ Populate a segment using an async driver, rows are streamed and added in chunks yielding to the event loop between them
+
+        Parameters
+        ----------
+        location: :class:`str`
+            Name of segment to populate
+        driver: Optional[:class:`AsyncDriver`]
+            Driver to use, defaults to the manager's driver
+        **driver_kwargs:
+            Additional kwargs for :meth:`AsyncDriver.fetch`
+        """
+        seg = self.get_segment(location)
+        driver = driver or self.__driver
+
+        if not driver_kwargs.get('model'):
+            driver_kwargs['model'] = seg.model
+
+        kwds = _loaded(seg, not driver_kwargs.get('ignore_model', False))
+        async for chunk in driver.fetch_chunks(location, chunk_size=self.__chunk_size, **driver_kwargs):
+            seg.add_many(chunk, **kwds)
+            await sleep(0)
+
+    async def export_segment(self, location: str, driver: Optional[AsyncDriver] = None, **driver_kwargs) -> None:
+        """ Export a segment using an async driver
+
+        Parameters
+        ----------
+        location: :class:`str`
+            Name of segment to export
+        driver: Optional[:class:`AsyncDriver`]
+            Driver to use, defaults to the manager's driver
+        **driver_kwargs:
+            Additional kwargs for :meth:`AsyncDriver.export`
+        """
+        await (driver or self.__driver).export(location, self.get_segment(location), **driver_kwargs)
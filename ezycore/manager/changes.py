@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+from ezycore.exceptions import SegmentError
+from ezycore.models import Model
+from typing import Any, Dict, List, NamedTuple, Optional
+from threading import Lock
+from time import time
+
+
+class Checkpoint(NamedTuple):
+    """ Changes captured by :meth:`ChangeTracker.checkpoint` which need exporting """
+    id: int
+    upserts: List[Model]
+    deletes: List[Any]
+    created_at: float
+
+
+class ChangeTracker:
+    """
+    Tracks keys written to and removed from a segment since the last successful export,
+    see :meth:`Segment.track_changes`.
+
+    Exporting works in three steps, :meth:`ChangeTracker.checkpoint` captures every pending change,
+    once they're persisted :meth:`ChangeTracker.commit` marks the checkpoint as done.
+    If persisting fails :meth:`ChangeTracker.rollback` puts the changes back so the next export retries them,
+    changes made since the checkpoint was taken are kept.
+
+    Written objects are kept until they're exported, so entries evicted before being exported aren't lost.
+    """
+    def __init__(self) -> None:
+        self.__lock = Lock()
+        self.__dirty: Dict[Any, Model] = dict()
+        self.__deleted: Dict[Any, None] = dict()
+        self.__in_flight: Optional[Checkpoint] = None
+        self.__last: Optional[Checkpoint] = None
+        self.__ids = 0
+
+    @property
+    def pending(self) -> int:
+        """ Returns number of keys changed since the last checkpoint """
+        return len(self.__dirty) + len(self.__deleted)
+
+    @property
+    def last_checkpoint(self) -> Optional[Checkpoint]:
+        """ Returns the last committed checkpoint """
+        return self.__last
+
+    @property
+    def in_flight(self) -> Optional[Checkpoint]:
+        """ Returns the checkpoint currently being exported """
+        return self.__in_flight
+
+    def record(self, obj_key: Any, obj: Optional[Model]) -> None:
+        """ Marks a key as changed, ``obj`` is ``None`` when the key was removed.
+            Called by the segment for every write.
+
+        Parameters
+        ----------
+        obj_key: Any
+            Key written to
+        obj: Optional[:class:`Model`]
+            New value of key
+        """
+        with self.__lock:
+            if obj is None:
+                self.__dirty.pop(obj_key, None)
+                self.__deleted[obj_key] = None
+            else:
+                self.__deleted.pop(obj_key, None)
+                self.__dirty[obj_key] = obj
+
+    def checkpoint(self) -> Checkpoint:
+        """ Captures every pending change, raises `SegmentError` if the previous checkpoint wasn't committed or rolled back """
+        with self.__lock:
+            if self.__in_flight is not None:
+                raise SegmentError(f'Checkpoint {self.__in_flight.id} is still being exported')
+            self.__ids += 1
+            checkpoint = Checkpoint(self.__ids, list(self.__dirty.values()), list(self.__deleted), time())
+            self.__dirty = dict()
+            self.__deleted = dict()
+            self.__in_flight = checkpoint
+        return checkpoint
+
+    def commit(self, checkpoint: Checkpoint) -> None:
+        """ Marks a checkpoint as exported
+
+        Parameters
+        ----------
+        checkpoint: :class:`Checkpoint`
+            Checkpoint returned by :meth:`ChangeTracker.checkpoint`
+        """
+        with self.__lock:
+            self.__finish(checkpoint)
+            self.__last = checkpoint
+
+    def rollback(self, checkpoint: Checkpoint, search_by: str) -> None:
+        """ Puts the changes of a checkpoint which failed to export back into pending changes
+
+        Parameters
+        ----------
+        checkpoint: :class:`Checkpoint`
+            Checkpoint returned by :meth:`ChangeTracker.checkpoint`
+        search_by: :class:`str`
+            Key field of exported objects
+        """
+        with self.__lock:
+            self.__finish(checkpoint)
+            dirty, deleted = self.__dirty, self.__deleted
+            for obj in checkpoint.upserts:
+                key = getattr(obj, search_by)
+                if key not in dirty and key not in deleted:
+                    dirty[key] = obj
+            for key in checkpoint.deletes:
+                if key not in dirty and key not in deleted:
+                    deleted[key] = None
+
+    def __finish(self, checkpoint: Checkpoint) -> None:
+        if self.__in_flight is not checkpoint:
+            raise SegmentError(f'Checkpoint {checkpoint.id} is not being exported')
+        self.__in_flight = None
+
+    def clear(self) -> None:
+        """ Forgets every pending change """
+        with self.__lock:
+            self.__dirty.clear()
+            self.__deleted.clear()
@@ -2,10 +2,13 @@
 from abc import ABC, abstractmethod
 
 from .segment import BaseSegment, Segment
+from .sharded import ShardedSegment
 from ezycore.models import M, Model
 from ezycore.drivers import Driver
+from ezycore.exceptions import SegmentError
 
 from typing import Any, List, Tuple, Type, Dict, Iterable, Union, Optional
+from itertools import islice
 
 
 class BaseManager(ABC):
@@ -41,15 +44,15 @@ def __init__(
         for v in locations:
             if type(v) == str:
                 self.__locations[v] = self.__seg_cls()(**location_data.get(v, dict(name=v, model=self.__models.get(v))))
-            elif not issubclass(v, BaseSegment):
+            elif not isinstance(v, BaseSegment):
                 raise TypeError('Locations provided must be of type str or inherit BaseSegment class')
             else:
                 self.__locations[v.name] = v
 
-                self.replace_model(self.__locations[v.name], self.__models.get(v.name, v.model))
+                self.replace_model(v.name, self.__models.get(v.name, v.model))
                 self.__models[v.name] = v.model
 
-            self.__locations[v]._set_manager(self)
+            self.__locations[getattr(v, 'name', v)]._set_manager(self)
 
         self._k: Tuple[str] = tuple(self.__locations)
 
@@ -92,7 +95,7 @@ def populate_using_driver(self, location: str, driver: Driver, **driver_kwargs)
         """
 
     @abstractmethod
-    def export_segment(self, location: str, driver: Driver = None, **driver_kwargs) -> None:
+    def export_segment(self, location: str, driver: Driver = None, *, incremental: bool = False, **driver_kwargs) -> None:
         """ Export a segment using a driver or any class which can handle a `export` method
 
         Parameters
@@ -101,6 +104,11 @@ def export_segment(self, location: str, driver: Driver = None, **driver_kwargs)
             Name of segment to export
         driver: :class:`Driver`
             Driver to use
+        incremental: :class:`bool`
+            Only export elements written since the last incremental export and delete removed ones
+            using :meth:`Driver.delete`, followed by :meth:`Driver.commit`.
+            The segment must track its changes, see :meth:`Segment.track_changes`.
+            If exporting fails the changes are kept, so calling again retries them
         **driver_kwargs:
             Additional kwargs for :meth:`Driver.export`
         """
@@ -258,8 +266,8 @@ def __getitem__(self, segment: str) -> Segment:
             raise KeyError("Segment not found") from err
 
     def __setitem__(self, segment: str, new_segment: Segment) -> None:
-        if not isinstance(new_segment, Segment):
-            raise TypeError('new_segment must of type "Segment" not "{}"'.format(new_segment.__class__.__name__))
+        if not isinstance(new_segment, BaseSegment):
+            raise TypeError('new_segment must inherit "BaseSegment" not "{}"'.format(new_segment.__class__.__name__))
         self.replace_segment(segment, new_segment)
 
     def __delitem__(self, segment: str) -> None:
@@ -306,6 +314,9 @@ class Manager(BaseManager):
         Kwargs for defining segment if segment doesn't already exist. Meaning its being passed by string
     """
 
+    ## Rows added at once by populate_using_driver
+    _POPULATE_CHUNK = 1000
+
     @staticmethod
     def _BaseManager__seg_cls():
         return Segment
@@ -320,8 +331,7 @@ def populate(self, location: str, *d, data: Iterable[M] = tuple()) -> None:
         d = tuple(data) + d
         seg = self.get_segment(location)
 
-        for loc in d:
-            seg.add(loc)
+        seg.add_many(d)
 
     def populate_using_driver(self, location: str, driver: Driver, **driver_kwargs) -> None:
         seg = self.get_segment(location)
@@ -329,13 +339,43 @@ def populate_using_driver(self, location: str, driver: Driver, **driver_kwargs)
         if not driver_kwargs.get('model'):
             driver_kwargs['model'] = seg.model
 
-        for loc in driver.fetch(location, **driver_kwargs):
-            seg.add(loc)
-
-    def export_segment(self, location: str, driver: Driver = None, **driver_kwargs) -> None:
+        ## Models returned by drivers have already been validated and persisted
+        kwds = dict()
+        if isinstance(seg, (Segment, ShardedSegment)):
+            kwds.update(dirty=False)
+            if not driver_kwargs.get('ignore_model', False):
+                kwds.update(trusted=True)
+        ## Rows are added in chunks so streaming drivers never hold the whole result in memory
+        rows = iter(driver.fetch(location, **driver_kwargs) or ())
+        while True:
+            chunk = tuple(islice(rows, self._POPULATE_CHUNK))
+            if not chunk:
+                break
+            seg.add_many(chunk, **kwds)
+
+    def export_segment(self, location: str, driver: Driver = None, *, incremental: bool = False, **driver_kwargs) -> None:
         seg = self.get_segment(location)
 
-        driver.export(location, seg, **driver_kwargs)
+        if not incremental:
+            driver.export(location, seg, **driver_kwargs)
+            return
+
+        changes = getattr(seg, 'changes', None)
+        if changes is None:
+            raise SegmentError(f'Changes of {location!r} are not tracked, call track_changes() first')
+
+        checkpoint = changes.checkpoint()
+        try:
+            if checkpoint.upserts:
+                driver.export(location, checkpoint.upserts, **driver_kwargs)
+            if checkpoint.deletes:
+                driver.delete(location, checkpoint.deletes)
+            driver.commit()
+        except BaseException:
+            ## Writes made during the export stay newer than the ones put back
+            changes.rollback(checkpoint, seg.model._config.search_by)
+            raise
+        changes.commit(checkpoint)
 
     ###########################################################################################
     ##
@@ -0,0 +1,169 @@
+from __future__ import annotations
+from abc import ABC, abstractmethod
+
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+from bisect import bisect_left, bisect_right
+
+
+class BaseIndex(ABC):
+    """
+    Base class for secondary indexes, maps field values to primary keys
+
+    Parameters
+    ----------
+    field: :class:`str`
+        Name of field being indexed
+    """
+    kind: str = None
+
+    def __init__(self, field: str) -> None:
+        self.field = field
+
+    @abstractmethod
+    def insert(self, key: Any, value: Any) -> None:
+        """ Adds a primary key under a value """
+
+    @abstractmethod
+    def remove(self, key: Any, value: Any) -> None:
+        """ Removes a primary key stored under a value """
+
+    @abstractmethod
+    def find(self, value: Any) -> Iterable[Any]:
+        """ Returns all primary keys stored under a value """
+
+    @abstractmethod
+    def count(self, value: Any) -> int:
+        """ Returns number of primary keys stored under a value """
+
+    @abstractmethod
+    def clear(self) -> None:
+        """ Removes all keys from index """
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(field={self.field})"
+
+
+class HashIndex(BaseIndex):
+    """ Index for equality lookups, values must be hashable """
+    kind = 'hash'
+
+    def __init__(self, field: str) -> None:
+        super().__init__(field)
+        self.__map: Dict[Any, Dict[Any, None]] = dict()
+
+    def insert(self, key: Any, value: Any) -> None:
+        self.__map.setdefault(value, dict())[key] = None
+
+    def remove(self, key: Any, value: Any) -> None:
+        keys = self.__map.get(value)
+        if keys is None:
+            return
+        keys.pop(key, None)
+        if not keys:
+            del self.__map[value]
+
+    def find(self, value: Any) -> Iterable[Any]:
+        return tuple(self.__map.get(value, ()))
+
+    def count(self, value: Any) -> int:
+        return len(self.__map.get(value, ()))
+
+    def clear(self) -> None:
+        self.__map.clear()
+
+
+class SortedIndex(BaseIndex):
+    """ Index for equality and range lookups, values must be comparable with each other.
+        ``None`` values are stored separately and never returned by range lookups.
+    """
+    kind = 'sorted'
+
+    def __init__(self, field: str) -> None:
+        super().__init__(field)
+        self.__values: List[Any] = list()
+        self.__keys: List[Any] = list()
+        self.__none: Dict[Any, None] = dict()
+
+    def insert(self, key: Any, value: Any) -> None:
+        if value is None:
+            self.__none[key] = None
+            return
+        i = bisect_right(self.__values, value)
+        self.__values.insert(i, value)
+        self.__keys.insert(i, key)
+
+    def remove(self, key: Any, value: Any) -> None:
+        if value is None:
+            self.__none.pop(key, None)
+            return
+        i = bisect_left(self.__values, value)
+        j = bisect_right(self.__values, value, lo=i)
+        for k in range(i, j):
+            if self.__keys[k] == key:
+                del self.__values[k]
+                del self.__keys[k]
+                return
+
+    def find(self, value: Any) -> Iterable[Any]:
+        if value is None:
+            return tuple(self.__none)
+        return tuple(self.range(value, value))
+
+    def count(self, value: Any) -> int:
+        if value is None:
+            return len(self.__none)
+        return self.count_range(value, value)
+
+    def __bounds(self, low: Any, high: Any, include_low: bool, include_high: bool) -> Tuple[int, int]:
+        values = self.__values
+        if low is None:
+            start = 0
+        else:
+            start = (bisect_left if include_low else bisect_right)(values, low)
+        if high is None:
+            stop = len(values)
+        else:
+            stop = (bisect_right if include_high else bisect_left)(values, high)
+        return start, max(start, stop)
+
+    def count_range(self, low: Any = None, high: Any = None, *,
+                    include_low: bool = True, include_high: bool = True) -> int:
+        """ Returns number of primary keys whose value is between ``low`` and ``high``, 
+            see :meth:`SortedIndex.range`
+        """
+        start, stop = self.__bounds(low, high, include_low, include_high)
+        return stop - start
+
+    def range(self, low: Any = None, high: Any = None, *,
+              include_low: bool = True, include_high: bool = True, reverse: bool = False) -> Iterator[Any]:
+        """ Yields primary keys whose value is between ``low`` and ``high``, ordered by value
+
+        Parameters
+        ----------
+        low: Any
+            Lowest value, if ``None`` no lower bound is set
+        high: Any
+            Highest value, if ``None`` no upper bound is set
+        include_low: :class:`bool`
+            Whether values equal to ``low`` are included
+        include_high: :class:`bool`
+            Whether values equal to ``high`` are included
+        reverse: :class:`bool`
+            Whether to yield keys from the highest value first
+        """
+        start, stop = self.__bounds(low, high, include_low, include_high)
+        if reverse:
+            return (self.__keys[i] for i in range(stop - 1, start - 1, -1))
+        return (self.__keys[i] for i in range(start, stop))
+
+    def none_keys(self) -> Iterable[Any]:
+        """ Returns primary keys whose value is ``None`` """
+        return tuple(self.__none)
+
+    def clear(self) -> None:
+        self.__values.clear()
+        self.__keys.clear()
+        self.__none.clear()
+
+
+INDEX_TYPES = {i.kind: i for i in (HashIndex, SortedIndex)}
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+from ezycore.drivers import Driver
+from ezycore.exceptions import SegmentError
+from ezycore.models import Model, M
+from ezycore.query import F
+from typing import Any, Awaitable, Callable, Dict, Optional, Type
+from threading import Event, Lock
+from asyncio import Future, ensure_future, shield
+
+
+## Returns the object stored under a key, None if it doesn't exist
+Loader = Callable[[Any], Optional[M]]
+
+
+def driver_loader(driver: Driver, location: str, model: Type[Model]) -> Loader:
+    """ Returns a loader fetching single objects by their ``search_by`` field using a driver.
+        Calls are serialized since drivers aren't expected to be used by many threads at once,
+        unless the driver is ``threaded`` like :class:`SQLiteDriver` can be.
+
+    Parameters
+    ----------
+    driver: :class:`Driver`
+        Driver to fetch objects with
+    location: :class:`str`
+        Location passed to the driver
+    model: :class:`Model`
+        Model of fetched objects
+    """
+    lock = Lock()
+    field = model._config.search_by
+
+    def load(obj_key: Any) -> Optional[M]:
+        with lock:
+            return driver.fetch_one(location, F(field) == obj_key, model=model)
+
+    def load_concurrently(obj_key: Any) -> Optional[M]:
+        return driver.fetch_one(location, F(field) == obj_key, model=model)
+    return load_concurrently if getattr(driver, 'threaded', False) else load
+
+
+def check_shareable(driver: Driver) -> None:
+    """ Raises `SegmentError` if a driver can't be used by the threads sharing a segment
+
+    Parameters
+    ----------
+    driver: :class:`Driver`
+        Driver loading missing keys
+    """
+    if driver.thread_bound:
+        raise SegmentError(
+            f'{driver.__class__.__name__} can only be used by the thread which created it, '
+            'create it with threaded=True or check_same_thread=False to load keys from many threads'
+        )
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self) -> None:
+        self.done = Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key into a single call,
+    threads arriving while a call is running wait for it and share its result or exception.
+    """
+    def __init__(self) -> None:
+        self.__lock = Lock()
+        self.__calls: Dict[Any, _Call] = dict()
+
+    def __len__(self) -> int:
+        return len(self.__calls)
+
+    def do(self, key: Any, func: Callable[..., Any], *args) -> Any:
+        """ Calls ``func(*args)`` unless a call for ``key`` is already running, in which case its result is returned
+
+        Parameters
+        ----------
+        key: Any
+            Key calls are coalesced by
+        func: Callable[..., Any]
+            Function to call
+        """
+        with self.__lock:
+            call = self.__calls.get(key)
+            leader = call is None
+            if leader:
+                call = self.__calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func(*args)
+        except BaseException as err:
+            call.error = err
+            raise
+        finally:
+            with self.__lock:
+                del self.__calls[key]
+            call.done.set()
+        return call.result
+
+
+class AsyncSingleFlight:
+    """
+    asyncio version of :class:`SingleFlight`, the call runs as a task
+    so a caller being cancelled doesn't cancel it for the others.
+    """
+    def __init__(self) -> None:
+        self.__tasks: Dict[Any, Future] = dict()
+
+    def __len__(self) -> int:
+        return len(self.__tasks)
+
+    async def do(self, key: Any, func: Callable[..., Awaitable[Any]], *args) -> Any:
+        """ Awaits ``func(*args)`` unless a call for ``key`` is already running, in which case its result is returned
+
+        Parameters
+        ----------
+        key: Any
+            Key calls are coalesced by
+        func: Callable[..., Awaitable[Any]]
+            Coroutine function to call
+        """
+        task = self.__tasks.get(key)
+        if task is None:
+            task = self.__tasks[key] = ensure_future(func(*args))
+            task.add_done_callback(lambda done: self.__tasks.pop(key) if self.__tasks.get(key) is done else None)
+        return await shield(task)
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from threading import Condition, Lock, get_ident
+from typing import Dict, Iterator, Optional
+
+
+class RWLock:
+    """
+    Reader/writer lock, many threads can read at once while writes are exclusive.
+
+    Waiting writers are preferred over new readers so writes can't be starved by constant reads.
+    Both sides are reentrant and a thread holding the write lock may also read,
+    however a read lock can't be upgraded into a write lock.
+
+    Using the lock as a context manager acquires the write lock.
+    """
+    def __init__(self) -> None:
+        self.__mutex = Lock()
+        self.__cond = Condition(self.__mutex)
+        self.__readers = 0
+        self.__waiting = 0
+        self.__owner: Optional[int] = None
+        self.__depth = 0
+        ## Thread id -> read depth, negative when the read was taken while holding the write lock
+        self.__held: Dict[int, int] = dict()
+
+    @property
+    def readers(self) -> int:
+        """ Returns number of threads currently reading """
+        return self.__readers
+
+    def acquire_read(self) -> None:
+        """ Acquires the lock for reading, blocking while a writer holds or waits for it """
+        me = get_ident()
+        depth = self.__held.get(me)
+        if depth:
+            self.__held[me] = depth + 1 if depth > 0 else depth - 1
+            return
+        if self.__owner == me:
+            self.__held[me] = -1
+            return
+
+        with self.__mutex:
+            while self.__owner is not None or self.__waiting:
+                self.__cond.wait()
+            self.__readers += 1
+        self.__held[me] = 1
+
+    def release_read(self) -> None:
+        me = get_ident()
+        depth = self.__held[me]
+        if depth > 1 or depth < -1:
+            self.__held[me] = depth - 1 if depth > 0 else depth + 1
+            return
+        del self.__held[me]
+        if depth < 0:
+            return
+        with self.__mutex:
+            self.__readers -= 1
+            if not self.__readers:
+                self.__cond.notify_all()
+
+    def acquire_write(self, blocking: bool = True) -> bool:
+        """ Acquires the lock for writing, returns whether it was acquired
+
+        Parameters
+        ----------
+        blocking: :class:`bool`
+            Whether to wait for other readers/writers,
+            if ``False`` and the lock is in use ``False`` is returned straight away
+        """
+        me = get_ident()
+        if self.__owner == me:
+            self.__depth += 1
+            return True
+        if me in self.__held:
+            if not blocking:
+                return False
+            raise RuntimeError('Cannot upgrade a read lock into a write lock')
+
+        with self.__mutex:
+            if self.__owner is not None or self.__readers:
+                if not blocking:
+                    return False
+                self.__waiting += 1
+                try:
+                    while self.__owner is not None or self.__readers:
+                        self.__cond.wait()
+                finally:
+                    self.__waiting -= 1
+            self.__owner = me
+            self.__depth = 1
+        return True
+
+    def release_write(self) -> None:
+        if self.__owner != get_ident():
+            raise RuntimeError('Cannot release a write lock which is not held')
+        self.__depth -= 1
+        if self.__depth:
+            return
+        with self.__mutex:
+            self.__owner = None
+            self.__cond.notify_all()
+
+    @contextmanager
+    def read(self) -> Iterator[None]:
+        """ Holds the lock for reading while in the ``with`` block """
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def write(self) -> Iterator[None]:
+        """ Holds the lock for writing while in the ``with`` block """
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
+
+    def __enter__(self) -> RWLock:
+        self.acquire_write()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release_write()
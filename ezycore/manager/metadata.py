@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+from array import array
+from time import monotonic
+
+
+NEVER = float('inf')
+
+
+class EntryStats(NamedTuple):
+    """ Snapshot of an entry's metadata, all times are taken from :func:`time.monotonic` """
+    fetches: int
+    inserted_at: float
+    accessed_at: float
+    expires_at: Optional[float]
+
+
+class MetadataStore:
+    """
+    Compact per-entry metadata used by segments,
+    each key is given a slot index into a set of typed arrays, freed slots are reused.
+
+    Keeping this data outside of models means models are never mutated for bookkeeping,
+    and policies/invalidation can read it without touching pydantic objects.
+    """
+    def __init__(self) -> None:
+        self.__slots: Dict[Any, int] = dict()
+        self.__free: List[int] = list()
+
+        self.fetches = array('Q')
+        self.inserted_at = array('d')
+        self.accessed_at = array('d')
+        self.expires_at = array('d')
+
+        self.expiring = 0
+
+    def __len__(self) -> int:
+        return len(self.__slots)
+
+    def __contains__(self, key: Any) -> bool:
+        return key in self.__slots
+
+    def slot(self, key: Any) -> Optional[int]:
+        """ Returns slot index used by a key """
+        return self.__slots.get(key)
+
+    def allocate(self, key: Any, expires_at: float = NEVER) -> int:
+        """ Gives a key a slot with fresh metadata, reusing its current slot if it has one """
+        now = monotonic()
+        slot = self.__slots.get(key)
+
+        if slot is None:
+            if self.__free:
+                slot = self.__free.pop()
+            else:
+                slot = len(self.fetches)
+                self.fetches.append(0)
+                self.inserted_at.append(now)
+                self.accessed_at.append(now)
+                self.expires_at.append(NEVER)
+            self.__slots[key] = slot
+
+        self.fetches[slot] = 0
+        self.inserted_at[slot] = now
+        self.accessed_at[slot] = now
+        self.__set_expiry(slot, expires_at)
+        return slot
+
+    def release(self, key: Any) -> None:
+        """ Frees the slot used by a key """
+        slot = self.__slots.pop(key, None)
+        if slot is None:
+            return
+        self.__set_expiry(slot, NEVER)
+        self.__free.append(slot)
+
+    def touch(self, key: Any, at: Optional[float] = None) -> int:
+        """ Records an access for a key, returning its new fetch count.
+            ``at`` is the monotonic time of the access, defaults to now
+        """
+        slot = self.__slots[key]
+        fetches = self.fetches[slot] + 1
+        self.fetches[slot] = fetches
+        self.accessed_at[slot] = monotonic() if at is None else at
+        return fetches
+
+    def __set_expiry(self, slot: int, expires_at: float) -> None:
+        previous = self.expires_at[slot]
+        self.expires_at[slot] = expires_at
+        self.expiring += (expires_at != NEVER) - (previous != NEVER)
+
+    def set_expiry(self, key: Any, expires_at: float = NEVER) -> None:
+        """ Sets the monotonic deadline of a key, :data:`NEVER` disables expiry """
+        self.__set_expiry(self.__slots[key], expires_at)
+
+    def deadline(self, key: Any) -> float:
+        """ Returns deadline of a key, :data:`NEVER` if it doesn't expire or isn't stored """
+        slot = self.__slots.get(key)
+        return NEVER if slot is None else self.expires_at[slot]
+
+    def deadlines(self) -> Iterator[Tuple[Any, float]]:
+        """ Yields ``(key, deadline)`` for every key which expires """
+        if not self.expiring:
+            return
+        expires_at = self.expires_at
+        for key, slot in self.__slots.items():
+            if expires_at[slot] != NEVER:
+                yield key, expires_at[slot]
+
+    def stats(self, key: Any) -> EntryStats:
+        """ Returns a snapshot of a key's metadata, raises `KeyError` if key isn't stored """
+        slot = self.__slots[key]
+        expires_at = self.expires_at[slot]
+        return EntryStats(
+            self.fetches[slot],
+            self.inserted_at[slot],
+            self.accessed_at[slot],
+            None if expires_at == NEVER else expires_at
+        )
+
+    def clear(self) -> None:
+        self.__slots.clear()
+        self.__free.clear()
+        for arr in (self.fetches, self.inserted_at, self.accessed_at, self.expires_at):
+            del arr[:]
+        self.expiring = 0
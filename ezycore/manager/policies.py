@@ -0,0 +1,442 @@
+from __future__ import annotations
+from abc import ABC, abstractmethod
+
+from typing import Dict, Hashable, Optional
+from collections import OrderedDict
+
+
+class BasePolicy(ABC):
+    """
+    Base class for creating eviction policies,
+    a policy only tracks keys, segments remain responsible for storing data.
+
+    All hooks are called by the segment which owns the policy,
+    a policy instance should therefore never be shared between segments.
+    """
+    def __init__(self) -> None:
+        self._capacity = -1
+
+    @property
+    def capacity(self) -> int:
+        """ Returns number of entries the owning segment can hold, if < 0 then capacity is infinite """
+        return self._capacity
+
+    def set_capacity(self, capacity: int) -> None:
+        """ Called by segments when they are created or resized
+
+        Parameters
+        ----------
+        capacity: :class:`int`
+            Maximum size of segment, if < 0 then size of segment is infinite
+        """
+        self._capacity = capacity
+
+    @abstractmethod
+    def record_insert(self, key: Hashable) -> None:
+        """ Called once a new key has been stored in the segment
+
+        Parameters
+        ----------
+        key: Hashable
+            Key which was added
+        """
+
+    @abstractmethod
+    def record_access(self, key: Hashable) -> None:
+        """ Called when a stored key is fetched or overwritten
+
+        Parameters
+        ----------
+        key: Hashable
+            Key which was accessed
+        """
+
+    @abstractmethod
+    def record_remove(self, key: Hashable) -> None:
+        """ Called when a key is removed from the segment without being evicted
+
+        Parameters
+        ----------
+        key: Hashable
+            Key which was removed
+        """
+
+    def record_miss(self, key: Hashable) -> None:
+        """ Called when a key which isn't stored is requested
+
+        Parameters
+        ----------
+        key: Hashable
+            Key which was requested
+        """
+
+    @abstractmethod
+    def evict(self, candidate: Hashable) -> Hashable:
+        """ Chooses a stored key to remove so ``candidate`` can be inserted,
+            the returned key must no longer be tracked by the policy
+
+        Parameters
+        ----------
+        candidate: Hashable
+            Key which is about to be inserted
+        """
+
+    @abstractmethod
+    def clear(self) -> None:
+        """ Forgets about all tracked keys """
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(capacity={self.capacity})"
+
+
+class LRUPolicy(BasePolicy):
+    """ Evicts the key which was least recently accessed """
+    def __init__(self) -> None:
+        super().__init__()
+        self.__order = OrderedDict()
+
+    def record_insert(self, key: Hashable) -> None:
+        self.__order[key] = None
+
+    def record_access(self, key: Hashable) -> None:
+        self.__order.move_to_end(key)
+
+    def record_remove(self, key: Hashable) -> None:
+        self.__order.pop(key, None)
+
+    def evict(self, candidate: Hashable) -> Hashable:
+        return self.__order.popitem(last=False)[0]
+
+    def clear(self) -> None:
+        self.__order.clear()
+
+
+class FIFOPolicy(BasePolicy):
+    """ Evicts the key which was inserted first, accesses are ignored """
+    def __init__(self) -> None:
+        super().__init__()
+        self.__order = OrderedDict()
+
+    def record_insert(self, key: Hashable) -> None:
+        self.__order[key] = None
+
+    def record_access(self, key: Hashable) -> None:
+        return
+
+    def record_remove(self, key: Hashable) -> None:
+        self.__order.pop(key, None)
+
+    def evict(self, candidate: Hashable) -> Hashable:
+        return self.__order.popitem(last=False)[0]
+
+    def clear(self) -> None:
+        self.__order.clear()
+
+
+class _FrequencyNode:
+    __slots__ = ('count', 'keys', 'prev', 'next')
+
+    def __init__(self, count: int) -> None:
+        self.count = count
+        self.keys = OrderedDict()
+        self.prev: Optional[_FrequencyNode] = None
+        self.next: Optional[_FrequencyNode] = None
+
+
+class LFUPolicy(BasePolicy):
+    """ Evicts the key which was accessed the least amount of times,
+        ties are broken by evicting the least recently accessed key.
+
+        Keys are stored in a linked list of frequency buckets so every operation is O(1)
+    """
+    def __init__(self) -> None:
+        super().__init__()
+        self.__head = _FrequencyNode(0)     # sentinel, head.next has lowest frequency
+        self.__nodes: Dict[Hashable, _FrequencyNode] = dict()
+
+    def __link_after(self, node: _FrequencyNode, count: int) -> _FrequencyNode:
+        if node.next is not None and node.next.count == count:
+            return node.next
+        new = _FrequencyNode(count)
+        new.prev, new.next = node, node.next
+        if node.next is not None:
+            node.next.prev = new
+        node.next = new
+        return new
+
+    def __unlink(self, node: _FrequencyNode) -> None:
+        if node.keys or node is self.__head:
+            return
+        node.prev.next = node.next
+        if node.next is not None:
+            node.next.prev = node.prev
+
+    def frequency(self, key: Hashable) -> int:
+        """ Returns how many times a key has been accessed, ``0`` if not tracked
+
+        Parameters
+        ----------
+        key: Hashable
+            Key to lookup
+        """
+        node = self.__nodes.get(key)
+        return node.count if node else 0
+
+    def record_insert(self, key: Hashable) -> None:
+        node = self.__link_after(self.__head, 1)
+        node.keys[key] = None
+        self.__nodes[key] = node
+
+    def record_access(self, key: Hashable) -> None:
+        node = self.__nodes[key]
+        new = self.__link_after(node, node.count + 1)
+        del node.keys[key]
+        new.keys[key] = None
+        self.__nodes[key] = new
+        self.__unlink(node)
+
+    def record_remove(self, key: Hashable) -> None:
+        node = self.__nodes.pop(key, None)
+        if node is None:
+            return
+        del node.keys[key]
+        self.__unlink(node)
+
+    def evict(self, candidate: Hashable) -> Hashable:
+        node = self.__head.next
+        key, _ = node.keys.popitem(last=False)
+        del self.__nodes[key]
+        self.__unlink(node)
+        return key
+
+    def clear(self) -> None:
+        self.__head.next = None
+        self.__nodes.clear()
+
+
+class ARCPolicy(BasePolicy):
+    """ Adaptive Replacement Cache,
+        balances between recency and frequency using ghost entries of recently evicted keys.
+
+        Based on `Megiddo & Modha (2003) <https://www.usenix.org/legacy/events/fast03/tech/full_papers/megiddo/megiddo.pdf>`_
+    """
+    def __init__(self) -> None:
+        super().__init__()
+        self.__t1 = OrderedDict()       # seen once recently
+        self.__t2 = OrderedDict()       # seen at least twice recently
+        self.__b1 = OrderedDict()       # ghosts evicted from t1
+        self.__b2 = OrderedDict()       # ghosts evicted from t2
+        self.__p = 0.0                  # target size of t1
+        self.__returning = None
+
+    @property
+    def target(self) -> float:
+        """ Returns the current target size of the recency list """
+        return self.__p
+
+    def __adapt(self, key: Hashable) -> None:
+        if key in self.__b1:
+            delta = max(len(self.__b2) / len(self.__b1), 1)
+            self.__p = min(self.capacity, self.__p + delta)
+            del self.__b1[key]
+        elif key in self.__b2:
+            delta = max(len(self.__b1) / len(self.__b2), 1)
+            self.__p = max(0, self.__p - delta)
+            del self.__b2[key]
+        else:
+            return
+        self.__returning = key
+
+    def __trim_ghosts(self) -> None:
+        c = self.capacity
+        if c < 1:
+            return
+        while self.__b1 and (len(self.__t1) + len(self.__b1)) > c:
+            self.__b1.popitem(last=False)
+        while self.__b2 and (len(self.__t1) + len(self.__t2) + len(self.__b1) + len(self.__b2)) > 2 * c:
+            self.__b2.popitem(last=False)
+
+    def record_insert(self, key: Hashable) -> None:
+        self.__adapt(key)
+        if self.__returning == key:
+            self.__returning = None
+            self.__t2[key] = None
+        else:
+            self.__t1[key] = None
+        self.__trim_ghosts()
+
+    def record_access(self, key: Hashable) -> None:
+        if key in self.__t1:
+            del self.__t1[key]
+            self.__t2[key] = None
+        else:
+            self.__t2.move_to_end(key)
+
+    def record_remove(self, key: Hashable) -> None:
+        if self.__t1.pop(key, ...) is ...:
+            self.__t2.pop(key, None)
+
+    def evict(self, candidate: Hashable) -> Hashable:
+        in_b2 = candidate in self.__b2
+        self.__adapt(candidate)
+
+        t1_len = len(self.__t1)
+        if self.__t1 and (not self.__t2 or t1_len > self.__p or (in_b2 and t1_len == self.__p)):
+            key, _ = self.__t1.popitem(last=False)
+            self.__b1[key] = None
+        else:
+            key, _ = self.__t2.popitem(last=False)
+            self.__b2[key] = None
+        return key
+
+    def clear(self) -> None:
+        for d in (self.__t1, self.__t2, self.__b1, self.__b2):
+            d.clear()
+        self.__p = 0.0
+        self.__returning = None
+
+
+class _CountMinSketch:
+    """ 4-bit count-min sketch with periodic aging """
+    __slots__ = ('rows', 'mask', 'additions', 'sample_size')
+
+    SEEDS = (0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9, 0x27D4EB2F165667C5)
+    MAX_COUNT = 15
+
+    def __init__(self, capacity: int) -> None:
+        width = 16
+        while width < capacity:
+            width <<= 1
+        self.rows = [bytearray(width) for _ in self.SEEDS]
+        self.mask = width - 1
+        self.additions = 0
+        self.sample_size = 10 * width
+
+    def __indexes(self, key: Hashable):
+        h = hash(key)
+        for seed in self.SEEDS:
+            yield (((h ^ seed) * 0x9E3779B97F4A7C15) >> 17) & self.mask
+
+    def increment(self, key: Hashable) -> None:
+        for row, i in zip(self.rows, self.__indexes(key)):
+            if row[i] < self.MAX_COUNT:
+                row[i] += 1
+
+        self.additions += 1
+        if self.additions >= self.sample_size:
+            self.reset()
+
+    def frequency(self, key: Hashable) -> int:
+        return min(row[i] for row, i in zip(self.rows, self.__indexes(key)))
+
+    def reset(self) -> None:
+        ## Halve every counter so old popularity decays, amortized O(1) per increment
+        self.rows = [bytearray(b >> 1 for b in row) for row in self.rows]
+        self.additions //= 2
+
+
+class TinyLFUPolicy(BasePolicy):
+    """ Window TinyLFU policy,
+        new keys enter a small LRU window and must have been requested more often than
+        the main region's victim to be admitted into it.
+        Frequencies are estimated using a count-min sketch which includes misses.
+
+        Based on `Einziger, Friedman & Manes (2017) <https://arxiv.org/abs/1512.00727>`_
+
+    Parameters
+    ----------
+    window: :class:`float`
+        Fraction of capacity used by the admission window
+    protected: :class:`float`
+        Fraction of the main region reserved for keys accessed more than once
+    """
+    def __init__(self, *, window: float = 0.01, protected: float = 0.8) -> None:
+        assert 0 < window < 1, 'window must be between 0 and 1'
+        assert 0 < protected < 1, 'protected must be between 0 and 1'
+
+        super().__init__()
+        self.__window_ratio = window
+        self.__protected_ratio = protected
+
+        self.__window = OrderedDict()
+        self.__probation = OrderedDict()
+        self.__protected = OrderedDict()
+        self.__sketch = _CountMinSketch(1)
+        self.set_capacity(-1)
+
+    def set_capacity(self, capacity: int) -> None:
+        super().set_capacity(capacity)
+        if capacity > 0:
+            self.__window_cap = max(1, int(capacity * self.__window_ratio))
+            self.__protected_cap = int((capacity - self.__window_cap) * self.__protected_ratio)
+        else:
+            self.__window_cap = self.__protected_cap = float('inf')
+        self.__sketch = _CountMinSketch(max(capacity, 1))
+
+    def frequency(self, key: Hashable) -> int:
+        """ Returns estimated number of times a key has been requested
+
+        Parameters
+        ----------
+        key: Hashable
+            Key to lookup
+        """
+        return self.__sketch.frequency(key)
+
+    def record_insert(self, key: Hashable) -> None:
+        self.__sketch.increment(key)
+        self.__window[key] = None
+
+        if len(self.__window) > self.__window_cap:
+            ## Segment still has room, so demote without competing
+            k, _ = self.__window.popitem(last=False)
+            self.__probation[k] = None
+
+    def record_access(self, key: Hashable) -> None:
+        self.__sketch.increment(key)
+
+        if key in self.__window:
+            self.__window.move_to_end(key)
+        elif key in self.__protected:
+            self.__protected.move_to_end(key)
+        else:
+            del self.__probation[key]
+            self.__protected[key] = None
+            if len(self.__protected) > self.__protected_cap:
+                k, _ = self.__protected.popitem(last=False)
+                self.__probation[k] = None
+
+    def record_miss(self, key: Hashable) -> None:
+        self.__sketch.increment(key)
+
+    def record_remove(self, key: Hashable) -> None:
+        for region in (self.__window, self.__probation, self.__protected):
+            if region.pop(key, ...) is not ...:
+                return
+
+    def __main_victim(self) -> Optional[Hashable]:
+        for region in (self.__probation, self.__protected):
+            if region:
+                return next(iter(region))
+
+    def evict(self, candidate: Hashable) -> Hashable:
+        victim = self.__main_victim()
+        if len(self.__window) < self.__window_cap or not self.__window or victim is None:
+            if victim is None:
+                return self.__window.popitem(last=False)[0]
+            self.record_remove(victim)
+            return victim
+
+        ## Window is full, its oldest key competes with the main region's victim
+        challenger, _ = self.__window.popitem(last=False)
+        if self.__sketch.frequency(challenger) > self.__sketch.frequency(victim):
+            self.record_remove(victim)
+            self.__probation[challenger] = None
+            return victim
+        return challenger
+
+    def clear(self) -> None:
+        self.__window.clear()
+        self.__probation.clear()
+        self.__protected.clear()
+        self.__sketch = _CountMinSketch(max(self.capacity, 1))
@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Hashable, Optional, Tuple, Type
+from collections import OrderedDict
+
+from pydantic import BaseModel
+from ezycore.models import Model
+
+
+_SCALARS = frozenset((str, int, float, bool, bytes, type(None)))
+_SEQUENCES = (list, tuple, set, frozenset)
+
+
+def _export(value: Any) -> Any:
+    ## Mirrors how pydantic's BaseModel.dict converts field values
+    cls = value.__class__
+    if cls in _SCALARS:
+        return value
+    if isinstance(value, BaseModel):
+        return value.dict()
+    if isinstance(value, dict):
+        return {k: _export(v) for k, v in value.items()}
+    if isinstance(value, _SEQUENCES):
+        return cls(_export(v) for v in value)
+    return value
+
+
+def _flat(fields: Any) -> bool:
+    ## Whether include/exclude only references top level fields
+    if not fields:
+        return True
+    if isinstance(fields, dict):
+        return all(v is True or v is ... for v in fields.values())
+    return isinstance(fields, (set, frozenset, list, tuple)) and all(isinstance(f, str) for f in fields)
+
+
+def _as_dict(fields: Any) -> dict:
+    if isinstance(fields, dict):
+        return dict(fields)
+    return {f: True for f in fields}
+
+
+def _merge_exclude(exclude: Any, config_exclude: Any) -> Any:
+    if not exclude:
+        return config_exclude or None
+    if not config_exclude:
+        return exclude
+    if not isinstance(exclude, dict) and not isinstance(config_exclude, dict):
+        return set(exclude) | set(config_exclude)
+
+    merged = _as_dict(config_exclude)
+    merged.update(_as_dict(exclude))
+    return merged
+
+
+def _freeze(value: Any) -> Hashable:
+    if isinstance(value, dict):
+        return ('__dict__', frozenset((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (set, frozenset)):
+        return ('__set__', frozenset(value))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+class ProjectionPlan:
+    """
+    Compiled form of the flags and export kwargs given to :meth:`Segment.get`.
+
+    When only top level fields are requested the plan reads them straight from the stored model,
+    otherwise ``Model.dict`` is called with include/exclude arguments which were merged once.
+    """
+    __slots__ = ('identity', 'fields', 'kwds')
+
+    def __init__(self, *, identity: bool = False, fields: Optional[Tuple[str]] = None, kwds: Optional[dict] = None) -> None:
+        self.identity = identity
+        self.fields = fields
+        self.kwds = kwds
+
+    @classmethod
+    def compile(cls, model: Type[Model], flags: tuple, export_kwds: Dict[str, Any]) -> ProjectionPlan:
+        """ Builds a plan for a model
+
+        Parameters
+        ----------
+        model: :class:`Model`
+            Model of stored objects
+        flags: :class:`tuple`
+            Flags passed to :meth:`Segment.get`
+        export_kwds: :class:`dict`
+            export kwargs, read more `here <https://docs.pydantic.dev/usage/exporting_models/>`_
+        """
+        config_exclude = model._config.exclude
+
+        if '*' in flags:
+            return cls(kwds=dict())
+        if not (flags or export_kwds or config_exclude):
+            return cls(identity=True)
+
+        inc = dict()
+        for field in flags:
+            if isinstance(field, str):
+                inc[field] = True
+            else:
+                inc[field[0]] = field[1]
+
+        kwds = dict(export_kwds)
+        include = kwds.pop('include', None) or inc or None
+        exclude = _merge_exclude(kwds.pop('exclude', None), config_exclude)
+
+        if not kwds and _flat(include) and _flat(exclude):
+            included = None if include is None else set(include)
+            excluded = set(exclude or ())
+            return cls(fields=tuple(
+                f for f in model.__fields__
+                if (included is None or f in included) and f not in excluded
+            ))
+
+        if include:
+            kwds['include'] = include
+        if exclude:
+            kwds['exclude'] = exclude
+        return cls(kwds=kwds)
+
+    def __call__(self, obj: Model) -> Any:
+        if self.identity:
+            return obj
+        if self.fields is not None:
+            return {f: _export(getattr(obj, f)) for f in self.fields}
+        return obj.dict(**self.kwds)
+
+    def __repr__(self) -> str:
+        if self.identity:
+            return 'ProjectionPlan(identity=True)'
+        return f"ProjectionPlan(fields={self.fields}, kwds={self.kwds})"
+
+
+class ProjectionCache:
+    """
+    LRU bounded cache of compiled projection plans
+
+    Parameters
+    ----------
+    model: :class:`Model`
+        Model of stored objects
+    max_size: :class:`int`
+        Maximum number of plans kept
+    """
+    def __init__(self, model: Type[Model], max_size: int = 128) -> None:
+        self.model = model
+        self.max_size = max_size
+        self.__plans: OrderedDict = OrderedDict()
+
+    def get(self, flags: tuple, export_kwds: Dict[str, Any]) -> ProjectionPlan:
+        """ Returns plan for flags and export kwargs, compiling it if needed """
+        try:
+            signature = (flags, _freeze(export_kwds)) if export_kwds else flags
+            plan = self.__plans.get(signature)
+        except TypeError:
+            ## Unhashable values can't be cached
+            return ProjectionPlan.compile(self.model, flags, export_kwds)
+
+        if plan is None:
+            plan = self.__plans[signature] = ProjectionPlan.compile(self.model, flags, export_kwds)
+            if len(self.__plans) > self.max_size:
+                self.__plans.popitem(last=False)
+        else:
+            try:
+                self.__plans.move_to_end(signature)
+            except KeyError:
+                ## Evicted by another thread
+                pass
+        return plan
+
+    def clear(self) -> None:
+        self.__plans.clear()
+
+    def __len__(self) -> int:
+        return len(self.__plans)
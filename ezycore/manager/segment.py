@@ -3,7 +3,22 @@
 
 from ezycore.models import Model, M
 from ezycore.exceptions import Full, SegmentError
-from typing import Any, Callable, Iterable, Optional, Union
+from ezycore.query import Expr, Query
+from ezycore.drivers import Driver
+from .policies import BasePolicy, LRUPolicy
+from .metadata import NEVER, EntryStats, MetadataStore
+from .indexes import INDEX_TYPES, BaseIndex, SortedIndex
+from .projection import ProjectionCache
+from .locks import RWLock
+from .changes import ChangeTracker
+from .loaders import Loader, SingleFlight, check_shareable, driver_loader
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+from collections import OrderedDict, deque
+from functools import wraps
+from heapq import heapify, heappop, heappush
+from itertools import chain, count, islice
+from threading import Event, RLock, Thread
+from time import monotonic
 from re import _compile
 
 
@@ -167,13 +182,13 @@ def get(self, obj_key: Any, *flags, default: Any = ..., **export_kwds) -> Option
         """
 
     @abstractmethod
-    def search(self, func: Callable[[Model], bool], *fields, limit: int = -1, **export_kwds) -> Iterable[M]:
+    def search(self, func: Union[Callable[[Model], bool], Expr], *fields, limit: int = -1, **export_kwds) -> Iterable[M]:
         """ Searches for elements matching query in cache
 
         Parameters
         ----------
-        func: Callable[[:class:`Model`], :class:`bool`]
-            Function which returns whether element is needed
+        func: Union[Callable[[:class:`Model`], :class:`bool`], :class:`Expr`]
+            Function or expression which returns whether element is needed
         *fields
             List of fields to return from model
         limit: :class:`int`
@@ -234,19 +249,93 @@ def remove(self, obj_key: Any, *default: Any) -> Optional[Model]:
             If value not found, returns this instead of raising an error
         """
 
+    def add_many(self, objs: Iterable[M], *, overwrite: bool = False) -> None:
+        """ Adds many elements within the segment,
+            segments should override this when elements can be added faster in bulk.
+
+        Parameters
+        ----------
+        objs: Iterable[Union[:class:`dict`, :class:`Model`]]
+            Objects to add
+        overwrite: :class:`bool`
+            Whether to overwrite existing elements
+        """
+        for obj in objs:
+            self.add(obj, overwrite=overwrite)
+
+    def get_many(self, obj_keys: Iterable[Any], *flags, default: Any = ..., **export_kwds) -> List[M]:
+        """ Retrieves many elements from cache, results are returned in the same order as keys
+
+        Parameters
+        ----------
+        obj_keys: Iterable[Any]
+            values to search for, set in `Model._config.search_by`
+        *flags
+            elements to include in cache, read more in the :class:`Model`'s section
+        default: Any
+            default value for elements not found
+        **export_kwds:
+            export kwargs, read more `here <https://docs.pydantic.dev/usage/exporting_models/>`_
+        """
+        return [self.get(key, *flags, default=default, **export_kwds) for key in obj_keys]
+
+    def remove_many(self, obj_keys: Iterable[Any], *default: Any) -> List[Optional[Model]]:
+        """ Removes many elements from segment, results are returned in the same order as keys
+
+        Parameters
+        ----------
+        obj_keys: Iterable[Any]
+            Values of stored keys to remove
+        *default:
+            If value not found, returns this instead of raising an error
+        """
+        return [self.remove(key, *default) for key in obj_keys]
+
+    def peek_many(self, obj_keys: Iterable[Any]) -> Dict[Any, Model]:
+        """ Retrieves stored elements without resolving partials or updating recency,
+            used when other segments resolve partial references. Missing keys are skipped.
+            Segments should override this when :meth:`BaseSegment.get` has side effects.
+
+        Parameters
+        ----------
+        obj_keys: Iterable[Any]
+            Values of stored keys to retrieve
+        """
+        found = dict()
+        for key in obj_keys:
+            value = self.get(key, default=None)
+            if value is not None:
+                found[key] = value
+        return found
+
     @abstractmethod
-    def invalidate_all(self, func: Callable[[Model], bool], *, limit: int = -1) -> Iterable[Model]:
+    def invalidate_all(self, func: Union[Callable[[Model], bool], Expr], *, limit: int = -1) -> Iterable[Model]:
         """ Invalidates all entries which match check function
 
         Parameters
         ----------
-        func: Callable[[:class:`Model`], :class:`bool`]
-            Function which indicates whether entry should be removed
+        func: Union[Callable[[:class:`Model`], :class:`bool`], :class:`Expr`]
+            Function or expression which indicates whether entry should be removed
         limit: :class:`int`
             Limit how many entries should be removed,
             if < 0 no limit is set
         """
 
+    def invalidate(self, obj_keys: Iterable[Any]) -> List[Model]:
+        """ Invalidates entries by key, keys which aren't stored are skipped.
+            Unlike :meth:`BaseSegment.remove_many` invalidated entries aren't reported as deletions,
+            used when the source of truth changed underneath the segment.
+            Segments should override this with a direct lookup.
+
+        Parameters
+        ----------
+        obj_keys: Iterable[Any]
+            Values of stored keys to invalidate
+        """
+        keys = set(obj_keys)
+        field = self.model._config.search_by
+        return list(self.invalidate_all(lambda obj: getattr(obj, field) in keys))
+
     @abstractmethod
     def update(self, obj_key: Any, **kwds) -> None:
         """ Updates an element in the segment
@@ -314,7 +403,15 @@ class Segment(BaseSegment):
     model: :class:`Model`
         Model being used to store data
     make_space: :class:`bool`
-        Whether to start removing content starting from the piece of data last accessed
+        Whether to start removing content once segment is full, the entry removed is chosen by ``policy``
+    policy: :class:`BasePolicy`
+        Eviction policy used once segment is full, defaults to :class:`LRUPolicy`
+    trusted: :class:`bool`
+        Default for the ``trusted`` argument of :meth:`Segment.add` and :meth:`Segment.add_many`
+
+    .. note::
+        Entries using a ttl, see :attr:`Config.ttl`, are expired lazily when fetched and when searching.
+        Use :meth:`Segment.start_reaper` to also expire them from a background thread.
     """
     def __init__(
         self,
@@ -322,15 +419,450 @@ def __init__(
         model: Model,
         *,
         max_size: int = 1000,
-        make_space: bool = True
+        make_space: bool = True,
+        policy: Optional[BasePolicy] = None,
+        trusted: bool = False
     ) -> None:
         super().__init__(name, model, max_size=max_size, make_space=make_space)
+        try:
+            assert policy is None or isinstance(policy, BasePolicy), 'policy must inherit the BasePolicy class'
+            assert type(trusted) == bool, 'Value for trusted must be a boolean'
+        except AssertionError as err:
+            raise SegmentError('Invalid args provided') from err
 
-        self.__queue = list()
-        self.__data = dict()
-        self.__position = 0
+        ## Ordered from least accessed -> most recently accessed,
+        ## moving/popping entries at either end is O(1)
+        self.__data = OrderedDict()
+        self.__cursor = None
+        self.__policy = policy or LRUPolicy()
+        self.__policy.set_capacity(max_size)
+        self.__trusted = trusted
+
+        ## Fetch counts, access times and deadlines for every entry
+        self.__meta = MetadataStore()
+        ## Deadlines are kept in a min-heap, stale heap entries are skipped when popped
+        self.__timers: List[Tuple[float, int, Any]] = list()
+        self.__timer_ids = count()
+        self.__reaper: Optional[Thread] = None
+        self.__reaper_stop = Event()
+        ## Secondary indexes declared in Config.indexes
+        self.__indexes: Dict[str, BaseIndex] = dict()
+        self.__build_indexes()
+        ## Compiled get() flags/export kwargs
+        self.__projections = ProjectionCache(self.model)
+        ## Read-through loading of missing keys
+        self.__loader: Optional[Loader] = None
+        self.__loader_trusted = False
+        self.__flights = SingleFlight()
+        ## Called with (key, object) for every write, object is None for removals
+        self.__listeners: List[Callable[[Any, Optional[Model]], None]] = list()
+        self.__changes: Optional[ChangeTracker] = None
 
         self._invalidated_last = False
+        self._lock = RLock()
+
+    @property
+    def policy(self) -> BasePolicy:
+        """ Returns eviction policy of segment """
+        return self.__policy
+
+    @property
+    def trusted(self) -> bool:
+        """ Whether objects are added without being validated by default """
+        return self.__trusted
+
+    @property
+    def indexes(self) -> Dict[str, BaseIndex]:
+        """ Returns mapping of field names to secondary indexes """
+        return dict(self.__indexes)
+
+    @property
+    def loader(self) -> Optional[Loader]:
+        """ Returns loader used to fetch missing keys """
+        return self.__loader
+
+    def set_loader(self, loader: Union[Driver, Loader, None], *, location: Optional[str] = None,
+                   trusted: Optional[bool] = None) -> None:
+        """ Binds a loader which :meth:`Segment.get` and :meth:`Segment.get_many` use to fetch missing keys,
+            the loaded object is added to the segment before being returned.
+            Concurrent misses for the same key share a single call to the loader.
+            Pass ``load=False`` to either method to skip loading.
+
+        Parameters
+        ----------
+        loader: Union[:class:`Driver`, Callable[[Any], Optional[:class:`Model`]], None]
+            Driver to fetch objects from by their ``search_by`` field, or a callable returning the object of a key.
+            ``None`` unbinds the current loader
+        location: Optional[:class:`str`]
+            Location passed to a driver, defaults to the name of the segment
+        trusted: Optional[:class:`bool`]
+            Whether loaded objects are added without validation,
+            defaults to ``True`` for drivers and :attr:`Segment.trusted` for callables
+        """
+        if isinstance(loader, Driver):
+            loader = driver_loader(loader, location or self.name, self.model)
+            trusted = True if trusted is None else trusted
+        elif loader is not None and not callable(loader):
+            raise SegmentError('Loader must be a driver or a callable')
+
+        self.__loader = loader
+        self.__loader_trusted = self.__trusted if trusted is None else trusted
+
+    def subscribe(self, callback: Callable[[Any, Optional[Model]], None]) -> None:
+        """ Registers a callback called with ``(key, object)`` whenever an element is written,
+            ``object`` is ``None`` when the element was removed using :meth:`Segment.remove`.
+
+            Only writes made by users are reported, elements being evicted, expiring, invalidated
+            or added using ``dirty=False`` are not.
+
+        Parameters
+        ----------
+        callback: Callable[[Any, Optional[:class:`Model`]], None]
+            Function to call
+        """
+        self.__listeners.append(callback)
+
+    def unsubscribe(self, callback: Callable[[Any, Optional[Model]], None]) -> None:
+        """ Removes a callback registered using :meth:`Segment.subscribe` """
+        self.__listeners.remove(callback)
+
+    @property
+    def changes(self) -> Optional[ChangeTracker]:
+        """ Returns tracker of keys changed since the last incremental export, ``None`` if changes aren't tracked """
+        return self.__changes
+
+    def track_changes(self, enabled: bool = True) -> Optional[ChangeTracker]:
+        """ Starts or stops tracking written and removed keys,
+            required by ``export_segment(..., incremental=True)``.
+            Only writes reported to :meth:`Segment.subscribe` are tracked.
+
+        Parameters
+        ----------
+        enabled: :class:`bool`
+            Whether to track changes, disabling forgets every pending change
+        """
+        if enabled and self.__changes is None:
+            self.__changes = ChangeTracker()
+            self.subscribe(self.__changes.record)
+        elif not enabled and self.__changes is not None:
+            self.unsubscribe(self.__changes.record)
+            self.__changes = None
+        return self.__changes
+
+    def __notify(self, obj_key: Any, obj: Optional[Model]) -> None:
+        for callback in tuple(self.__listeners):
+            callback(obj_key, obj)
+
+    def _load(self, obj_key: Any) -> bool:
+        ## Loads a missing key using the bound loader, returns whether it's now stored
+        if self.__loader is None:
+            return False
+        return self.__flights.do(obj_key, self.__load, obj_key)
+
+    def __load(self, obj_key: Any) -> bool:
+        if self._lookup(obj_key) is not None:
+            return True
+        obj = self.__loader(obj_key)
+        if obj is None:
+            return False
+        self.add(obj, overwrite=True, trusted=self.__loader_trusted, dirty=False)
+        return self._lookup(obj_key) is not None
+
+    def update_segment(self, **kwds) -> None:
+        super().update_segment(**kwds)
+        if kwds.get('max_size', ...) != ...:
+            self.__policy.set_capacity(self.max_size)
+        if kwds.get('model', ...) != ...:
+            self.__build_indexes()
+            self.__projections = ProjectionCache(self.model)
+
+    def __build_indexes(self) -> None:
+        self.__indexes = {
+            field: INDEX_TYPES[kind](field) 
+            for field, kind in self.model._config.indexes.items()
+        }
+        for key, obj in self.__data.items():
+            self.__index_insert(key, obj)
+
+    def __index_insert(self, obj_key: Any, obj: Model) -> None:
+        for field, index in self.__indexes.items():
+            index.insert(obj_key, getattr(obj, field))
+
+    def __index_remove(self, obj_key: Any, obj: Model) -> None:
+        for field, index in self.__indexes.items():
+            index.remove(obj_key, getattr(obj, field))
+
+    def __get_index(self, field: str, sorted_only: bool = False) -> BaseIndex:
+        try:
+            index = self.__indexes[field]
+        except KeyError as err:
+            raise SegmentError(f'Field {field!r} is not indexed') from err
+        if sorted_only and not isinstance(index, SortedIndex):
+            raise SegmentError(f'Field {field!r} requires a sorted index')
+        return index
+
+    def lookup(self, field: str, value: Any, *fields, limit: int = -1, **export_kwds) -> Iterable[M]:
+        """ Retrieves elements whose field equals a value using a secondary index,
+            raises `SegmentError` if field isn't indexed
+
+        Parameters
+        ----------
+        field: :class:`str`
+            Indexed field to search
+        value: Any
+            Value field must be equal to
+        *fields
+            List of fields to return from model
+        limit: :class:`int`
+            Number of results to restrict search to, 
+            if < 0 no limit is set.
+        **export_kwds:
+            export kwargs, read more `here <https://docs.pydantic.dev/usage/exporting_models/>`_
+        """
+        index = self.__get_index(field)
+        self.expire()
+        keys = index.find(value)
+        return self.__fetch_keys(keys[:limit] if limit > 0 else keys, fields, export_kwds)
+
+    def lookup_range(self, field: str, *fields, low: Any = None, high: Any = None, 
+                     include_low: bool = True, include_high: bool = True, reverse: bool = False,
+                     limit: int = -1, **export_kwds) -> Iterable[M]:
+        """ Retrieves elements whose field is within a range using a sorted index, ordered by field.
+            Raises `SegmentError` if field doesn't have a sorted index
+
+        Parameters
+        ----------
+        field: :class:`str`
+            Indexed field to search
+        *fields
+            List of fields to return from model
+        low: Any
+            Lowest value, if ``None`` no lower bound is set
+        high: Any
+            Highest value, if ``None`` no upper bound is set
+        include_low: :class:`bool`
+            Whether values equal to ``low`` are included
+        include_high: :class:`bool`
+            Whether values equal to ``high`` are included
+        reverse: :class:`bool`
+            Whether to return elements starting from the highest value
+        limit: :class:`int`
+            Number of results to restrict search to, 
+            if < 0 no limit is set.
+        **export_kwds:
+            export kwargs, read more `here <https://docs.pydantic.dev/usage/exporting_models/>`_
+        """
+        index = self.__get_index(field, sorted_only=True)
+        self.expire()
+        keys = index.range(low, high, include_low=include_low, include_high=include_high, reverse=reverse)
+        return self.__fetch_keys(tuple(islice(keys, limit) if limit > 0 else keys), fields, export_kwds)
+
+    def query(self, query: Union[Expr, Query], *fields, **export_kwds) -> Iterable[M]:
+        """ Retrieves elements matching a declarative query.
+            Indexes are used to find candidates when possible, otherwise the segment is scanned once.
+
+        Parameters
+        ----------
+        query: Union[:class:`Expr`, :class:`Query`]
+            Expression or query to match, see :mod:`ezycore.query`
+        *fields
+            List of fields to return from model
+        **export_kwds:
+            export kwargs, read more `here <https://docs.pydantic.dev/usage/exporting_models/>`_
+        """
+        return self.__fetch_keys(self.__plan(Query.of(query)), fields, export_kwds)
+
+    def _query_views(self, query: Query) -> List[Model]:
+        ## Like query() but returns the matching models themselves, before any projection is applied
+        return self.__fetch_keys(self.__plan(query), (), {}, project=False)
+
+    def __plan(self, query: Query) -> List[Any]:
+        self.expire()
+        data = self.__data
+        where, order_by, limit = query.where, query.order_by, query.limit
+
+        check = where.compile() if where is not None else None
+        path = where.access_path(self.__indexes) if where is not None else None
+        order_index = self.__indexes.get(order_by) if order_by else None
+
+        if path is None and isinstance(order_index, SortedIndex):
+            ## Walking the sorted index yields keys already ordered
+            keys = chain(order_index.range(reverse=query.descending), order_index.none_keys())
+            ordered = True
+        else:
+            keys = tuple(data) if path is None else path[1]()
+            ordered = not order_by
+
+        results = list()
+        for key in keys:
+            if check is None or check(data[key]):
+                results.append(key)
+                if ordered and 0 < limit <= len(results):
+                    break
+
+        if not ordered:
+            nones = [k for k in results if getattr(data[k], order_by) is None]
+            results = sorted((k for k in results if getattr(data[k], order_by) is not None), 
+                             key=lambda k: getattr(data[k], order_by), reverse=query.descending) + nones
+        return results[:limit] if limit > 0 else results
+
+    def __fetch_keys(self, keys: Iterable[Any], fields: tuple, export_kwds: dict, 
+                     views: Optional[List[Model]] = None, project: bool = True) -> List[M]:
+        ## Exports many entries without updating recency, partials are resolved in one batch
+        export_kwds.pop('ignore_queue', None)
+        data = self.__data
+        keys = [k for k in keys if k in data]
+        if views is None:
+            views = self._resolve_partials([data[k] for k in keys])
+        plan = self.__projections.get(fields, export_kwds) if project else None
+
+        results = list()
+        for key, view in zip(keys, views):
+            results.append(plan(view) if plan else view)
+            self.__record_fetch(key, view)
+        return results
+
+    def _resolve_partials(self, objs: Iterable[Model]) -> List[Model]:
+        """ Returns copies of objects with partial references replaced by the referenced elements.
+            Stored objects are never modified and referenced segments are read without updating recency,
+            keys are fetched in a single batch per referenced segment.
+
+        Parameters
+        ----------
+        objs: Iterable[:class:`Model`]
+            Stored objects to resolve
+        """
+        objs = list(objs)
+        partials = self.model.__ezycore_partials__
+        manager = self._get_manager()
+        if not (partials and manager and objs):
+            return objs
+
+        locations = self.model._config.partials
+        wanted: Dict[str, set] = dict()
+        for partial in partials:
+            keys = wanted.setdefault(locations[partial], set())
+            for obj in objs:
+                value = getattr(obj, partial)
+                if not isinstance(value, Model):
+                    keys.add(value)
+
+        found: Dict[str, Dict[Any, Model]] = dict()
+        for location, keys in wanted.items():
+            segment = manager.get_segment(location, defer=True)
+            found[location] = segment.peek_many(keys) if segment and keys else dict()
+
+        resolved = list()
+        for obj in objs:
+            update = dict()
+            for partial in partials:
+                value = getattr(obj, partial)
+                if isinstance(value, Model):
+                    continue
+                ref = found[locations[partial]].get(value)
+                if ref is not None:
+                    update[partial] = ref
+            resolved.append(obj.copy(update=update) if update else obj)
+        return resolved
+
+    def peek_many(self, obj_keys: Iterable[Any]) -> Dict[Any, Model]:
+        found = dict()
+        for key in obj_keys:
+            obj = self._lookup(key)
+            if obj is not None:
+                found[key] = obj
+        return found
+
+    def _lookup(self, obj_key: Any) -> Optional[Model]:
+        ## Stored object if it exists and hasn't expired, no side effects
+        obj = self.__data.get(obj_key)
+        if obj is None or (self.__meta.expiring and self.__meta.deadline(obj_key) <= monotonic()):
+            return None
+        return obj
+
+    def _export(self, objs: Iterable[Model], flags: tuple, export_kwds: dict) -> List[M]:
+        ## Resolves partials and applies get() flags without recording any access
+        plan = self.__projections.get(flags, export_kwds)
+        return [plan(view) for view in self._resolve_partials(objs)]
+
+    def _apply_hits(self, hits: Iterable[Tuple[Any, float]]) -> None:
+        ## Records (key, monotonic time) accesses which happened without updating recency at the time
+        data = self.__data
+        for key, at in hits:
+            if key in data:
+                data.move_to_end(key)
+                self.__policy.record_access(key)
+                self.__meta.touch(key, at)
+
+    def __set_ttl(self, obj_key: Any, ttl: Optional[float]) -> None:
+        if ttl is None or ttl < 0:
+            self.__meta.set_expiry(obj_key, NEVER)
+            return
+
+        deadline = monotonic() + ttl
+        self.__meta.set_expiry(obj_key, deadline)
+        heappush(self.__timers, (deadline, next(self.__timer_ids), obj_key))
+
+        if len(self.__timers) > 2 * self.__meta.expiring + 64:
+            self.__timers = [(d, next(self.__timer_ids), k) for k, d in self.__meta.deadlines()]
+            heapify(self.__timers)
+
+    def expire(self) -> Iterable[Model]:
+        """ Removes all entries whose ttl has passed, returning the removed entries """
+        removed = list()
+        if not self.__meta.expiring:
+            return removed
+
+        now = monotonic()
+        timers = self.__timers
+        while timers and timers[0][0] <= now:
+            deadline, _, key = heappop(timers)
+            if self.__meta.deadline(key) == deadline:
+                removed.append(self.__discard(key))
+        return removed
+
+    def stats(self, obj_key: Any) -> EntryStats:
+        """ Returns fetch count, insertion time, last access time and deadline of an entry,
+            raises `KeyError` if entry doesn't exist
+
+        Parameters
+        ----------
+        obj_key: Any
+            Key of entry
+        """
+        return self.__meta.stats(obj_key)
+
+    def start_reaper(self, interval: float = 1.0) -> None:
+        """ Starts a daemon thread which calls :meth:`Segment.expire` every ``interval`` seconds.
+
+        .. warning::
+            :class:`Segment` itself isn't thread safe, the reaper holds :attr:`Segment._lock` while expiring.
+            Hold the same lock around your own calls if a segment is shared between threads,
+            or use :class:`ConcurrentSegment` which handles locking itself.
+
+        Parameters
+        ----------
+        interval: :class:`float`
+            Seconds to wait between each expiry pass
+        """
+        if self.__reaper and self.__reaper.is_alive():
+            raise SegmentError('Reaper already running')
+        self.__reaper_stop.clear()
+        self.__reaper = Thread(target=self.__reap, args=(interval,), name=f'ezycore-reaper-{self.name}', daemon=True)
+        self.__reaper.start()
+
+    def stop_reaper(self) -> None:
+        """ Stops the reaper thread started by :meth:`Segment.start_reaper` """
+        if not self.__reaper:
+            return
+        self.__reaper_stop.set()
+        self.__reaper.join()
+        self.__reaper = None
+
+    def __reap(self, interval: float) -> None:
+        while not self.__reaper_stop.wait(interval):
+            with self._lock:
+                self.expire()
 
     def size(self) -> int:
         return len(self.__data)
@@ -346,53 +878,14 @@ def _get(self, obj_key: Any, *include, default: Any = None,
         ## Simply retrieves value, no queue/cache invalidation handling here
         try:
             data: Model = self.__data[obj_key]
-            manager = self._get_manager()
-            for partial in data.__ezycore_partials__:
-                if not manager:
-                    break
-                prim_key = getattr(data, partial)
-                try:
-                    setattr(data, partial, manager[data._config.partials[partial]].get(prim_key))
-                except ValueError:
-                    pass
+            if data.__ezycore_partials__:
+                data = self._resolve_partials((data,))[0]
             
             if ignore:      
                 return (data, data) if original else data
 
-            if not (include or export_kwds or self.model._config.exclude):
-                return (data, data) if original else data
-            if '*' in include:
-                if original:
-                    return data.dict(), data   
-                return data.dict()
-
-            inc = dict()
-            if include:
-                for field in include:
-                    if isinstance(field, str):
-                        inc[field] = True
-                    else:
-                        inc[field[0]] = field[1]
-
-            export_kwds['exclude'] = export_kwds.get('exclude', dict())
-            export_kwds['include'] = export_kwds.get('include') or inc
-
-            if isinstance(export_kwds['exclude'], set) and isinstance(data._config.exclude, set):
-                return data.dict(include=inc, **export_kwds)
-            elif isinstance(export_kwds['exclude'], set) and isinstance(data._config.exclude, dict):
-                export_kwds['exclude'] = dict(**data._config.exclude)
-                for field in export_kwds['exclude']:
-                    export_kwds['exclude'][field] = True
-            else:
-                for field in data._config.exclude:
-                    export_kwds['exclude'][field] = True
-            
-            if not export_kwds['include']:      export_kwds.pop('include')
-            if not export_kwds['exclude']:      export_kwds.pop('exclude')
-
-            if original:
-                return data.dict(**export_kwds), data
-            return data.dict(**export_kwds)
+            value = self.__projections.get(include, export_kwds)(data)
+            return (value, data) if original else value
 
         except KeyError as err:
             if default:
@@ -401,115 +894,324 @@ def _get(self, obj_key: Any, *include, default: Any = None,
 
     def get(self, obj_key: Any, *flags, default: Any = ..., **export_kwds) -> Optional[Model]:
         _ignore_q = export_kwds.pop('ignore_queue', False)
-        
+        _load = export_kwds.pop('load', True)
+        if self.__meta.expiring and self.__meta.deadline(obj_key) <= monotonic():
+            self.__discard(obj_key)
+
         if not _ignore_q:
             try:
-                self.__queue.remove(obj_key)
-            except ValueError:
-                if default == ...:
-                    raise ValueError('Object not found')
-                return default
-            self.__queue.append(obj_key)
+                self.__data.move_to_end(obj_key)
+            except KeyError:
+                self.__policy.record_miss(obj_key)
+                if not (_load and self._load(obj_key)):
+                    if default == ...:
+                        raise ValueError('Object not found')
+                    return default
+            else:
+                self.__policy.record_access(obj_key)
         value, result = self._get(obj_key, *flags, original=True, default=default, **export_kwds)
 
+        self.__record_fetch(obj_key, result)
+        return value
+
+    def __record_fetch(self, obj_key: Any, result: Model) -> None:
+        fetches = self.__meta.touch(obj_key)
         max_fetches = result._config.invalidate_after
         if max_fetches < 0:
             self._invalidated_last = False
-            return value
+            return
 
-        fetches = result._config.__ezycore_internal__['n_fetch'] + 1
         if fetches >= max_fetches:
             self._invalidated_last = True
-            self.remove(obj_key)
+            self.__discard(obj_key)
         else:
             self._invalidated_last = False
-            result._config.__ezycore_internal__['n_fetch'] = fetches
-        return value
 
-    def search(self, func: Callable[[Model], bool], *fields, limit: int = -1, **export_kwds) -> Iterable[M]:
-        export_kwds.update(ignore_queue=True)
-        results = list()
-        for key in self.__queue:
-            if len(results) >= limit and limit > 0:
-                break
-            works = func(self._get(key, ignore=True))
-            if not works:
+    def get_many(self, obj_keys: Iterable[Any], *flags, default: Any = ..., **export_kwds) -> List[M]:
+        """ Retrieves many elements from cache, results are returned in the same order as keys.
+            Expired elements are removed once for the whole batch before fetching.
+
+        Parameters
+        ----------
+        obj_keys: Iterable[Any]
+            values to search for, set in `Model._config.search_by`
+        *flags
+            elements to include in cache, read more in the :class:`Model`'s section
+        default: Any
+            default value for elements not found, 
+            if not provided `ValueError` is raised before any recency is updated
+        **export_kwds:
+            export kwargs, read more `here <https://docs.pydantic.dev/usage/exporting_models/>`_
+        """
+        _ignore_q = export_kwds.pop('ignore_queue', False)
+        _load = export_kwds.pop('load', True)
+        self.expire()
+        data = self.__data
+
+        obj_keys = tuple(obj_keys)
+        if _load and self.__loader is not None:
+            for key in dict.fromkeys(obj_keys):
+                if key not in data:
+                    self._load(key)
+
+        if default is ...:
+            for key in obj_keys:
+                if key not in data:
+                    self.__policy.record_miss(key)
+                    raise ValueError('Object not found')
+
+        hits = list()
+        for key in obj_keys:
+            if key not in data:
+                self.__policy.record_miss(key)
                 continue
-            results.append(self.get(key, *fields, **export_kwds))
-        return results
+            if not _ignore_q:
+                data.move_to_end(key)
+                self.__policy.record_access(key)
+            hits.append(key)
+
+        values = dict(zip(hits, self.__fetch_keys(hits, flags, export_kwds)))
+        return [values[key] if key in values else default for key in obj_keys]
+
+    def search(self, func: Union[Callable[[Model], bool], Expr], *fields, limit: int = -1, **export_kwds) -> Iterable[M]:
+        if isinstance(func, Expr):
+            return self.query(Query(func, limit=limit), *fields, **export_kwds)
+        self.expire()
+        keys = tuple(self.__data)
+        views = self._resolve_partials(self.__data.values())
+
+        matched = list()
+        for key, view in zip(keys, views):
+            if len(matched) >= limit and limit > 0:
+                break
+            if func(view):
+                matched.append((key, view))
+        return self.__fetch_keys([k for k, _ in matched], fields, export_kwds, [v for _, v in matched])
 
     def search_using_re(self, expr: str, *fields, flags: int = 0, key: str = None, limit: int = -1, **export_kwds) -> Iterable[M]:
-        export_kwds.update(ignore_queue=True)
-        results = list()
         search_key = key or self.model._config.search_by
         re = _compile(expr, flags)
+        return self.search(lambda m: re.match(str(getattr(m, search_key))), *fields, limit=limit, **export_kwds)
 
-        for key in self.__queue:
-            if len(results) >= limit and limit > 0:
-                break
-            works = re.match(str(getattr(self._get(key, ignore=True), search_key)))
-            if not works:
-                continue
-            results.append(self.get(key, *fields, **export_kwds))
-        return results
+    def add(self, obj: M, *, overwrite: bool = False, ttl: Optional[float] = ..., trusted: Optional[bool] = None,
+            dirty: bool = True) -> None:
+        """ Adds an element within the segment,
+            raises `ValueError` if object already exists unless overwrite set to `True`.
 
-    def add(self, obj: M, *, overwrite: bool = False) -> None:
-        assert isinstance(obj, (dict, self.model)), 'Invalid object passed'
-        if isinstance(obj, self.model):
-            obj._config.__ezycore_internal__['n_fetch'] = 0
+        Parameters
+        ----------
+        obj: Union[:class:`dict`, :class:`Model`]
+            Object to add
+        overwrite: :class:`bool`
+            Whether to overwrite an existing element
+        ttl: Optional[:class:`float`]
+            Seconds until element expires, overrides :attr:`Config.ttl`.
+            If ``None`` or < 0 element never expires
+        trusted: Optional[:class:`bool`]
+            Whether to skip validation, defaults to :attr:`Segment.trusted`.
+            Trusted models are stored as-is instead of being copied and
+            trusted dicts are converted using ``Model.construct``, so they must already match the model.
+        dirty: :class:`bool`
+            Whether the write is reported to callbacks registered using :meth:`Segment.subscribe`,
+            set to ``False`` for objects which were just read from where they're persisted
+        """
+        if ttl is ...:
+            ttl = self.model._config.ttl
+        key, new = self.__validate(obj, self.__trusted if trusted is None else trusted)
 
-        v = dict(obj)
-        key = self.model._config.search_by
+        if key in self.__data:
+            if not overwrite:
+                raise ValueError('Item already exists')
+        else:
+            self.__make_space(1, key)
+        self.__store(key, new, ttl)
+        if dirty and self.__listeners:
+            self.__notify(key, new)
 
-        if v[key] in self.__data and not overwrite:
-            raise ValueError('Item already exists')
+    def add_many(self, objs: Iterable[M], *, overwrite: bool = False, ttl: Optional[float] = ..., 
+                 trusted: Optional[bool] = None, dirty: bool = True) -> None:
+        """ Adds many elements within the segment at once.
+            All objects are validated before the segment is modified, 
+            then space is made for every new element in a single pass.
 
-        if (len(self.__queue) >= self.max_size) and (self.max_size > 0):
+        Parameters
+        ----------
+        objs: Iterable[Union[:class:`dict`, :class:`Model`]]
+            Objects to add
+        overwrite: :class:`bool`
+            Whether to overwrite existing elements
+        ttl: Optional[:class:`float`]
+            Seconds until elements expire, overrides :attr:`Config.ttl`.
+            If ``None`` or < 0 elements never expire
+        trusted: Optional[:class:`bool`]
+            Whether to skip validation, see :meth:`Segment.add`
+        dirty: :class:`bool`
+            Whether the writes are reported to subscribed callbacks, see :meth:`Segment.add`
+        """
+        if ttl is ...:
+            ttl = self.model._config.ttl
+        trusted = self.__trusted if trusted is None else trusted
+        data = self.__data
+
+        batch = OrderedDict()
+        for obj in objs:
+            key, new = self.__validate(obj, trusted)
+            if not overwrite and (key in data or key in batch):
+                raise ValueError('Item already exists')
+            batch[key] = new
+            batch.move_to_end(key)
+
+        if 0 < self.max_size < len(batch):
             if not self.make_space:
                 raise Full('Segment full')
-            k = self.__queue.pop(0)
-            self.__data.pop(k)
-        self.__data[v[key]] = self.model(**v)
-        self.__queue.append(v[key])
+            ## Only the last max_size objects would survive adding them one by one,
+            ## the others are still written so they're reported before being evicted
+            deadline = NEVER if ttl is None or ttl < 0 else monotonic() + ttl
+            notify = dirty and self.__listeners
+            for _ in range(len(batch) - self.max_size):
+                key, new = batch.popitem(last=False)
+                if notify:
+                    self.__notify(key, new)
+                self._evicted(key, new, deadline)
+
+        self.__make_space(sum(1 for k in batch if k not in data), next(reversed(batch), None), batch)
+        for key, new in batch.items():
+            self.__store(key, new, ttl)
+        if dirty and self.__listeners:
+            for key, new in batch.items():
+                self.__notify(key, new)
+
+    def __validate(self, obj: M, trusted: bool = False) -> Tuple[Any, Model]:
+        model = self.model
+        if trusted and type(obj) is model:
+            return getattr(obj, model._config.search_by), obj
+
+        assert isinstance(obj, (dict, model)), 'Invalid object passed'
+        v = dict(obj)
+        if trusted:
+            return v[model._config.search_by], model.construct(**v)
+        return v[model._config.search_by], model(**v)
+
+    def __make_space(self, required: int, candidate: Any, pending: Iterable[Any] = ()) -> None:
+        data = self.__data
+        if self.max_size <= 0 or len(data) + required <= self.max_size:
+            return
+        if not self.make_space:
+            raise Full('Segment full')
+
+        while data and len(data) + required > self.max_size:
+            victim = self.__policy.evict(candidate)
+            old = data.pop(victim)
+            self._evicted(victim, old, self.__meta.deadline(victim))
+            self.__meta.release(victim)
+            if self.__indexes:
+                self.__index_remove(victim, old)
+            if victim in pending:
+                ## Evicted an element which is about to be overwritten, it now needs a new slot
+                required += 1
+
+    def _evicted(self, obj_key: Any, obj: Model, deadline: float) -> None:
+        ## Called for every entry evicted to make space, deadline is monotonic and NEVER without a ttl
+        pass
+
+    def __store(self, key: Any, new: Model, ttl: Optional[float]) -> None:
+        old = self.__data.get(key)
+        if old is None:
+            self.__data[key] = new
+            self.__policy.record_insert(key)
+        else:
+            if self.__indexes:
+                self.__index_remove(key, old)
+            self.__data[key] = new
+            self.__data.move_to_end(key)
+            self.__policy.record_access(key)
+
+        if self.__indexes:
+            self.__index_insert(key, new)
+        self.__meta.allocate(key)
+        self.__set_ttl(key, ttl)
 
     def remove(self, obj_key: Any, *default: Any) -> Optional[Model]:
+        found = obj_key in self.__data
+        r = self.__discard(obj_key, *default)
+        if found and self.__listeners:
+            self.__notify(obj_key, None)
+        return r
+
+    def __discard(self, obj_key: Any, *default: Any) -> Optional[Model]:
+        ## Removes an element without reporting it, used when entries leave the cache only
         try:
-            i = self.__queue.index(obj_key)
-        except ValueError as err:
+            r = self.__data.pop(obj_key)
+        except KeyError as err:
             if default:
                 return default[0] if len(default) == 1 else default
-            raise err
-        self.__queue.pop(i)
-        r = self.__data.pop(obj_key)
+            raise ValueError(f'{obj_key!r} is not in segment') from err
+        self.__policy.record_remove(obj_key)
+        self.__meta.release(obj_key)
+        if self.__indexes:
+            self.__index_remove(obj_key, r)
 
         return r
 
-    def invalidate_all(self, func: Callable[[Model], bool], *, limit: int = -1) -> Iterable[Model]:
+    def remove_many(self, obj_keys: Iterable[Any], *default: Any) -> List[Optional[Model]]:
+        """ Removes many elements from segment, results are returned in the same order as keys.
+            Raises `ValueError` before removing anything if a key doesn't exist, unless default is provided
+
+        Parameters
+        ----------
+        obj_keys: Iterable[Any]
+            Values of stored keys to remove
+        *default:
+            If value not found, returns this instead of raising an error
+        """
+        obj_keys = tuple(obj_keys)
+        if not default:
+            for key in obj_keys:
+                if key not in self.__data:
+                    raise ValueError(f'{key!r} is not in segment')
+        return [self.remove(key, *default) for key in obj_keys]
+
+    def invalidate_all(self, func: Union[Callable[[Model], bool], Expr], *, limit: int = -1) -> Iterable[Model]:
+        if isinstance(func, Expr):
+            return [self.__discard(i) for i in self.__plan(Query(func, limit=limit))]
+        self.expire()
         values = list()
-        for key in self.__queue:
+        for key, view in zip(tuple(self.__data), self._resolve_partials(self.__data.values())):
             if len(values) >= limit and limit > 0:
                 break
-            works = func(self._get(key, ignore=True))
-            if works:
+            if func(view):
                 values.append(key)
-        return [self.remove(i) for i in values]
+        return [self.__discard(i) for i in values]
 
-    def update(self, obj_key: Any, **kwds) -> None:
-        current = self.get(obj_key)
-        d = dict(current)
-        d.update(kwds)
+    def invalidate(self, obj_keys: Iterable[Any]) -> List[Model]:
+        data = self.__data
+        return [self.__discard(key) for key in dict.fromkeys(obj_keys) if key in data]
 
-        self.__data[obj_key] = self.model(**d)
+    def update(self, obj_key: Any, **kwds) -> None:
+        self.get(obj_key)
+        current = self.__data.get(obj_key)
+        ## Fetching may have invalidated the entry
+        if current is not None:
+            d = dict(current)
+            d.update(kwds)
+
+            new = self.model(**d)
+            if self.__indexes:
+                self.__index_remove(obj_key, self.__data[obj_key])
+                self.__index_insert(obj_key, new)
+            self.__data[obj_key] = new
+            if self.__listeners:
+                self.__notify(obj_key, new)
 
     def first(self) -> Optional[Model]:
         if self.size() == 0:
             return
-        return self.__data[self.__queue[-1]]
+        return self._resolve_partials((next(reversed(self.__data.values())),))[0]
 
     def last(self) -> Optional[Model]:
         if self.size() == 0:
             return
-        return self.__data[self.__queue[0]]
+        return self._resolve_partials((next(iter(self.__data.values())),))[0]
 
     def oldest(self, limit: int = -1) -> Iterable[Model]:
         """ Retrieves elements starting from the least accessed values
@@ -521,8 +1223,7 @@ def oldest(self, limit: int = -1) -> Iterable[Model]:
             if < 0 then all elements are retrieved
         """
         limit = limit if limit > 0 else self.size()
-        for i in range(limit):
-            yield self.__data[self.__queue[i]]
+        yield from self._resolve_partials(islice(self.__data.values(), limit))
     
     def newest(self, limit: int = -1) -> Iterable[Model]:
         """ Retrieves elements starting from the most recently accessed values
@@ -534,13 +1235,16 @@ def newest(self, limit: int = -1) -> Iterable[Model]:
             if < 0 then all elements are retrieved
         """
         limit = limit if limit > 0 else self.size()
-        for i in range(limit):
-            yield self.__data[self.__queue[-1 - i]]
+        yield from self._resolve_partials(islice(reversed(self.__data.values()), limit))
 
     def clear(self) -> None:
-        self.__position = 0
+        self.__cursor = None
         self.__data.clear()
-        self.__queue.clear()
+        self.__policy.clear()
+        self.__meta.clear()
+        self.__timers.clear()
+        for index in self.__indexes.values():
+            index.clear()
 
     def pretty_print(self, *, limit: int = -1) -> None:
         if (limit < 0) or (limit > self.size()):
@@ -551,22 +1255,228 @@ def pretty_print(self, *, limit: int = -1) -> None:
             headers.append(field)
         print('\t'.join(headers))
 
-        for i in range(limit):
-            key = self.__queue[-1 - i]
-            obj = self.__data[key]
-
+        for obj in islice(reversed(self.__data.values()), limit):
             for header in headers:
                 print(getattr(obj, header), end='\t')
             print()
         print()
 
     def __iter__(self, *, position: int = 0):
-        self.__position = position
+        self.__cursor = islice(reversed(self.__data.values()), position, None)
         return super().__iter__()
 
     def __next__(self) -> Model:
-        if self.__position >= self.size():
-            self.__position = 0
-            raise StopIteration
-        self.__position += 1
-        return self.__data[self.__queue[-1 - (self.__position - 1)]]
+        if self.__cursor is None:
+            self.__cursor = reversed(self.__data.values())
+        try:
+            return next(self.__cursor)
+        except StopIteration:
+            self.__cursor = None
+            raise
+
+
+def _exclusive(method: Callable) -> Callable:
+    ## Runs a Segment method while holding the write lock, buffered hits are applied first
+    @wraps(method)
+    def wrapper(self: ConcurrentSegment, *args, **kwds) -> Any:
+        with self._lock:
+            self._drain()
+            return method(self, *args, **kwds)
+    return wrapper
+
+
+def _shared(method: Callable) -> Callable:
+    ## Runs a read only Segment method while holding the read lock
+    @wraps(method)
+    def wrapper(self: ConcurrentSegment, *args, **kwds) -> Any:
+        with self._lock.read():
+            return method(self, *args, **kwds)
+    return wrapper
+
+
+class ConcurrentSegment(Segment):
+    """
+    Thread safe segment, anything modifying the segment holds a :class:`RWLock` exclusively
+    while scans and snapshots share it. Hits from :meth:`ConcurrentSegment.get` and
+    :meth:`ConcurrentSegment.get_many` don't take the lock at all.
+
+    Hits don't update recency straight away, the hit key is appended to a buffer instead
+    which is applied to the segment and its policy in a single batch once ``buffer_size`` hits are buffered,
+    or before the next write. Draining never blocks readers, if the write lock is busy hits keep being buffered
+    and the oldest ones are dropped once the buffer holds ``4 * buffer_size`` hits.
+
+    Parameters
+    ----------
+    name: :class:`str`
+        Name of segment
+    max_size: :class:`int`
+        Maximum size of segment
+    model: :class:`Model`
+        Model being used to store data
+    make_space: :class:`bool`
+        Whether to start removing content once segment is full, the entry removed is chosen by ``policy``
+    policy: :class:`BasePolicy`
+        Eviction policy used once segment is full, defaults to :class:`LRUPolicy`
+    trusted: :class:`bool`
+        Default for the ``trusted`` argument of :meth:`Segment.add` and :meth:`Segment.add_many`
+    buffer_size: :class:`int`
+        Number of buffered hits which triggers applying them
+
+    .. note::
+        Models using :attr:`Config.invalidate_after` need exact fetch counts,
+        so :meth:`ConcurrentSegment.get` holds the write lock for them.
+    """
+    def __init__(
+        self,
+        name: str, 
+        model: Model,
+        *,
+        max_size: int = 1000,
+        make_space: bool = True,
+        policy: Optional[BasePolicy] = None,
+        trusted: bool = False,
+        buffer_size: int = 64
+    ) -> None:
+        super().__init__(name, model, max_size=max_size, make_space=make_space, policy=policy, trusted=trusted)
+        try:
+            assert type(buffer_size) == int and buffer_size > 0, 'Buffer size must be a positive integer'
+        except AssertionError as err:
+            raise SegmentError('Invalid args provided') from err
+
+        self.__buffer_size = buffer_size
+        self.__hits = deque(maxlen=buffer_size * 4)
+        self._lock = RWLock()
+
+    @property
+    def buffer_size(self) -> int:
+        """ Returns number of buffered hits which triggers applying them """
+        return self.__buffer_size
+
+    def set_loader(self, loader: Union[Driver, Loader, None], *, location: Optional[str] = None,
+                   trusted: Optional[bool] = None) -> None:
+        """ Binds a loader used to fetch missing keys, see :meth:`Segment.set_loader`.
+            Misses are loaded by whichever thread hit them, so drivers bound to one thread are rejected.
+        """
+        if isinstance(loader, Driver):
+            check_shareable(loader)
+        super().set_loader(loader, location=location, trusted=trusted)
+
+    def _drain(self) -> None:
+        ## Write lock must be held
+        hits = self.__hits
+        if hits:
+            self._apply_hits([hits.popleft() for _ in range(len(hits))])
+
+    def drain(self) -> None:
+        """ Applies all buffered hits to the segment and its policy """
+        with self._lock:
+            self._drain()
+
+    def __try_drain(self) -> None:
+        if self._lock.acquire_write(blocking=False):
+            try:
+                self._drain()
+            finally:
+                self._lock.release_write()
+
+    def __exact(self, export_kwds: dict) -> bool:
+        return export_kwds.get('ignore_queue', False) or self.model._config.invalidate_after >= 0
+
+    def get(self, obj_key: Any, *flags, default: Any = ..., **export_kwds) -> Optional[Model]:
+        if not self.__exact(export_kwds):
+            ## Lookups are single dict reads and stored objects are never mutated,
+            ## so hits are served without the lock. Writers re-check anything which looks expired
+            try:
+                obj = self._lookup(obj_key)
+            except IndexError:
+                ## Metadata was cleared mid lookup
+                obj = None
+
+            if obj is not None:
+                self.__hits.append((obj_key, monotonic()))
+                self._invalidated_last = False
+                if len(self.__hits) >= self.__buffer_size:
+                    self.__try_drain()
+                return self._export((obj,), flags, export_kwds)[0]
+
+        ## Loading happens outside the lock so other keys aren't blocked by the loader
+        if self.loader is not None and export_kwds.get('load', True):
+            if self._lookup(obj_key) is None:
+                self._load(obj_key)
+            export_kwds['load'] = False
+
+        ## Misses and expired entries update the segment straight away
+        with self._lock:
+            self._drain()
+            return super().get(obj_key, *flags, default=default, **export_kwds)
+
+    def get_many(self, obj_keys: Iterable[Any], *flags, default: Any = ..., **export_kwds) -> List[M]:
+        obj_keys = tuple(obj_keys)
+        if not self.__exact(export_kwds):
+            try:
+                objs = [self._lookup(key) for key in obj_keys]
+            except IndexError:
+                objs = [None]
+
+            if None not in objs:
+                now = monotonic()
+                self.__hits.extend((key, now) for key in obj_keys)
+                self._invalidated_last = False
+                if len(self.__hits) >= self.__buffer_size:
+                    self.__try_drain()
+                return self._export(objs, flags, export_kwds)
+
+        if self.loader is not None and export_kwds.get('load', True):
+            for key in dict.fromkeys(obj_keys):
+                if self._lookup(key) is None:
+                    self._load(key)
+            export_kwds['load'] = False
+
+        with self._lock:
+            self._drain()
+            return super().get_many(obj_keys, *flags, default=default, **export_kwds)
+
+    def keys(self) -> Iterable[Any]:
+        with self._lock.read():
+            return iter(tuple(super().keys()))
+
+    def values(self) -> Iterable[Model]:
+        with self._lock.read():
+            return iter(tuple(super().values()))
+
+    def oldest(self, limit: int = -1) -> Iterable[Model]:
+        with self._lock.read():
+            return iter(list(super().oldest(limit)))
+
+    def newest(self, limit: int = -1) -> Iterable[Model]:
+        with self._lock.read():
+            return iter(list(super().newest(limit)))
+
+    def __iter__(self, *, position: int = 0):
+        ## Iterates over a snapshot so each iterator is independent
+        with self._lock.read():
+            return islice(reversed(tuple(super().values())), position, None)
+
+    peek_many = _shared(Segment.peek_many)
+    stats = _shared(Segment.stats)
+    first = _shared(Segment.first)
+    last = _shared(Segment.last)
+    pretty_print = _shared(Segment.pretty_print)
+
+    ## Searches record fetches and expire entries, so they can't share the lock
+    search = _exclusive(Segment.search)
+    query = _exclusive(Segment.query)
+    _query_views = _exclusive(Segment._query_views)
+    lookup = _exclusive(Segment.lookup)
+    lookup_range = _exclusive(Segment.lookup_range)
+    expire = _exclusive(Segment.expire)
+
+    add = _exclusive(Segment.add)
+    add_many = _exclusive(Segment.add_many)
+    remove = _exclusive(Segment.remove)
+    remove_many = _exclusive(Segment.remove_many)
+    invalidate_all = _exclusive(Segment.invalidate_all)
+    invalidate = _exclusive(Segment.invalidate)
+    update = _exclusive(Segment.update)
+    update_segment = _exclusive(Segment.update_segment)
+    clear = _exclusive(Segment.clear)
@@ -0,0 +1,395 @@
+from __future__ import annotations
+
+from ezycore.models import Model, M
+from ezycore.exceptions import SegmentError
+from ezycore.query import Compare, Expr, F, Query
+from ezycore.drivers import Driver
+from .segment import BaseSegment, ConcurrentSegment
+from .policies import BasePolicy
+from .metadata import EntryStats
+from .indexes import SortedIndex
+from .changes import ChangeTracker
+from .loaders import Loader, check_shareable, driver_loader
+from .projection import ProjectionCache
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
+from heapq import merge
+from itertools import chain, islice
+from re import _compile
+
+
+class ShardedSegment(BaseSegment):
+    """
+    Segment which hash-partitions keys across ``shards`` :class:`ConcurrentSegment` instances.
+
+    Every shard has its own lock, eviction policy and an equal share of ``max_size``,
+    so writes to different shards never contend and evicting only scans a single shard.
+    Eviction is therefore local to a shard, the entry removed is the one chosen by that shard's policy.
+
+    Parameters
+    ----------
+    name: :class:`str`
+        Name of segment
+    max_size: :class:`int`
+        Maximum size of segment, split evenly between shards
+    model: :class:`Model`
+        Model being used to store data
+    make_space: :class:`bool`
+        Whether to start removing content once a shard is full, the entry removed is chosen by ``policy``
+    shards: :class:`int`
+        Number of shards
+    policy: Callable[[], :class:`BasePolicy`]
+        Creates the eviction policy of each shard, defaults to :class:`LRUPolicy`
+    trusted: :class:`bool`
+        Default for the ``trusted`` argument of :meth:`Segment.add` and :meth:`Segment.add_many`
+    buffer_size: :class:`int`
+        Number of buffered hits which triggers applying them, see :class:`ConcurrentSegment`
+    """
+    def __init__(
+        self,
+        name: str,
+        model: Model,
+        *,
+        max_size: int = 1000,
+        make_space: bool = True,
+        shards: int = 8,
+        policy: Optional[Callable[[], BasePolicy]] = None,
+        trusted: bool = False,
+        buffer_size: int = 64
+    ) -> None:
+        super().__init__(name, model, max_size=max_size, make_space=make_space)
+        try:
+            assert type(shards) == int and shards > 0, 'Number of shards must be a positive integer'
+            assert policy is None or callable(policy), 'policy must be a callable returning a BasePolicy'
+        except AssertionError as err:
+            raise SegmentError('Invalid args provided') from err
+
+        self.__shards: List[ConcurrentSegment] = [
+            ConcurrentSegment(
+                f'{name}[{i}]', model, max_size=size, make_space=make_space,
+                policy=policy() if policy else None, trusted=trusted, buffer_size=buffer_size
+            )
+            for i, size in enumerate(self.__split(max_size, shards))
+        ]
+        self.__projections = ProjectionCache(model)
+        self.__cursor = None
+        self.__changes: Optional[ChangeTracker] = None
+
+        self._invalidated_last = False
+
+    @staticmethod
+    def __split(max_size: int, shards: int) -> List[int]:
+        if max_size < 0:
+            return [max_size] * shards
+        size, extra = divmod(max_size, shards)
+        return [size + (i < extra) for i in range(shards)]
+
+    @property
+    def shards(self) -> List[ConcurrentSegment]:
+        """ Returns the segments keys are partitioned across """
+        return list(self.__shards)
+
+    @property
+    def loader(self) -> Optional[Loader]:
+        """ Returns loader used to fetch missing keys """
+        return self.__shards[0].loader
+
+    def set_loader(self, loader: Union[Driver, Loader, None], *, location: Optional[str] = None,
+                   trusted: Optional[bool] = None) -> None:
+        """ Binds a loader used by every shard to fetch missing keys, see :meth:`Segment.set_loader` """
+        if isinstance(loader, Driver):
+            check_shareable(loader)
+            ## Shared by all shards so calls to the driver stay serialized
+            loader = driver_loader(loader, location or self.name, self.model)
+            trusted = True if trusted is None else trusted
+        for shard in self.__shards:
+            shard.set_loader(loader, trusted=trusted)
+
+    def subscribe(self, callback: Callable[[Any, Optional[Model]], None]) -> None:
+        """ Registers a write callback on every shard, see :meth:`Segment.subscribe` """
+        for shard in self.__shards:
+            shard.subscribe(callback)
+
+    def unsubscribe(self, callback: Callable[[Any, Optional[Model]], None]) -> None:
+        """ Removes a callback registered using :meth:`ShardedSegment.subscribe` """
+        for shard in self.__shards:
+            shard.unsubscribe(callback)
+
+    @property
+    def changes(self) -> Optional[ChangeTracker]:
+        """ Returns tracker of keys changed since the last incremental export, see :meth:`Segment.changes` """
+        return self.__changes
+
+    def track_changes(self, enabled: bool = True) -> Optional[ChangeTracker]:
+        """ Starts or stops tracking changes of every shard in a single tracker, see :meth:`Segment.track_changes` """
+        if enabled and self.__changes is None:
+            self.__changes = ChangeTracker()
+            self.subscribe(self.__changes.record)
+        elif not enabled and self.__changes is not None:
+            self.unsubscribe(self.__changes.record)
+            self.__changes = None
+        return self.__changes
+
+    def shard_for(self, obj_key: Any) -> ConcurrentSegment:
+        """ Returns the shard which stores a key
+
+        Parameters
+        ----------
+        obj_key: Any
+            Key of entry
+        """
+        return self.__shards[hash(obj_key) % len(self.__shards)]
+
+    def __group(self, obj_keys: Iterable[Any]) -> Dict[int, List[Any]]:
+        groups = dict()
+        count = len(self.__shards)
+        for key in obj_keys:
+            groups.setdefault(hash(key) % count, list()).append(key)
+        return groups
+
+    def __key(self, obj: Union[dict, Model]) -> Any:
+        field = self.model._config.search_by
+        return obj[field] if isinstance(obj, dict) else getattr(obj, field)
+
+    def update_segment(self, **kwds) -> None:
+        super().update_segment(**kwds)
+        manager = self._get_manager()
+        for i, (shard, size) in enumerate(zip(self.__shards, self.__split(self.max_size, len(self.__shards)))):
+            update = {k: v for k, v in kwds.items() if k in ('model', 'make_space')}
+            if kwds.get('name', ...) != ...:
+                update['name'] = f'{self.name}[{i}]'
+            if kwds.get('max_size', ...) != ...:
+                update['max_size'] = size
+            if not update:
+                continue
+            ## Shards aren't registered with the manager, so it's detached while they're renamed or remodelled
+            if manager:
+                shard._del_manager()
+            try:
+                shard.update_segment(**update)
+            finally:
+                if manager:
+                    shard._set_manager(manager)
+        if kwds.get('model', ...) != ...:
+            self.__projections = ProjectionCache(self.model)
+
+    def _set_manager(self, manager: Any) -> None:
+        super()._set_manager(manager)
+        ## Shards resolve partials using the manager, they aren't registered with it
+        for shard in self.__shards:
+            shard._set_manager(manager)
+
+    def _del_manager(self) -> None:
+        super()._del_manager()
+        for shard in self.__shards:
+            shard._del_manager()
+
+    ###########################################################################################
+    ##
+    ##  Methods
+    ##
+    ###########################################################################################
+
+    def size(self) -> int:
+        return sum(shard.size() for shard in self.__shards)
+
+    def keys(self) -> Iterable[Any]:
+        return chain.from_iterable(shard.keys() for shard in self.__shards)
+
+    def values(self) -> Iterable[Model]:
+        return chain.from_iterable(shard.values() for shard in self.__shards)
+
+    def stats(self, obj_key: Any) -> EntryStats:
+        """ Returns metadata of an entry, see :meth:`Segment.stats` """
+        return self.shard_for(obj_key).stats(obj_key)
+
+    def expire(self) -> Iterable[Model]:
+        """ Removes every expired entry from all shards, see :meth:`Segment.expire` """
+        return [obj for shard in self.__shards for obj in shard.expire()]
+
+    def get(self, obj_key: Any, *flags, default: Any = ..., **export_kwds) -> Optional[Model]:
+        shard = self.shard_for(obj_key)
+        value = shard.get(obj_key, *flags, default=default, **export_kwds)
+        self._invalidated_last = shard._invalidated_last
+        return value
+
+    def get_many(self, obj_keys: Iterable[Any], *flags, default: Any = ..., **export_kwds) -> List[M]:
+        obj_keys = tuple(obj_keys)
+        groups = self.__group(obj_keys)
+        if default is ... and self.loader is None:
+            ## Shard with a missing key raises before any shard updates recency
+            for i, keys in groups.items():
+                if len(self.__shards[i].peek_many(keys)) < len(set(keys)):
+                    return self.__shards[i].get_many(keys, *flags, **export_kwds)
+
+        values = dict()
+        for i, keys in groups.items():
+            values.update(zip(keys, self.__shards[i].get_many(keys, *flags, default=default, **export_kwds)))
+        return [values[key] for key in obj_keys]
+
+    def peek_many(self, obj_keys: Iterable[Any]) -> Dict[Any, Model]:
+        found = dict()
+        for i, keys in self.__group(obj_keys).items():
+            found.update(self.__shards[i].peek_many(keys))
+        return found
+
+    def search(self, func: Union[Callable[[Model], bool], Expr], *fields, limit: int = -1, **export_kwds) -> Iterable[M]:
+        results = list()
+        for shard in self.__shards:
+            results.extend(shard.search(func, *fields, limit=limit - len(results) if limit > 0 else -1, **export_kwds))
+            if 0 < limit <= len(results):
+                break
+        return results
+
+    def search_using_re(self, expr: str, *fields, flags: int = 0, key: str = None, limit: int = -1, **export_kwds) -> Iterable[M]:
+        compiled = _compile(expr, flags)
+        key = key or self.model._config.search_by
+        return self.search(lambda obj: compiled.match(str(getattr(obj, key))), *fields, limit=limit, **export_kwds)
+
+    def query(self, query: Union[Expr, Query], *fields, **export_kwds) -> Iterable[M]:
+        """ Returns elements matching a query, see :meth:`Segment.query`.
+            When ordering, every shard is queried with the same limit and the results merged.
+        """
+        query = Query.of(query)
+        if not query.order_by:
+            return self.search(query.where or (lambda _: True), *fields, limit=query.limit, **export_kwds)
+
+        order_by, descending = query.order_by, query.descending
+        sort_key = lambda obj: (getattr(obj, order_by) is None, getattr(obj, order_by))
+        if descending:
+            sort_key = lambda obj: (getattr(obj, order_by) is not None, getattr(obj, order_by))
+
+        ## None values always come last, reversed order keeps shard results sorted for merging.
+        ## Shards return models so projections which drop the ordered field are only applied once merged
+        ordered = merge(*(shard._query_views(query) for shard in self.__shards), key=sort_key, reverse=descending)
+        if query.limit > 0:
+            ordered = islice(ordered, query.limit)
+        plan = self.__projections.get(fields, export_kwds)
+        return [plan(obj) for obj in ordered]
+
+    def lookup(self, field: str, value: Any, *fields, limit: int = -1, **export_kwds) -> Iterable[M]:
+        """ Returns elements whose field equals value, see :meth:`Segment.lookup` """
+        results = list()
+        for shard in self.__shards:
+            results.extend(shard.lookup(field, value, *fields, limit=limit - len(results) if limit > 0 else -1, **export_kwds))
+            if 0 < limit <= len(results):
+                break
+        return results
+
+    def lookup_range(self, field: str, *fields, low: Any = None, high: Any = None,
+                     include_low: bool = True, include_high: bool = True, reverse: bool = False,
+                     limit: int = -1, **export_kwds) -> Iterable[M]:
+        """ Returns elements whose field is between low and high ordered by field, see :meth:`Segment.lookup_range` """
+        index = self.__shards[0].indexes.get(field)
+        if index is None:
+            raise SegmentError(f'Field {field!r} is not indexed')
+        if not isinstance(index, SortedIndex):
+            raise SegmentError(f'Field {field!r} requires a sorted index')
+
+        where = F(field) != None
+        if low is not None:
+            where &= Compare(field, '>=' if include_low else '>', low)
+        if high is not None:
+            where &= Compare(field, '<=' if include_high else '<', high)
+        return self.query(Query(where, order_by=field, descending=reverse, limit=limit), *fields, **export_kwds)
+
+    def add(self, obj: M, *, overwrite: bool = False, **kwds) -> None:
+        self.shard_for(self.__key(obj)).add(obj, overwrite=overwrite, **kwds)
+
+    def add_many(self, objs: Iterable[M], *, overwrite: bool = False, **kwds) -> None:
+        groups = dict()
+        count = len(self.__shards)
+        for obj in objs:
+            groups.setdefault(hash(self.__key(obj)) % count, list()).append(obj)
+        for i, group in groups.items():
+            self.__shards[i].add_many(group, overwrite=overwrite, **kwds)
+
+    def remove(self, obj_key: Any, *default: Any) -> Optional[Model]:
+        return self.shard_for(obj_key).remove(obj_key, *default)
+
+    def remove_many(self, obj_keys: Iterable[Any], *default: Any) -> List[Optional[Model]]:
+        obj_keys = tuple(obj_keys)
+        groups = self.__group(obj_keys)
+        if not default:
+            for i, keys in groups.items():
+                missing = [k for k in keys if k not in self.__shards[i].peek_many(keys)]
+                if missing:
+                    raise ValueError(f'{missing[0]!r} is not in segment')
+
+        removed = dict()
+        for i, keys in groups.items():
+            removed.update(zip(keys, self.__shards[i].remove_many(keys, *default)))
+        return [removed[key] for key in obj_keys]
+
+    def invalidate_all(self, func: Union[Callable[[Model], bool], Expr], *, limit: int = -1) -> Iterable[Model]:
+        removed = list()
+        for shard in self.__shards:
+            removed.extend(shard.invalidate_all(func, limit=limit - len(removed) if limit > 0 else -1))
+            if 0 < limit <= len(removed):
+                break
+        return removed
+
+    def invalidate(self, obj_keys: Iterable[Any]) -> List[Model]:
+        removed = list()
+        for i, keys in self.__group(obj_keys).items():
+            removed.extend(self.__shards[i].invalidate(keys))
+        return removed
+
+    def update(self, obj_key: Any, **kwds) -> None:
+        self.shard_for(obj_key).update(obj_key, **kwds)
+
+    def __by_access(self, newest: bool) -> Iterable[Model]:
+        ## Shards are merged using last access times
+        def ordered(shard: ConcurrentSegment) -> Iterable[tuple]:
+            shard.drain()
+            for obj in (shard.newest() if newest else shard.oldest()):
+                key = self.__key(obj)
+                try:
+                    yield shard.stats(key).accessed_at, obj
+                except KeyError:
+                    continue
+        merged = merge(*map(ordered, self.__shards), key=lambda item: item[0], reverse=newest)
+        return (obj for _, obj in merged)
+
+    def oldest(self, limit: int = -1) -> Iterable[Model]:
+        """ Retrieves elements starting from the least accessed values, see :meth:`Segment.oldest` """
+        ordered = self.__by_access(False)
+        return islice(ordered, limit) if limit > 0 else ordered
+
+    def newest(self, limit: int = -1) -> Iterable[Model]:
+        """ Retrieves elements starting from the most recently accessed values, see :meth:`Segment.newest` """
+        ordered = self.__by_access(True)
+        return islice(ordered, limit) if limit > 0 else ordered
+
+    def first(self) -> Optional[Model]:
+        return next(iter(self.newest(1)), None)
+
+    def last(self) -> Optional[Model]:
+        return next(iter(self.oldest(1)), None)
+
+    def clear(self) -> None:
+        self.__cursor = None
+        for shard in self.__shards:
+            shard.clear()
+
+    def pretty_print(self, *, limit: int = -1) -> None:
+        headers = list(self.model.__fields__)
+        print('\t'.join(headers))
+
+        for obj in self.newest(limit):
+            for header in headers:
+                print(getattr(obj, header), end='\t')
+            print()
+        print()
+
+    def __iter__(self, *, position: int = 0):
+        self.__cursor = islice(self.values(), position, None)
+        return super().__iter__()
+
+    def __next__(self) -> Model:
+        if self.__cursor is None:
+            self.__cursor = self.values()
+        try:
+            return next(self.__cursor)
+        except StopIteration:
+            self.__cursor = None
+            raise
@@ -0,0 +1,330 @@
+from __future__ import annotations
+
+from ezycore.exceptions import SegmentError
+from ezycore.models import Model, M
+from ezycore.query import Expr
+from .segment import Segment
+from .policies import BasePolicy
+from .metadata import NEVER
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple, Union
+from collections import OrderedDict
+from contextlib import closing
+from pickle import dumps, loads, HIGHEST_PROTOCOL
+from sqlite3 import connect, Connection
+from tempfile import mkstemp
+from time import monotonic, time
+from weakref import finalize
+from os import close as close_fd, remove as remove_file
+
+
+def _close_tier(connection: Connection, temporary: Optional[str]) -> None:
+    ## Doesn't reference the tier, so it can run once the tier is garbage collected
+    connection.close()
+    if temporary is not None:
+        remove_file(temporary)
+
+
+class _DiskTier:
+    """ Serialized entries stored in a SQLite file, see :class:`TieredSegment` """
+    ## Private table, other tables of a given file are left untouched
+    _TABLE = '_ezycore_tier'
+    ## Entries read at once when scanning the tier
+    _CHUNK = 256
+
+    def __init__(self, path: Optional[str], max_size: int, max_bytes: int) -> None:
+        temporary = path is None
+        if temporary:
+            fd, path = mkstemp(prefix='ezycore-', suffix='.db')
+            close_fd(fd)
+        self.__max_size = max_size
+        self.__max_bytes = max_bytes
+
+        ## Entries are a cache of the hot tier, so nothing needs to survive a crash
+        self.__connection = connect(path, isolation_level=None, check_same_thread=False)
+        ## Closes the file and removes temporary ones if the segment is dropped without being closed
+        self.__finalizer = finalize(self, _close_tier, self.__connection, path if temporary else None)
+        self.__connection.execute('PRAGMA journal_mode = OFF')
+        self.__connection.execute('PRAGMA synchronous = OFF')
+        self.__connection.execute(f'DROP TABLE IF EXISTS {self._TABLE}')
+        self.__connection.execute(f'CREATE TABLE {self._TABLE} (key PRIMARY KEY, value BLOB NOT NULL, expires REAL)')
+
+        ## key: size in bytes, ordered from first spilled -> last spilled
+        self.__sizes: OrderedDict = OrderedDict()
+        self.__bytes = 0
+
+    @property
+    def bytes(self) -> int:
+        return self.__bytes
+
+    def __len__(self) -> int:
+        return len(self.__sizes)
+
+    def __contains__(self, key: Any) -> bool:
+        return key in self.__sizes
+
+    def put(self, key: Any, value: bytes, expires: Optional[float]) -> bool:
+        size = len(value)
+        if 0 < self.__max_bytes < size:
+            return False
+        self.__connection.execute(f'INSERT OR REPLACE INTO {self._TABLE} VALUES (?, ?, ?)', (key, value, expires))
+        self.__bytes += size - self.__sizes.pop(key, 0)
+        self.__sizes[key] = size
+
+        sizes = self.__sizes
+        victims = list()
+        while (0 < self.__max_size < len(sizes)) or (0 < self.__max_bytes < self.__bytes):
+            victim, victim_size = sizes.popitem(last=False)
+            self.__bytes -= victim_size
+            victims.append((victim,))
+        if victims:
+            self.__connection.executemany(f'DELETE FROM {self._TABLE} WHERE key = ?', victims)
+        return True
+
+    def take(self, key: Any) -> Optional[Tuple[bytes, Optional[float]]]:
+        size = self.__sizes.pop(key, None)
+        if size is None:
+            return None
+        self.__bytes -= size
+        row = self.__connection.execute(f'SELECT value, expires FROM {self._TABLE} WHERE key = ?', (key,)).fetchone()
+        self.__connection.execute(f'DELETE FROM {self._TABLE} WHERE key = ?', (key,))
+        return row
+
+    def discard(self, keys: Iterable[Any]) -> List[bytes]:
+        values = list()
+        for key in keys:
+            entry = self.take(key)
+            if entry is not None:
+                values.append(entry[0])
+        return values
+
+    def items(self) -> Iterator[Tuple[Any, bytes]]:
+        ## Read a chunk at a time, the tier may be larger than memory
+        cursor = self.__connection.execute(f'SELECT key, value FROM {self._TABLE}')
+        try:
+            rows = cursor.fetchmany(self._CHUNK)
+            while rows:
+                yield from rows
+                rows = cursor.fetchmany(self._CHUNK)
+        finally:
+            cursor.close()
+
+    def clear(self) -> None:
+        self.__connection.execute(f'DELETE FROM {self._TABLE}')
+        self.__sizes.clear()
+        self.__bytes = 0
+
+    def close(self) -> None:
+        self.__finalizer()
+        self.__sizes.clear()
+        self.__bytes = 0
+
+
+class TieredSegment(Segment):
+    """
+    Segment backed by an on-disk tier, entries evicted from memory are spilled to a SQLite file
+    instead of being dropped, and are moved back into memory when fetched.
+
+    :meth:`TieredSegment.get` and :meth:`TieredSegment.get_many` look in the disk tier before the bound loader,
+    so misses which were evicted are served without going back to the source of truth.
+    Each tier has its own budget, once the disk tier is full the entries spilled first are dropped.
+
+    Spilled entries are pickled, their keys must be ints, floats, strings or bytes.
+    Entries which can't be spilled are dropped like a plain :class:`Segment` would.
+
+    .. note::
+        Only entries in memory are searched, queried, iterated, exported and counted by :meth:`Segment.size`.
+        Expired entries are dropped from the disk tier when they're fetched or pushed out by newer entries.
+
+    .. code-block:: py
+
+        seg = TieredSegment('users', User, max_size=10_000, disk_max_bytes=2 ** 30)
+
+    Parameters
+    ----------
+    name: :class:`str`
+        Name of segment
+    model: :class:`Model`
+        Model being used to store data
+    max_size: :class:`int`
+        Maximum number of entries kept in memory
+    policy: :class:`BasePolicy`
+        Eviction policy of the in-memory tier, defaults to :class:`LRUPolicy`
+    trusted: :class:`bool`
+        Default for the ``trusted`` argument of :meth:`Segment.add` and :meth:`Segment.add_many`
+    path: Optional[:class:`str`]
+        File of the disk tier, entries are kept in its ``_ezycore_tier`` table which is emptied when the segment
+        is created, other tables are left untouched.
+        Defaults to a temporary file removed by :meth:`TieredSegment.close` or once the segment is garbage collected
+    disk_max_size: :class:`int`
+        Maximum number of entries kept on disk, if <= 0 no limit is set
+    disk_max_bytes: :class:`int`
+        Maximum size of pickled entries kept on disk in bytes, if <= 0 no limit is set
+    """
+    def __init__(
+        self,
+        name: str,
+        model: Model,
+        *,
+        max_size: int = 1000,
+        policy: Optional[BasePolicy] = None,
+        trusted: bool = False,
+        path: Optional[str] = None,
+        disk_max_size: int = 100_000,
+        disk_max_bytes: int = -1
+    ) -> None:
+        try:
+            assert type(max_size) == int and max_size > 0, 'Max size must be a positive integer'
+            assert type(disk_max_size) == int, 'Disk max size must be an integer'
+            assert type(disk_max_bytes) == int, 'Disk max bytes must be an integer'
+        except AssertionError as err:
+            raise SegmentError('Invalid args provided') from err
+
+        super().__init__(name, model, max_size=max_size, make_space=True, policy=policy, trusted=trusted)
+        self.__disk = _DiskTier(path, disk_max_size, disk_max_bytes)
+        ## Keys spilled by the add_many call in progress, their spilled copy is the newest one
+        self.__batch_spilled: Optional[set] = None
+        self.__spilled = 0
+        self.__promoted = 0
+
+    @property
+    def disk_size(self) -> int:
+        """ Returns number of entries in the disk tier """
+        return len(self.__disk)
+
+    @property
+    def disk_bytes(self) -> int:
+        """ Returns size of pickled entries in the disk tier in bytes """
+        return self.__disk.bytes
+
+    @property
+    def spilled(self) -> int:
+        """ Returns number of entries moved to the disk tier so far """
+        return self.__spilled
+
+    @property
+    def promoted(self) -> int:
+        """ Returns number of entries moved back into memory so far """
+        return self.__promoted
+
+    def close(self) -> None:
+        """ Closes the disk tier, removing its file unless a path was given """
+        self.__disk.close()
+
+    def __enter__(self) -> TieredSegment:
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def _evicted(self, obj_key: Any, obj: Model, deadline: float) -> None:
+        batch_spilled = self.__batch_spilled
+        if batch_spilled is not None:
+            ## Objects of a batch which don't fit are spilled before older copies are evicted to make space
+            if obj_key in batch_spilled:
+                return
+            batch_spilled.add(obj_key)
+        expires = None if deadline == NEVER else time() + deadline - monotonic()
+        try:
+            stored = self.__disk.put(obj_key, dumps(dict(obj), HIGHEST_PROTOCOL), expires)
+        except Exception:
+            ## Entries which can't be stored are dropped, eviction itself can't fail
+            return
+        self.__spilled += stored
+
+    def __promote(self, obj_key: Any) -> bool:
+        entry = self.__disk.take(obj_key)
+        if entry is None:
+            return False
+        value, expires = entry
+        ttl = None if expires is None else expires - time()
+        if ttl is not None and ttl <= 0:
+            return False
+
+        self.add(loads(value), overwrite=True, ttl=ttl, trusted=True, dirty=False)
+        self.__promoted += 1
+        return self._lookup(obj_key) is not None
+
+    def _load(self, obj_key: Any) -> bool:
+        return self.__promote(obj_key) or super()._load(obj_key)
+
+    def __key(self, obj: Union[dict, Model]) -> Any:
+        field = self.model._config.search_by
+        return obj[field] if isinstance(obj, dict) else getattr(obj, field)
+
+    def add(self, obj: M, *, overwrite: bool = False, **kwds) -> None:
+        key = self.__key(obj)
+        if key in self.__disk and not overwrite:
+            raise ValueError('Item already exists')
+        super().add(obj, overwrite=overwrite, **kwds)
+        ## Also drops copies spilled while making space for the object itself
+        self.__disk.discard((key,))
+
+    def add_many(self, objs: Iterable[M], *, overwrite: bool = False, **kwds) -> None:
+        objs = list(objs)
+        keys = [self.__key(obj) for obj in objs]
+        if not overwrite and any(key in self.__disk for key in keys):
+            raise ValueError('Item already exists')
+        self.__batch_spilled = set()
+        try:
+            super().add_many(objs, overwrite=overwrite, **kwds)
+        finally:
+            self.__batch_spilled = None
+        ## Objects which didn't fit in memory were spilled instead of stored
+        self.__disk.discard(key for key in keys if self._lookup(key) is not None)
+
+    def get_many(self, obj_keys: Iterable[Any], *flags, default: Any = ..., **export_kwds) -> List[M]:
+        obj_keys = tuple(obj_keys)
+        if export_kwds.get('load', True) and len(self.__disk):
+            for key in dict.fromkeys(obj_keys):
+                if key in self.__disk:
+                    self.__promote(key)
+        return super().get_many(obj_keys, *flags, default=default, **export_kwds)
+
+    def remove(self, obj_key: Any, *default: Any) -> Optional[Model]:
+        ## Spilled entries are moved back first, so their removal is reported like any other
+        if obj_key in self.__disk:
+            self.__promote(obj_key)
+        return super().remove(obj_key, *default)
+
+    def remove_many(self, obj_keys: Iterable[Any], *default: Any) -> List[Optional[Model]]:
+        obj_keys = tuple(obj_keys)
+        if not default:
+            for key in obj_keys:
+                if key not in self.__disk and self._lookup(key) is None:
+                    raise ValueError(f'{key!r} is not in segment')
+        return [self.remove(key, *default) for key in obj_keys]
+
+    def invalidate(self, obj_keys: Iterable[Any]) -> List[Model]:
+        obj_keys = tuple(obj_keys)
+        removed = super().invalidate(obj_keys)
+        model = self.model
+        removed.extend(model.construct(**loads(value)) for value in self.__disk.discard(obj_keys))
+        return removed
+
+    def invalidate_all(self, func: Union[Callable[[Model], bool], Expr], *, limit: int = -1) -> Iterable[Model]:
+        removed = list(super().invalidate_all(func, limit=limit))
+        if 0 < limit <= len(removed):
+            return removed
+
+        check = func.compile() if isinstance(func, Expr) else func
+        model = self.model
+        matched = list()
+        with closing(self.__disk.items()) as entries:
+            for key, value in entries:
+                if 0 < limit <= len(removed) + len(matched):
+                    break
+                obj = model.construct(**loads(value))
+                if check(obj):
+                    matched.append(key)
+                    removed.append(obj)
+        self.__disk.discard(matched)
+        return removed
+
+    def update_segment(self, **kwds) -> None:
+        super().update_segment(**kwds)
+        if kwds.get('model', ...) != ...:
+            self.__disk.clear()
+
+    def clear(self) -> None:
+        super().clear()
+        self.__disk.clear()
@@ -0,0 +1,276 @@
+from __future__ import annotations
+
+from ezycore.drivers import Driver
+from ezycore.exceptions import SegmentError
+from .segment import BaseSegment
+from typing import Any, Callable, List, NamedTuple, Optional, Union
+from contextlib import nullcontext
+from threading import Condition, Thread
+from time import monotonic, time
+
+
+class _Watch(NamedTuple):
+    segment: BaseSegment
+    location: str
+    refresh: bool
+
+
+class ChangeWatcher:
+    """
+    Keeps segments populated from a SQLite database in step with writes made to it by other connections,
+    including other processes, from a background thread.
+
+    Every ``interval`` seconds ``PRAGMA data_version`` is polled, which changes whenever another connection commits.
+    Without a change log nothing tells which rows changed, so every watched segment is cleared.
+    With ``change_log=True`` triggers installed by :meth:`SQLiteDriver.install_change_log` record the key
+    of every row written, and only those keys are invalidated, or refreshed from the database.
+
+    Invalidated entries aren't reported to :meth:`Segment.subscribe` callbacks,
+    so they aren't deleted again by :class:`WriteBehind` or exported by :class:`ChangeTracker`.
+
+    .. code-block:: py
+
+        watcher = ChangeWatcher(lambda: SQLiteDriver('users.db', models=...), change_log=True)
+        watcher.watch(manager['users'])
+        ...
+        watcher.close()
+
+    .. note::
+        Commits made by any other connection are seen as changes, including ones made by this process,
+        so keys persisted by :class:`WriteBehind` are invalidated once and loaded again on next use.
+
+    Parameters
+    ----------
+    driver: Union[:class:`SQLiteDriver`, Callable[[], :class:`SQLiteDriver`]]
+        Driver to poll with, or a callable creating it.
+        The driver is only used by the watching thread, so it should be passed as a callable
+        unless it is ``threaded``. Writes made through the same connection aren't seen.
+    interval: :class:`float`
+        Seconds between polls
+    change_log: :class:`bool`
+        Whether to record changed keys using triggers
+    retention: Optional[:class:`float`]
+        Seconds recorded changes are kept for, ``None`` keeps them forever.
+        Watchers which fall further behind than this clear their segments.
+    """
+    def __init__(
+        self,
+        driver: Union[Driver, Callable[[], Driver]],
+        *,
+        interval: float = 1.0,
+        change_log: bool = False,
+        retention: Optional[float] = 3600.0
+    ) -> None:
+        try:
+            assert isinstance(driver, Driver) or callable(driver), 'driver must be a Driver or a callable returning one'
+            assert interval > 0, 'Interval must be positive'
+            assert retention is None or retention > 0, 'Retention must be positive'
+        except AssertionError as err:
+            raise SegmentError('Invalid args provided') from err
+
+        self.__driver = driver
+        self.__interval = interval
+        self.__change_log = change_log
+        self.__retention = retention
+
+        self.__watches: List[_Watch] = list()
+        ## Watches waiting for the watching thread to install their triggers
+        self.__installing: List[_Watch] = list()
+        self.__cond = Condition()
+        ## poll() requests, a request is complete once a poll started after it finished
+        self.__requested = 0
+        self.__completed = 0
+        self.__error: Optional[BaseException] = None
+        self.__closed = False
+        self.__invalidated = 0
+
+        self.__thread = Thread(target=self.__run, name='ezycore-watcher', daemon=True)
+        self.__thread.start()
+
+    @property
+    def invalidated(self) -> int:
+        """ Returns number of entries invalidated or refreshed so far """
+        return self.__invalidated
+
+    @property
+    def last_error(self) -> Optional[BaseException]:
+        """ Returns error raised by the latest poll, ``None`` if it succeeded """
+        return self.__error
+
+    def watch(self, segment: BaseSegment, location: Optional[str] = None, *, refresh: bool = False) -> None:
+        """ Starts keeping a segment in step with its table, blocks until the change log of the table is installed.
+            Changes are only seen from this point on, so segments should be watched before being populated.
+
+        Parameters
+        ----------
+        segment: :class:`BaseSegment`
+            Segment to keep in step
+        location: Optional[:class:`str`]
+            Location passed to the driver, defaults to the name of the segment
+        refresh: :class:`bool`
+            Whether changed keys are fetched again instead of invalidated, requires ``change_log``.
+            Refreshing replaces entries with the stored row, overwriting local writes which weren't persisted yet.
+        """
+        try:
+            assert isinstance(segment, BaseSegment), 'segment must be a BaseSegment'
+            assert not refresh or self.__change_log, 'Refreshing keys requires a change log'
+        except AssertionError as err:
+            raise SegmentError('Invalid args provided') from err
+
+        watch = _Watch(segment, location or segment.name, refresh)
+        cond = self.__cond
+        with cond:
+            if self.__closed or not self.__thread.is_alive():
+                raise SegmentError('Change watcher has stopped') from self.__error
+            self.__installing.append(watch)
+            cond.notify_all()
+            cond.wait_for(lambda: watch not in self.__installing or not self.__thread.is_alive())
+            if watch not in self.__watches:
+                if watch in self.__installing:
+                    self.__installing.remove(watch)
+                raise SegmentError(f'Could not watch {watch.location}') from self.__error
+
+    def unwatch(self, segment: BaseSegment) -> None:
+        """ Stops keeping a segment in step, installed triggers are left in place
+
+        Parameters
+        ----------
+        segment: :class:`BaseSegment`
+            Segment passed to :meth:`ChangeWatcher.watch`
+        """
+        with self.__cond:
+            self.__watches = [watch for watch in self.__watches if watch.segment is not segment]
+
+    def poll(self, timeout: Optional[float] = None) -> None:
+        """ Blocks until changes committed before calling are applied to watched segments,
+            raises the driver's error if polling failed
+
+        Parameters
+        ----------
+        timeout: Optional[:class:`float`]
+            Most seconds to wait, raises `TimeoutError` if reached
+        """
+        cond = self.__cond
+        with cond:
+            self.__requested += 1
+            target = self.__requested
+            cond.notify_all()
+            done = cond.wait_for(lambda: self.__completed >= target or not self.__thread.is_alive(), timeout)
+            error = self.__error
+
+        if not done:
+            raise TimeoutError('Polling timed out')
+        if error is not None:
+            raise error
+
+    def close(self) -> None:
+        """ Stops the watching thread """
+        with self.__cond:
+            self.__closed = True
+            self.__cond.notify_all()
+        self.__thread.join()
+
+    def __enter__(self) -> ChangeWatcher:
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def __run(self) -> None:
+        cond = self.__cond
+        driver = None
+        try:
+            driver = self.__driver if isinstance(self.__driver, Driver) else self.__driver()
+            version = driver.data_version()
+            ## Read once the change log is installed by the first watch
+            position = None
+            pruned = monotonic()
+            while True:
+                with cond:
+                    cond.wait_for(
+                        lambda: self.__closed or self.__installing or self.__requested > self.__completed,
+                        self.__interval
+                    )
+                    if self.__closed:
+                        return
+                    requested = self.__requested
+                    installing = list(self.__installing)
+
+                error = None
+                try:
+                    for watch in installing:
+                        if self.__change_log:
+                            driver.install_change_log(watch.location)
+                            if position is None:
+                                position = driver.change_log_position()
+                        with cond:
+                            self.__watches.append(watch)
+                            self.__installing.remove(watch)
+                            cond.notify_all()
+
+                    current = driver.data_version()
+                    if current != version:
+                        ## Changes committed before the first watch have nothing to be applied to
+                        if self.__watches and not (self.__change_log and position is None):
+                            position = self.__apply(driver, position)
+                        version = current
+
+                    if self.__change_log and self.__retention and monotonic() - pruned >= self.__retention:
+                        driver.prune_change_log(time() - self.__retention)
+                        pruned = monotonic()
+                except Exception as err:
+                    error = err
+
+                with cond:
+                    self.__error = error
+                    if error is not None and self.__installing:
+                        ## Wakes watch() callers, their watch failed
+                        self.__installing.clear()
+                    self.__completed = requested
+                    cond.notify_all()
+        except Exception as err:
+            self.__error = err
+        finally:
+            ## Drivers created by the watcher are closed with it
+            if driver is not None and driver is not self.__driver:
+                driver.close()
+            with cond:
+                cond.notify_all()
+
+    def __apply(self, driver: Driver, position: int) -> int:
+        watches = list(self.__watches)
+        if not self.__change_log:
+            for watch in watches:
+                with self.__locked(watch.segment):
+                    self.__invalidated += watch.segment.size()
+                    watch.segment.clear()
+            return position
+
+        position, changed = driver.changes_since(position, {watch.location for watch in watches})
+        for watch in watches:
+            if watch.location not in changed:
+                continue
+            keys = changed[watch.location]
+            segment = watch.segment
+            if keys is None:
+                with self.__locked(segment):
+                    self.__invalidated += segment.size()
+                    segment.clear()
+                continue
+
+            ## Every changed key is invalidated, segments may store keys peek_many doesn't see, e.g. spilled ones
+            stored = list(segment.peek_many(keys)) if watch.refresh else []
+            fresh = list(driver.fetch_many_by_keys(watch.location, stored, segment.model)) if stored else []
+            found = {getattr(obj, segment.model._config.search_by) for obj in fresh}
+            with self.__locked(segment):
+                removed = segment.invalidate(key for key in keys if key not in found)
+                if fresh:
+                    segment.add_many(fresh, overwrite=True, trusted=True, dirty=False)
+            self.__invalidated += len(removed) + len(fresh)
+        return position
+
+    @staticmethod
+    def __locked(segment: BaseSegment) -> Any:
+        ## Same lock the reaper holds, segments locking themselves have a reentrant one
+        lock = getattr(segment, '_lock', None)
+        return lock if lock is not None else nullcontext()
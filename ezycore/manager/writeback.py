@@ -0,0 +1,237 @@
+from __future__ import annotations
+
+from ezycore.drivers import Driver
+from ezycore.exceptions import SegmentError
+from ezycore.models import Model
+from .segment import BaseSegment
+from typing import Any, Callable, List, Optional, Tuple, Union
+from collections import OrderedDict
+from threading import Condition, Thread
+
+
+## Marks a pending removal
+_DELETED = object()
+
+
+class WriteBehind:
+    """
+    Persists writes made to a segment from a background thread.
+
+    Writes reported by :meth:`Segment.subscribe` are kept as pending, repeated writes to a key are coalesced
+    into its latest value. Pending writes are flushed in batches of ``batch_size`` using :meth:`Driver.export`
+    and :meth:`Driver.delete`, once ``batch_size`` keys are pending or every ``interval`` seconds.
+    A batch which fails is put back and retried on the next flush.
+
+    .. code-block:: py
+
+        writer = WriteBehind(manager['users'], lambda: SQLiteDriver('users.db', models=...))
+        manager['users'].add(...)       # returns straight away
+        writer.flush()                  # blocks until everything pending is persisted
+        writer.close()
+
+    Parameters
+    ----------
+    segment: :class:`BaseSegment`
+        Segment to persist, must provide ``subscribe``/``unsubscribe`` like :class:`Segment`
+    driver: Union[:class:`Driver`, Callable[[], :class:`Driver`]]
+        Driver to persist writes with, or a callable creating it.
+        The driver is only used by the flushing thread, so thread bound drivers such as :class:`SQLiteDriver`
+        should be passed as a callable.
+    location: Optional[:class:`str`]
+        Location passed to the driver, defaults to the name of the segment
+    batch_size: :class:`int`
+        Number of pending keys which triggers a flush, also the most rows exported at once
+    interval: :class:`float`
+        Seconds between flushes of whatever is pending
+    max_pending: :class:`int`
+        Most keys kept pending, writing a new key blocks until the flusher catches up.
+        Writes block for as long as the driver keeps failing once this is reached.
+    """
+    def __init__(
+        self,
+        segment: BaseSegment,
+        driver: Union[Driver, Callable[[], Driver]],
+        *,
+        location: Optional[str] = None,
+        batch_size: int = 500,
+        interval: float = 1.0,
+        max_pending: int = 10_000
+    ) -> None:
+        try:
+            assert hasattr(segment, 'subscribe'), 'Segment must support subscribing to writes'
+            assert isinstance(driver, Driver) or callable(driver), 'driver must be a Driver or a callable returning one'
+            assert type(batch_size) == int and batch_size > 0, 'Batch size must be a positive integer'
+            assert interval > 0, 'Interval must be positive'
+            assert type(max_pending) == int and max_pending >= batch_size, 'Max pending must be at least batch size'
+        except AssertionError as err:
+            raise SegmentError('Invalid args provided') from err
+
+        self.__segment = segment
+        self.__driver = driver
+        self.__location = location or segment.name
+        self.__batch_size = batch_size
+        self.__interval = interval
+        self.__max_pending = max_pending
+
+        self.__pending: OrderedDict = OrderedDict()
+        self.__cond = Condition()
+        ## flush() requests, a request is complete once a flush started after it finished
+        self.__requested = 0
+        self.__completed = 0
+        self.__error: Optional[BaseException] = None
+        self.__closed = False
+        self.__written = 0
+
+        segment.subscribe(self.record)
+        self.__thread = Thread(target=self.__run, name=f'ezycore-writer-{segment.name}', daemon=True)
+        self.__thread.start()
+
+    @property
+    def pending(self) -> int:
+        """ Returns number of keys waiting to be persisted """
+        return len(self.__pending)
+
+    @property
+    def written(self) -> int:
+        """ Returns number of rows persisted or deleted so far """
+        return self.__written
+
+    @property
+    def last_error(self) -> Optional[BaseException]:
+        """ Returns error raised by the latest flush, ``None`` if it succeeded """
+        return self.__error
+
+    def record(self, obj_key: Any, obj: Optional[Model]) -> None:
+        """ Marks a key as written, ``obj`` is ``None`` when the key was removed.
+            Called by the segment for every write.
+
+        Parameters
+        ----------
+        obj_key: Any
+            Key written to
+        obj: Optional[:class:`Model`]
+            New value of key
+        """
+        cond = self.__cond
+        with cond:
+            pending = self.__pending
+            while len(pending) >= self.__max_pending and obj_key not in pending:
+                if self.__closed or not self.__thread.is_alive():
+                    raise SegmentError('Write-behind flusher has stopped') from self.__error
+                cond.notify_all()
+                cond.wait()
+
+            pending[obj_key] = _DELETED if obj is None else obj
+            if len(pending) >= self.__batch_size:
+                cond.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """ Blocks until every write made before calling is persisted,
+            raises the driver's error if persisting failed
+
+        Parameters
+        ----------
+        timeout: Optional[:class:`float`]
+            Most seconds to wait, raises `TimeoutError` if reached
+        """
+        cond = self.__cond
+        with cond:
+            self.__requested += 1
+            target = self.__requested
+            cond.notify_all()
+            done = cond.wait_for(lambda: self.__completed >= target or not self.__thread.is_alive(), timeout)
+            error = self.__error
+
+        if not done:
+            raise TimeoutError('Flushing timed out')
+        if error is not None:
+            raise error
+
+    def close(self) -> None:
+        """ Stops recording writes, flushes everything pending and stops the flusher """
+        try:
+            self.__segment.unsubscribe(self.record)
+        except ValueError:
+            pass
+
+        with self.__cond:
+            self.__closed = True
+            self.__cond.notify_all()
+        self.__thread.join()
+
+        if self.__error is not None:
+            raise self.__error
+
+    def __enter__(self) -> WriteBehind:
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def __run(self) -> None:
+        cond = self.__cond
+        failing = False
+        try:
+            driver = self.__driver if isinstance(self.__driver, Driver) else self.__driver()
+            while True:
+                with cond:
+                    ## A failing driver is only retried every interval, not on every write
+                    cond.wait_for(
+                        lambda: self.__closed or self.__requested > self.__completed
+                            or (not failing and len(self.__pending) >= self.__batch_size),
+                        self.__interval
+                    )
+                    requested = self.__requested
+                    stop = self.__closed
+
+                try:
+                    self.__drain(driver)
+                    error = None
+                except Exception as err:
+                    error = err
+
+                failing = error is not None
+                with cond:
+                    self.__error = error
+                    self.__completed = requested
+                    cond.notify_all()
+                if stop:
+                    return
+        except Exception as err:
+            self.__error = err
+        finally:
+            with cond:
+                cond.notify_all()
+
+    def __take(self) -> List[Tuple[Any, Any]]:
+        with self.__cond:
+            pending = self.__pending
+            batch = [pending.popitem(last=False) for _ in range(min(len(pending), self.__batch_size))]
+            ## Writers waiting for space can continue
+            self.__cond.notify_all()
+        return batch
+
+    def __drain(self, driver: Driver) -> None:
+        while True:
+            batch = self.__take()
+            if not batch:
+                return
+
+            try:
+                upserts = [obj for _, obj in batch if obj is not _DELETED]
+                deletes = [key for key, obj in batch if obj is _DELETED]
+                if upserts:
+                    driver.export(self.__location, upserts)
+                if deletes:
+                    driver.delete(self.__location, deletes)
+                driver.commit()
+            except Exception:
+                ## Put the batch back in front, keys written since then keep their newer value
+                with self.__cond:
+                    pending = self.__pending
+                    for key, obj in reversed(batch):
+                        if key not in pending:
+                            pending[key] = obj
+                            pending.move_to_end(key, last=False)
+                raise
+            self.__written += len(batch)
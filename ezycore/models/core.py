@@ -1,5 +1,5 @@
 from __future__ import annotations
-from typing import Generic, Dict, Iterator, TypeVar, Union
+from typing import Any, Callable, Generic, Dict, Iterator, Literal, TypeVar, Union
 
 from pydantic import BaseModel, ValidationError
 from pydantic.fields import ModelField
@@ -24,19 +24,75 @@ class Config(BaseModel):
         Mapping of partial vars to segment names.
     invalidate_after: :class:`int`
         Automatically invalidates entry after it is fetched n times
+    ttl: :class:`float`
+        Automatically invalidates entry n seconds after it was added,
+        if < 0 entries never expire
+    indexes: Dict[:class:`str`, :class:`str`]
+        Mapping of fields to secondary index types maintained by segments.
+        ``hash`` indexes support equality lookups, ``sorted`` indexes also support range lookups
+    deferred: :class:`set`
+        Fields drivers leave out when fetching, they're loaded from the driver on first access.
+        :class:`SQLiteDriver` loads every deferred field of a row at once.
+        Useful for large columns which are rarely read
     """
     search_by: str
     exclude: Union[dict, set] = set()
     partials: Dict[str, str] = dict()
     invalidate_after: int = -1
-
-    __ezycore_internal__: dict = {'n_fetch': 0}
+    ttl: float = -1
+    indexes: Dict[str, Literal['hash', 'sorted']] = dict()
+    deferred: set = set()
 
 
 class Model(BaseModel):
+    ## Loads fields left out by a driver, set using Model._defer
+    __slots__ = ('__ezycore_loader__',)
     __ezycore_partials__: tuple = None
     _config: Config
 
+    def _defer(self, loader: Callable[[str], Dict[str, Any]]) -> None:
+        """ Sets function loading fields missing from the model on first access, used by drivers.
+            The loader returns the accessed field's value along with any other missing fields it read.
+        """
+        object.__setattr__(self, '__ezycore_loader__', loader)
+
+    def __load_missing(self, include: Any = None, exclude: Any = None) -> None:
+        ## Loads deferred fields which are about to be exported
+        values = self.__dict__
+        for name in self.__fields__:
+            if name in values or (include is not None and name not in include):
+                continue
+            if exclude is not None and name in exclude and (not isinstance(exclude, dict) or exclude[name] in (True, ...)):
+                continue
+            getattr(self, name)
+
+    def __getattr__(self, name: str) -> Any:
+        try:
+            loader = object.__getattribute__(self, '__ezycore_loader__')
+        except AttributeError:
+            loader = None
+        if loader is None or name not in self.__fields__ or name in self.__dict__:
+            raise AttributeError(f'{self.__class__.__name__!r} object has no attribute {name!r}')
+
+        values = self.__dict__
+        for field, value in loader(name).items():
+            ## Fields set since the model was built aren't replaced
+            if field not in values:
+                values[field] = value
+                self.__fields_set__.add(field)
+        return values[name]
+
+    def __iter__(self):
+        if len(self.__dict__) < len(self.__fields__):
+            self.__load_missing()
+        return super().__iter__()
+
+    def _iter(self, *args, **kwds):
+        ## Only models built by drivers with deferred fields can be missing fields
+        if len(self.__dict__) < len(self.__fields__):
+            self.__load_missing(kwds.get('include'), kwds.get('exclude'))
+        return super()._iter(*args, **kwds)
+
     def _read_partials(cls) -> Iterator[str]:
         for k, v in cls.__annotations__.items():
             __origin__ = getattr(v, '__origin__', None)
@@ -59,6 +115,18 @@ def _verify_partials(cls) -> None:
         if missing:
             raise ValueError('Missing partial definitions for: {}'.format(', '.join(missing)))
 
+    def _verify_indexes(cls) -> None:
+        missing = [i for i in cls._config.indexes if i not in cls.__fields__]
+        if missing:
+            raise ValueError('Cannot index unknown fields: {}'.format(', '.join(missing)))
+
+    def _verify_deferred(cls) -> None:
+        missing = [i for i in cls._config.deferred if i not in cls.__fields__]
+        if missing:
+            raise ValueError('Cannot defer unknown fields: {}'.format(', '.join(missing)))
+        if cls._config.search_by in cls._config.deferred:
+            raise ValueError('Cannot defer the search_by field')
+
 
     ## Ensures _config var exists
     def __init_subclass__(cls, **kwds) -> None:
@@ -72,6 +140,8 @@ def __init_subclass__(cls, **kwds) -> None:
         else:
             assert isinstance(r, Config), 'Invalid config class provided'
         Model._verify_partials(cls)
+        Model._verify_indexes(cls)
+        Model._verify_deferred(cls)
         return super().__init_subclass__(**kwds)
 
 
@@ -0,0 +1,397 @@
+"""
+Declarative filters shared by segments and drivers.
+
+.. code-block:: py
+
+    from ezycore.query import F, Query
+
+    expr = (F('owner') == 10) & F('requests').between(10, 100)
+
+    manager['tokens'].query(expr)                                  # uses segment indexes when possible
+    driver.fetch('tokens', Query(expr, order_by='requests', limit=5))  # WHERE "owner" = ? AND ...
+
+Expressions follow Python semantics on both sides, a missing value (``None``/``NULL``) never matches
+an ordering comparison but does match ``!=`` and negations. ``None`` values are ordered last.
+"""
+from __future__ import annotations
+from abc import ABC, abstractmethod
+
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from operator import eq, ne, lt, le, gt, ge
+
+
+## (cost, keys) where keys lazily produces candidate primary keys
+AccessPath = Tuple[int, Callable[[], Iterable[Any]]]
+
+_OPERATORS = {
+    '==': (eq, '='),
+    '!=': (ne, '!='),
+    '<': (lt, '<'),
+    '<=': (le, '<='),
+    '>': (gt, '>'),
+    '>=': (ge, '>='),
+}
+
+
+def quote(identifier: str) -> str:
+    """ Quotes an SQL identifier """
+    return '"{}"'.format(identifier.replace('"', '""'))
+
+
+def _prefix_bound(prefix: str) -> Optional[str]:
+    ## Smallest string greater than every string starting with prefix
+    for i in range(len(prefix) - 1, -1, -1):
+        if ord(prefix[i]) < 0x10FFFF:
+            return prefix[:i] + chr(ord(prefix[i]) + 1)
+    return None
+
+
+class Expr(ABC):
+    """ Base class for filter expressions, combine using ``&``, ``|`` and ``~`` """
+
+    @abstractmethod
+    def compile(self) -> Callable[[Any], bool]:
+        """ Returns a function which checks whether an object matches the expression """
+
+    @abstractmethod
+    def to_sql(self, params: List[Any]) -> str:
+        """ Returns a parameterized SQL condition, appending parameters to ``params`` """
+
+    def access_path(self, indexes: Dict[str, Any]) -> Optional[AccessPath]:
+        """ Returns cheapest way to find candidate keys using indexes, ``None`` if a scan is needed """
+        return None
+
+    def fields(self) -> Iterable[str]:
+        """ Returns all fields used by the expression """
+        return ()
+
+    def where(self) -> Tuple[str, Tuple[Any]]:
+        """ Returns a parameterized SQL condition alongside its parameters """
+        params = list()
+        return self.to_sql(params), tuple(params)
+
+    def __and__(self, other: Expr) -> Expr:
+        return And(self, other)
+
+    def __or__(self, other: Expr) -> Expr:
+        return Or(self, other)
+
+    def __invert__(self) -> Expr:
+        return Not(self)
+
+
+class F:
+    """
+    Reference to a model field/table column used for building expressions
+
+    Parameters
+    ----------
+    name: :class:`str`
+        Name of field
+    """
+    __slots__ = ('name',)
+
+    def __init__(self, name: str) -> None:
+        assert type(name) == str, 'Field name must be a string'
+        self.name = name
+
+    def __eq__(self, value: Any) -> Expr:
+        return Compare(self.name, '==', value)
+
+    def __ne__(self, value: Any) -> Expr:
+        return Compare(self.name, '!=', value)
+
+    def __lt__(self, value: Any) -> Expr:
+        return Compare(self.name, '<', value)
+
+    def __le__(self, value: Any) -> Expr:
+        return Compare(self.name, '<=', value)
+
+    def __gt__(self, value: Any) -> Expr:
+        return Compare(self.name, '>', value)
+
+    def __ge__(self, value: Any) -> Expr:
+        return Compare(self.name, '>=', value)
+
+    def in_(self, values: Iterable[Any]) -> Expr:
+        """ Field must equal one of the values """
+        return In(self.name, values)
+
+    def startswith(self, prefix: str) -> Expr:
+        """ Field must start with prefix """
+        return Prefix(self.name, prefix)
+
+    def between(self, low: Any, high: Any) -> Expr:
+        """ Field must be between low and high, inclusive """
+        return Compare(self.name, '>=', low) & Compare(self.name, '<=', high)
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"F({self.name!r})"
+
+
+class Compare(Expr):
+    """ Compares a field to a value """
+    def __init__(self, field: str, op: str, value: Any) -> None:
+        if op not in _OPERATORS:
+            raise ValueError(f'Unknown operator: {op}')
+        self.field = field
+        self.op = op
+        self.value = value
+
+    def compile(self) -> Callable[[Any], bool]:
+        func, field, value = _OPERATORS[self.op][0], self.field, self.value
+        if self.op in ('==', '!='):
+            return lambda obj: func(getattr(obj, field), value)
+
+        def check(obj: Any) -> bool:
+            v = getattr(obj, field)
+            return v is not None and func(v, value)
+        return check
+
+    def to_sql(self, params: List[Any]) -> str:
+        column = quote(self.field)
+        if self.value is None and self.op in ('==', '!='):
+            return f"{column} IS {'NOT ' if self.op == '!=' else ''}NULL"
+        params.append(self.value)
+        if self.op == '!=':
+            ## None != value holds in Python, SQL's NULL != value doesn't
+            return f"({column} != ? OR {column} IS NULL)"
+        return f"{column} {_OPERATORS[self.op][1]} ?"
+
+    def access_path(self, indexes: Dict[str, Any]) -> Optional[AccessPath]:
+        index = indexes.get(self.field)
+        if index is None or self.op == '!=':
+            return None
+        if self.op == '==':
+            return index.count(self.value), lambda: index.find(self.value)
+        if index.kind != 'sorted' or self.value is None:
+            return None
+
+        bounds = dict(low=None, high=None)
+        if self.op in ('>', '>='):
+            bounds.update(low=self.value, include_low=self.op == '>=')
+        else:
+            bounds.update(high=self.value, include_high=self.op == '<=')
+        return index.count_range(**bounds), lambda: index.range(**bounds)
+
+    def fields(self) -> Iterable[str]:
+        return (self.field,)
+
+    def __repr__(self) -> str:
+        return f"(F({self.field!r}) {self.op} {self.value!r})"
+
+
+class In(Expr):
+    """ Checks a field equals one of many values """
+    def __init__(self, field: str, values: Iterable[Any]) -> None:
+        self.field = field
+        self.values = tuple(values)
+
+    def compile(self) -> Callable[[Any], bool]:
+        field = self.field
+        try:
+            values = frozenset(self.values)
+        except TypeError:
+            values = self.values
+        return lambda obj: getattr(obj, field) in values
+
+    def to_sql(self, params: List[Any]) -> str:
+        column = quote(self.field)
+        values = [v for v in self.values if v is not None]
+        nulls = len(values) != len(self.values)
+        if not values:
+            return f'{column} IS NULL' if nulls else '0'
+        params.extend(values)
+        sql = f"{column} IN ({', '.join('?' * len(values))})"
+        ## NULL IN (...) is never true in SQL
+        return f'({sql} OR {column} IS NULL)' if nulls else sql
+
+    def access_path(self, indexes: Dict[str, Any]) -> Optional[AccessPath]:
+        index = indexes.get(self.field)
+        if index is None:
+            return None
+
+        def keys() -> Iterable[Any]:
+            seen = dict()
+            for value in self.values:
+                seen.update(dict.fromkeys(index.find(value)))
+            return seen
+        return sum(index.count(v) for v in self.values), keys
+
+    def fields(self) -> Iterable[str]:
+        return (self.field,)
+
+    def __repr__(self) -> str:
+        return f"F({self.field!r}).in_({self.values!r})"
+
+
+class Prefix(Expr):
+    """ Checks a string field starts with a prefix """
+    def __init__(self, field: str, prefix: str) -> None:
+        assert type(prefix) == str, 'Prefix must be a string'
+        self.field = field
+        self.prefix = prefix
+
+    def compile(self) -> Callable[[Any], bool]:
+        field, prefix = self.field, self.prefix
+
+        def check(obj: Any) -> bool:
+            v = getattr(obj, field)
+            return isinstance(v, str) and v.startswith(prefix)
+        return check
+
+    def to_sql(self, params: List[Any]) -> str:
+        ## substr is case sensitive unlike LIKE
+        params.extend((len(self.prefix), self.prefix))
+        return f"substr({quote(self.field)}, 1, ?) = ?"
+
+    def access_path(self, indexes: Dict[str, Any]) -> Optional[AccessPath]:
+        index = indexes.get(self.field)
+        if index is None or index.kind != 'sorted':
+            return None
+        bounds = dict(low=self.prefix, high=_prefix_bound(self.prefix), include_high=False)
+        return index.count_range(**bounds), lambda: index.range(**bounds)
+
+    def fields(self) -> Iterable[str]:
+        return (self.field,)
+
+    def __repr__(self) -> str:
+        return f"F({self.field!r}).startswith({self.prefix!r})"
+
+
+class And(Expr):
+    """ All expressions must match """
+    def __init__(self, *exprs: Expr) -> None:
+        self.exprs = tuple(j for i in exprs for j in (i.exprs if isinstance(i, And) else (i,)))
+
+    def compile(self) -> Callable[[Any], bool]:
+        checks = tuple(i.compile() for i in self.exprs)
+        return lambda obj: all(check(obj) for check in checks)
+
+    def to_sql(self, params: List[Any]) -> str:
+        return '(' + ' AND '.join(i.to_sql(params) for i in self.exprs) + ')'
+
+    def access_path(self, indexes: Dict[str, Any]) -> Optional[AccessPath]:
+        ## Any branch narrows results, pick the most selective one
+        paths = [p for p in (i.access_path(indexes) for i in self.exprs) if p]
+        return min(paths, key=lambda p: p[0]) if paths else None
+
+    def fields(self) -> Iterable[str]:
+        return tuple(j for i in self.exprs for j in i.fields())
+
+    def __repr__(self) -> str:
+        return '(' + ' & '.join(map(repr, self.exprs)) + ')'
+
+
+class Or(Expr):
+    """ At least one expression must match """
+    def __init__(self, *exprs: Expr) -> None:
+        self.exprs = tuple(j for i in exprs for j in (i.exprs if isinstance(i, Or) else (i,)))
+
+    def compile(self) -> Callable[[Any], bool]:
+        checks = tuple(i.compile() for i in self.exprs)
+        return lambda obj: any(check(obj) for check in checks)
+
+    def to_sql(self, params: List[Any]) -> str:
+        return '(' + ' OR '.join(i.to_sql(params) for i in self.exprs) + ')'
+
+    def access_path(self, indexes: Dict[str, Any]) -> Optional[AccessPath]:
+        ## Every branch must be indexed, otherwise a scan is needed anyway
+        paths = [i.access_path(indexes) for i in self.exprs]
+        if not all(paths):
+            return None
+
+        def keys() -> Iterable[Any]:
+            seen = dict()
+            for _, path in paths:
+                seen.update(dict.fromkeys(path()))
+            return seen
+        return sum(p[0] for p in paths), keys
+
+    def fields(self) -> Iterable[str]:
+        return tuple(j for i in self.exprs for j in i.fields())
+
+    def __repr__(self) -> str:
+        return '(' + ' | '.join(map(repr, self.exprs)) + ')'
+
+
+class Not(Expr):
+    """ Expression must not match """
+    def __init__(self, expr: Expr) -> None:
+        self.expr = expr
+
+    def compile(self) -> Callable[[Any], bool]:
+        check = self.expr.compile()
+        return lambda obj: not check(obj)
+
+    def to_sql(self, params: List[Any]) -> str:
+        ## NOT NULL is NULL in SQL, a condition which doesn't hold is false in Python
+        return f"NOT coalesce({self.expr.to_sql(params)}, 0)"
+
+    def fields(self) -> Iterable[str]:
+        return self.expr.fields()
+
+    def __repr__(self) -> str:
+        return f"~{self.expr!r}"
+
+
+class Query:
+    """
+    Filter alongside ordering and limits, accepted by :meth:`Segment.query` and :meth:`SQLiteDriver.fetch`
+
+    Parameters
+    ----------
+    where: Optional[:class:`Expr`]
+        Expression results must match, if ``None`` all results match
+    order_by: Optional[:class:`str`]
+        Field to order results by
+    descending: :class:`bool`
+        Whether to order results from highest to lowest
+    limit: :class:`int`
+        Number of results to restrict query to,
+        if < 0 no limit is set.
+    """
+    __slots__ = ('where', 'order_by', 'descending', 'limit')
+
+    def __init__(self, where: Optional[Expr] = None, *, order_by: Optional[str] = None,
+                 descending: bool = False, limit: int = -1) -> None:
+        assert where is None or isinstance(where, Expr), 'where must be an expression'
+        self.where = where
+        self.order_by = order_by
+        self.descending = descending
+        self.limit = limit
+
+    @classmethod
+    def of(cls, query: Any) -> Query:
+        """ Converts an expression into a query """
+        if isinstance(query, cls):
+            return query
+        return cls(query)
+
+    def to_sql(self, table: str, columns: str = '*') -> Tuple[str, Tuple[Any]]:
+        """ Returns a parameterized ``SELECT`` statement alongside its parameters
+
+        Parameters
+        ----------
+        table: :class:`str`
+            Table to select from
+        columns: :class:`str`
+            Columns to select
+        """
+        params = list()
+        sql = f'SELECT {columns} FROM {table}'
+        if self.where is not None:
+            sql += f' WHERE {self.where.to_sql(params)}'
+        if self.order_by:
+            ## NULLs come last in either direction, like None values do in segments
+            column = quote(self.order_by)
+            sql += f" ORDER BY {column} IS NULL, {column} {'DESC' if self.descending else 'ASC'}"
+        if self.limit > 0:
+            sql += ' LIMIT ?'
+            params.append(self.limit)
+        return sql, tuple(params)
+
+    def __repr__(self) -> str:
+        return f"Query(where={self.where!r}, order_by={self.order_by!r}, descending={self.descending}, limit={self.limit})"
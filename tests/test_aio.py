@@ -0,0 +1,101 @@
+from ezycore import AsyncManager, AsyncSQLiteDriver, AsyncSegment, Driver, Segment, ThreadedDriver
+from ezycore.models import Model, Config
+from tempfile import TemporaryDirectory
+from threading import get_ident
+from sqlite3 import connect
+from os import path
+import unittest
+
+
+class UserModel(Model):
+    id: int
+    name: str
+
+    _config: Config = {'search_by': 'id'}
+
+
+class CountingDriver(Driver):
+    def __init__(self) -> None:
+        self.read = 0
+
+    def fetch(self, location, *args, **kwds):
+        for i in range(100):
+            self.read += 1
+            yield UserModel(id=i, name=f'User {i}')
+
+    def fetch_one(self, location, *args, **kwds):
+        return None
+
+    def map_to_model(self, **kwds) -> None:
+        pass
+
+    def export(self, location, stream) -> None:
+        pass
+
+
+class TestAsync(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.tmp = TemporaryDirectory()
+        self.database = path.join(self.tmp.name, 'cache.db')
+        with connect(self.database) as conn:
+            conn.execute('CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT)')
+            conn.executemany('INSERT INTO users VALUES (?, ?)', [(i, f'User {i}') for i in range(50)])
+        conn.close()
+
+        self.driver = AsyncSQLiteDriver(self.database, models={'users': UserModel})
+        self.manager = AsyncManager(['users'], {'users': UserModel}, driver=self.driver, chunk_size=8)
+
+    async def asyncTearDown(self) -> None:
+        await self.driver.close()
+        self.tmp.cleanup()
+
+    async def test_populate_and_export(self):
+        await self.manager.populate_using_driver('users', limit_result=20)
+        users = self.manager.segment('users')
+        self.assertIs(users, self.manager.segment('users'))
+        self.assertEqual(users.segment.size(), 20)
+        self.assertEqual((await users.get(3)).name, 'User 3')
+        self.assertEqual(await users.get_many([1, 2], 'name'), [{'name': 'User 1'}, {'name': 'User 2'}])
+
+        await users.add({'id': 100, 'name': 'New'})
+        await self.manager.export_segment('users')
+        await self.driver.close()
+
+        with connect(self.database) as conn:
+            self.assertEqual(conn.execute('SELECT name FROM users WHERE id = 100').fetchone(), ('New',))
+        conn.close()
+        self.driver = AsyncSQLiteDriver(self.database, models={'users': UserModel})
+
+    async def test_streamed_chunks(self):
+        counting = CountingDriver()
+        driver = ThreadedDriver(counting)
+        chunks = driver.fetch_chunks('users', chunk_size=30)
+        self.assertEqual(len(await chunks.__anext__()), 30)
+        ## Rows past the first chunk haven't been read yet
+        self.assertLessEqual(counting.read, 31)
+        self.assertEqual([len(i) async for i in chunks], [30, 30, 10])
+
+        manager = AsyncManager(['users'], {'users': UserModel}, driver=driver, chunk_size=40)
+        await manager.populate_using_driver('users')
+        self.assertEqual(manager.segment('users').segment.size(), 100)
+        await driver.close()
+
+    async def test_get_or_load(self):
+        users = self.manager.segment('users')
+        self.assertIsNone(await users.get(7, default=None))
+        self.assertEqual((await users.get_or_load(7)).name, 'User 7')
+        self.assertEqual(users.segment.size(), 1)
+        self.assertEqual(await users.get_or_load(7, 'name'), {'name': 'User 7'})
+
+        self.assertIsNone(await users.get_or_load(1000, default=None))
+        with self.assertRaises(ValueError):
+            await users.get_or_load(1000)
+        with self.assertRaises(ValueError):
+            await AsyncSegment(Segment('users', UserModel)).get_or_load(7)
+
+    async def test_worker_thread(self):
+        ident = await self.driver.run(lambda _: get_ident())
+        self.assertNotEqual(ident, get_ident())
+        self.assertEqual(await self.driver.run(lambda _: get_ident()), ident)
+        self.assertEqual(len(await self.driver.fetch('users', 'id < 5')), 5)
+        self.assertEqual(sorted(i.id for i in await self.driver.fetch_many_by_keys('users', iter([4, 2, 99]))), [2, 4])
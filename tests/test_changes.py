@@ -0,0 +1,144 @@
+from ezycore import Driver, Manager, Segment, ShardedSegment, SQLiteDriver
+from ezycore.exceptions import SegmentError
+from ezycore.models import Model, Config
+from tempfile import TemporaryDirectory
+from sqlite3 import connect
+from os import path
+import unittest
+
+
+class UserModel(Model):
+    id: int
+    name: str
+
+    _config: Config = {'search_by': 'id'}
+
+
+class RecordingDriver(Driver):
+    def __init__(self, failures: int = 0) -> None:
+        self.failures = failures
+        self.exported = list()
+        self.deleted = list()
+        self.commits = 0
+
+    def fetch(self, location, *args, **kwds):
+        return [UserModel(id=i, name=f'User {i}') for i in range(3)]
+
+    def fetch_one(self, location, *args, **kwds):
+        return None
+
+    def map_to_model(self, **kwds) -> None:
+        pass
+
+    def export(self, location, stream) -> None:
+        self.exported.append(sorted((i.id, i.name) for i in stream))
+
+    def delete(self, location, keys, *, key=None) -> None:
+        self.deleted.append(sorted(keys))
+
+    def commit(self) -> None:
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError('Backend down')
+        self.commits += 1
+
+
+class TestChanges(unittest.TestCase):
+    def test_incremental_export(self):
+        manager = Manager([Segment('users', UserModel, max_size=2)], {'users': UserModel})
+        users = manager['users']
+        driver = RecordingDriver()
+        with self.assertRaises(SegmentError):
+            manager.export_segment('users', driver, incremental=True)
+
+        tracker = users.track_changes()
+        self.assertIs(users.track_changes(), tracker)
+        manager.populate_using_driver('users', driver)
+        self.assertEqual(tracker.pending, 0)
+
+        users.add({'id': 10, 'name': 'A'})
+        users.add({'id': 10, 'name': 'B'}, overwrite=True)
+        users.add({'id': 11, 'name': 'C'})
+        users.add({'id': 12, 'name': 'D'})
+        users.remove(11)
+        ## Evicted before being exported, still exported
+        self.assertNotIn(10, users.keys())
+
+        manager.export_segment('users', driver, incremental=True)
+        self.assertEqual(driver.exported, [[(10, 'B'), (12, 'D')]])
+        self.assertEqual(driver.deleted, [[11]])
+        self.assertEqual(tracker.pending, 0)
+        self.assertEqual(tracker.last_checkpoint.id, 1)
+
+        ## Nothing changed, only commits
+        manager.export_segment('users', driver, incremental=True)
+        self.assertEqual(len(driver.exported), 1)
+        self.assertEqual(driver.commits, 2)
+
+        users.track_changes(False)
+        self.assertIsNone(users.changes)
+        users.add({'id': 13, 'name': 'E'})
+        with self.assertRaises(SegmentError):
+            manager.export_segment('users', driver, incremental=True)
+
+    def test_failed_export_is_retried(self):
+        manager = Manager(['users'], {'users': UserModel})
+        users = manager['users']
+        tracker = users.track_changes()
+        driver = RecordingDriver(failures=1)
+
+        users.add_many([{'id': 1, 'name': 'A'}, {'id': 2, 'name': 'B'}, {'id': 3, 'name': 'C'}])
+        users.remove(3)
+        checkpoint = tracker.checkpoint()
+        ## Written while the checkpoint is being exported
+        users.add({'id': 2, 'name': 'New'}, overwrite=True)
+        users.add({'id': 3, 'name': 'Back'})
+        with self.assertRaises(SegmentError):
+            tracker.checkpoint()
+        tracker.rollback(checkpoint, 'id')
+        with self.assertRaises(SegmentError):
+            tracker.commit(checkpoint)
+
+        with self.assertRaises(ConnectionError):
+            manager.export_segment('users', driver, incremental=True)
+        self.assertIsNone(tracker.in_flight)
+        self.assertEqual(tracker.pending, 3)
+
+        manager.export_segment('users', driver, incremental=True)
+        self.assertEqual(driver.exported[-1], [(1, 'A'), (2, 'New'), (3, 'Back')])
+        ## Key 3 was added back, so its removal is never exported
+        self.assertEqual(driver.deleted, [])
+        self.assertEqual(tracker.last_checkpoint.id, 3)
+
+    def test_sharded(self):
+        users = ShardedSegment('users', UserModel, shards=4)
+        tracker = users.track_changes()
+        users.add_many([{'id': i, 'name': str(i)} for i in range(20)])
+        users.remove(5)
+        self.assertEqual(tracker.pending, 20)
+
+        checkpoint = tracker.checkpoint()
+        self.assertEqual(sorted(i.id for i in checkpoint.upserts), [i for i in range(20) if i != 5])
+        self.assertEqual(checkpoint.deletes, [5])
+
+    def test_sqlite(self):
+        with TemporaryDirectory() as tmp:
+            database = path.join(tmp, 'users.db')
+            with connect(database) as conn:
+                conn.execute('CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT)')
+                conn.executemany('INSERT INTO users VALUES (?, ?)', [(i, f'User {i}') for i in range(5)])
+            conn.close()
+
+            driver = SQLiteDriver(database, models={'users': UserModel})
+            manager = Manager(['users'], {'users': UserModel})
+            manager['users'].track_changes()
+            manager.populate_using_driver('users', driver)
+            manager['users'].add({'id': 1, 'name': 'Changed'}, overwrite=True)
+            manager['users'].remove(4)
+            manager.export_segment('users', driver, incremental=True)
+            driver.close()
+
+            with connect(database) as conn:
+                rows = conn.execute('SELECT id, name FROM users ORDER BY id').fetchall()
+            conn.close()
+            self.assertEqual(rows, [(0, 'User 0'), (1, 'Changed'), (2, 'User 2'), (3, 'User 3')])
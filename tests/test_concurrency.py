@@ -0,0 +1,121 @@
+from ezycore import ConcurrentSegment
+from ezycore.manager import RWLock, LFUPolicy
+from ezycore.models import Model, Config
+from random import Random
+from threading import Thread
+import unittest
+
+
+class CounterModel(Model):
+    id: int
+    value: int
+
+    _config: Config = {'search_by': 'id'}
+
+
+class LimitedCounterModel(Model):
+    id: int
+    value: int
+
+    _config: Config = {'search_by': 'id', 'invalidate_after': 2}
+
+
+def run_threads(target, n: int = 8) -> list:
+    errors = list()
+
+    def wrapper(i: int) -> None:
+        try:
+            target(i)
+        except Exception as err:
+            errors.append(err)
+
+    threads = [Thread(target=wrapper, args=(i,)) for i in range(n)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return errors
+
+
+class TestConcurrentSegment(unittest.TestCase):
+    def test_buffered_recency(self):
+        seg = ConcurrentSegment('counters', CounterModel, max_size=3, buffer_size=4)
+        for i in range(3):
+            seg.add({'id': i, 'value': i})
+
+        self.assertEqual(seg.get(0).value, 0)
+        ## Hit is only applied once buffer fills up or before a write
+        self.assertEqual(seg.stats(0).fetches, 0)
+        self.assertEqual(seg.last().id, 0)
+
+        seg.add({'id': 3, 'value': 3})
+        self.assertEqual(seg.stats(0).fetches, 1)
+        self.assertIsNone(seg.get(1, default=None))
+        self.assertEqual([i.id for i in seg.newest()], [3, 0, 2])
+
+        for _ in range(4):
+            seg.get(2)
+        self.assertEqual(seg.first().id, 2)
+        self.assertEqual(seg.get_many([2, 3], 'value'), [{'value': 2}, {'value': 3}])
+
+    def test_exact_fetch_counts(self):
+        seg = ConcurrentSegment('counters', LimitedCounterModel)
+        seg.add({'id': 0, 'value': 0})
+        seg.get(0)
+        seg.get(0)
+        self.assertIsNone(seg.get(0, default=None))
+
+    def test_stress(self):
+        seg = ConcurrentSegment('counters', CounterModel, max_size=200, policy=LFUPolicy(), buffer_size=16)
+        seg.add_many({'id': i, 'value': i} for i in range(200))
+
+        def work(seed: int) -> None:
+            rng = Random(seed)
+            for _ in range(2000):
+                key = rng.randrange(400)
+                op = rng.random()
+                if op < 0.7:
+                    obj = seg.get(key, default=None)
+                    assert obj is None or obj.value == obj.id
+                elif op < 0.85:
+                    seg.add({'id': key, 'value': key}, overwrite=True)
+                elif op < 0.95:
+                    seg.remove(key, None)
+                else:
+                    assert all(i.value == i.id for i in seg.search(lambda i: i.id % 7 == 0))
+            for obj in seg:
+                assert obj.value == obj.id
+
+        self.assertEqual(run_threads(work), [])
+        seg.drain()
+        self.assertLessEqual(seg.size(), 200)
+        self.assertEqual(sorted(seg.keys()), sorted(i.id for i in seg.values()))
+        for key in seg.keys():
+            seg.stats(key)
+
+    def test_rwlock(self):
+        lock = RWLock()
+        with lock.read():
+            with lock.read():
+                self.assertEqual(lock.readers, 1)
+            self.assertFalse(lock.acquire_write(blocking=False))
+            self.assertRaises(RuntimeError, lock.acquire_write)
+
+        with lock:
+            with lock.read():
+                with lock.write():
+                    pass
+        self.assertEqual(lock.readers, 0)
+
+        counter = [0]
+
+        def work(_: int) -> None:
+            for _ in range(500):
+                with lock:
+                    value = counter[0]
+                    counter[0] = value + 1
+                with lock.read():
+                    assert counter[0] >= value
+
+        self.assertEqual(run_threads(work), [])
+        self.assertEqual(counter[0], 4000)
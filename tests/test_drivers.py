@@ -0,0 +1,352 @@
+from ezycore import ConcurrentSegment, Driver, Manager, Segment, SQLiteDriver
+from ezycore.models import Model, Config
+from concurrent.futures import ThreadPoolExecutor
+from tempfile import TemporaryDirectory
+from types import GeneratorType
+from itertools import chain
+from sqlite3 import OperationalError, connect
+from os import path
+import unittest
+
+
+class UserModel(Model):
+    id: int
+    name: str
+
+    _config: Config = {'search_by': 'id'}
+
+
+class AgedUserModel(UserModel):
+    age: int = 0
+
+
+class RecordingSegment(Segment):
+    def add_many(self, objs, **kwds) -> None:
+        objs = tuple(objs)
+        self.chunks.append(len(objs))
+        super().add_many(objs, **kwds)
+
+
+def make_driver(rows: int = 25, **kwds) -> SQLiteDriver:
+    driver = SQLiteDriver(':memory:', models={'users': UserModel}, **kwds)
+    with driver._SQLiteDriver__connection as conn:
+        conn.execute('CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT)')
+        conn.executemany('INSERT INTO users VALUES (?, ?)', [(i, f'User {i}') for i in range(rows)])
+    driver._read_heads()
+    return driver
+
+
+class TestSQLiteDriver(unittest.TestCase):
+    def test_streaming_fetch(self):
+        driver = make_driver(chunk_size=4)
+        rows = driver.fetch('users', 'id < 10')
+        self.assertIsInstance(rows, GeneratorType)
+        self.assertEqual([next(rows).id for _ in range(5)], [0, 1, 2, 3, 4])
+
+        ## Other calls don't disturb a fetch being consumed
+        self.assertEqual(driver.fetch_one('users', 'id = 20').name, 'User 20')
+        self.assertEqual(sum(1 for _ in driver.fetch('users', chunk_size=7)), 25)
+        self.assertEqual([i.id for i in rows], [5, 6, 7, 8, 9])
+
+        self.assertIsNone(driver.fetch('users', 'id > 100'))
+        self.assertEqual(list(driver.fetch('users', 'id < 2', no_handle=True)), [(0, 'User 0'), (1, 'User 1')])
+        self.assertEqual(next(driver.fetch('users', ignore_model=True)), {'id': 0, 'name': 'User 0'})
+
+    def test_populate_in_chunks(self):
+        driver = make_driver(rows=25, chunk_size=3)
+        segment = RecordingSegment('users', UserModel)
+        segment.chunks = list()
+        manager = Manager([segment], {'users': UserModel})
+        manager._POPULATE_CHUNK = 10
+
+        manager.populate_using_driver('users', driver)
+        self.assertEqual(segment.chunks, [10, 10, 5])
+        self.assertEqual(segment.size(), 25)
+
+        manager.populate_using_driver('users', driver, condition='id > 100')
+        self.assertEqual(len(segment.chunks), 3)
+
+    def test_fetch_many_by_keys(self):
+        driver = make_driver(rows=50)
+        driver._KEY_BATCH = 4
+        keys = [3, 1, 7, 1, 100, 12, 40, 9]
+        self.assertEqual(sorted(i.id for i in driver.fetch_many_by_keys('users', keys)), [1, 3, 7, 9, 12, 40])
+        self.assertEqual(sorted(driver.fetch_many_by_keys('users', [2, 5], no_handle=True)), [(2, 'User 2'), (5, 'User 5')])
+        self.assertEqual(list(driver.fetch_many_by_keys('users', ['User 4'], key='name', ignore_model=True)),
+                         [{'id': 4, 'name': 'User 4'}])
+        self.assertEqual(list(driver.fetch_many_by_keys('users', [])), [])
+
+        ## Large key lists go through a temporary table
+        driver._KEY_TABLE_THRESHOLD = 5
+        rows = driver.fetch_many_by_keys('users', range(0, 60, 2))
+        self.assertEqual(next(rows).id % 2, 0)
+        self.assertEqual(len(list(rows)), 24)
+        connection = driver._SQLiteDriver__connection
+        self.assertFalse(connection.in_transaction)
+        self.assertEqual(connection.execute('SELECT count(*) FROM temp."_ezycore_keys_1"').fetchone(), (0,))
+
+        ## Tables are reused once done, overlapping fetches use their own
+        first, second = driver.fetch_many_by_keys('users', range(10)), driver.fetch_many_by_keys('users', range(10, 20))
+        heads = [next(first).id, next(second).id]
+        self.assertEqual(sorted(chain(heads, (i.id for i in chain(first, second)))), list(range(20)))
+        self.assertEqual(connection.execute("SELECT count(*) FROM sqlite_temp_master").fetchone(), (2,))
+
+    def test_default_fetch_many_by_keys(self):
+        driver = make_driver(rows=10)
+        ## The base implementation falls back to fetch_one per key
+        rows = Driver.fetch_many_by_keys(driver, 'users', [1, 20, 4], UserModel)
+        self.assertEqual([i.id for i in rows], [1, 4])
+
+    def test_threaded(self):
+        with TemporaryDirectory() as tmp:
+            database = path.join(tmp, 'users.db')
+            with connect(database) as conn:
+                conn.execute('CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT)')
+                conn.executemany('INSERT INTO users VALUES (?, ?)', [(i, f'User {i}') for i in range(100)])
+            conn.close()
+
+            driver = SQLiteDriver(database, models={'users': UserModel}, threaded=True, read_only=True,
+                                  journal_mode='wal', synchronous='normal', cache_size=-4096)
+            self.assertTrue(driver.threaded)
+            connection = driver._SQLiteDriver__connection
+            self.assertEqual(connection.execute('PRAGMA journal_mode').fetchone(), ('wal',))
+            self.assertEqual(connection.execute('PRAGMA synchronous').fetchone(), (1,))
+            self.assertEqual(connection.execute('PRAGMA cache_size').fetchone(), (-4096,))
+
+            ## Fetches can't write
+            with self.assertRaises(OperationalError):
+                driver.fetch('users', raw='DELETE FROM users')
+
+            segment = ConcurrentSegment('users', UserModel)
+            manager = Manager([segment], {'users': UserModel})
+            with ThreadPoolExecutor(4) as pool:
+                conns = set(pool.map(lambda _: id(driver._SQLiteDriver__connection), range(16)))
+                ranges = [f'id >= {i} AND id < {i + 25}' for i in range(0, 100, 25)]
+                list(pool.map(lambda c: manager.populate_using_driver('users', driver, condition=c), ranges))
+            self.assertGreater(len(conns), 1)
+            self.assertNotIn(id(connection), conns)
+            self.assertEqual(segment.size(), 100)
+
+            ## Exports commit, other writes are committed by the thread which made them
+            driver.export('users', [UserModel(id=100, name='New')])
+            self.assertEqual(driver.fetch_one('users', 'id = 100').name, 'New')
+            driver.delete('users', [100])
+            self.assertIsNotNone(driver.fetch_one('users', 'id = 100'))
+            driver.commit()
+            self.assertIsNone(driver.fetch_one('users', 'id = 100'))
+            driver.close()
+
+        with self.assertRaises(AssertionError):
+            SQLiteDriver(':memory:', threaded=True)
+
+    def test_chunked_export(self):
+        driver = make_driver(rows=0, chunk_size=4)
+        connection = driver._SQLiteDriver__connection
+        ## Model fields are ordered differently to the table's columns
+        connection.execute('CREATE TABLE names (name TEXT, id INTEGER PRIMARY KEY)')
+        driver._read_heads()
+        driver._SQLiteDriver__models['names'] = UserModel
+
+        stats = driver.export('names', (UserModel(id=i, name=f'User {i}') for i in range(10)))
+        self.assertEqual((stats.rows, stats.chunks), (10, 3))
+        self.assertGreaterEqual(stats.seconds, 0)
+        self.assertFalse(connection.in_transaction)
+        self.assertEqual(connection.execute('SELECT name, id FROM names WHERE id = 3').fetchone(), ('User 3', 3))
+
+        stats = driver.export('names', [{'id': 3, 'name': 'Changed'}], chunk_size=100)
+        self.assertEqual((stats.rows, stats.chunks), (1, 1))
+        self.assertEqual(driver.fetch_one('names', 'id = 3').name, 'Changed')
+
+        ## A failing chunk isn't written, earlier chunks stay committed
+        rows = [UserModel(id=20 + i, name='x') for i in range(6)] + [{'id': 'bad', 'name': 'x'}]
+        with self.assertRaises(Exception):
+            driver.export('names', rows)
+        self.assertFalse(connection.in_transaction)
+        self.assertEqual(connection.execute('SELECT count(*) FROM names WHERE id >= 20').fetchone(), (4,))
+
+        ## Writes join a transaction which is already open
+        driver.delete('names', [0])
+        driver.export('names', [UserModel(id=50, name='y')])
+        self.assertTrue(connection.in_transaction)
+        connection.rollback()
+        self.assertEqual(connection.execute('SELECT count(*) FROM names WHERE id IN (0, 50)').fetchone(), (1,))
+
+    def test_lazy_schema(self):
+        driver = SQLiteDriver(':memory:', models={'users': UserModel, 'people': AgedUserModel})
+        connection = driver._SQLiteDriver__connection
+        connection.execute('CREATE TABLE users (id INTEGER PRIMARY KEY)')
+        connection.execute('INSERT INTO users VALUES (1)')
+        self.assertEqual(driver._SQLiteDriver__headers, {})
+
+        self.assertEqual(driver._columns('users'), ('id',))
+        self.assertEqual(next(driver.fetch('users', ignore_model=True)), {'id': 1})
+
+        ## Cached columns are only checked against the schema when they look stale
+        statements = list()
+        connection.set_trace_callback(statements.append)
+        self.assertEqual(driver.fetch_one('users', 'id = 1', ignore_model=True), {'id': 1})
+        self.assertFalse([i for i in statements if 'schema_version' in i])
+
+        ## Migrations are picked up without recreating the driver
+        connection.execute("ALTER TABLE users ADD COLUMN name TEXT DEFAULT 'User'")
+        self.assertEqual(driver._columns('users'), ('id',))
+        self.assertEqual(driver.fetch_one('users', 'id = 1').name, 'User')
+        self.assertEqual(driver._columns('users'), ('id', 'name'))
+
+        ## Statements failing on dropped columns are rebuilt once
+        connection.execute('ALTER TABLE users ADD COLUMN age INTEGER')
+        driver._schema_changed()
+        self.assertEqual(driver._columns('users'), ('id', 'name', 'age'))
+        connection.execute('ALTER TABLE users DROP COLUMN age')
+        self.assertEqual(list(driver.fetch('users', ignore_model=True)), [{'id': 1, 'name': 'User'}])
+        self.assertEqual(driver.fetch_one('users', 'id = 1', ignore_model=True), {'id': 1, 'name': 'User'})
+        stats = driver.export('users', [UserModel(id=2, name='B')])
+        self.assertEqual(stats.rows, 1)
+
+        ## Inserts naming dropped columns are rebuilt once
+        connection.execute('CREATE TABLE people (id INTEGER PRIMARY KEY, name TEXT, age INTEGER)')
+        self.assertEqual(driver.export('people', [AgedUserModel(id=1, name='A', age=30)]).rows, 1)
+        connection.execute('ALTER TABLE people DROP COLUMN age')
+        self.assertEqual(driver.export('people', [AgedUserModel(id=2, name='B', age=40)]).rows, 1)
+        self.assertEqual(connection.execute('SELECT * FROM people').fetchall(), [(1, 'A'), (2, 'B')])
+
+        ## Streams of keys can't change columns once started, the error is raised and later calls see the new schema
+        connection.execute('ALTER TABLE users ADD COLUMN age INTEGER')
+        driver._schema_changed()
+        driver._columns('users')
+        connection.execute('ALTER TABLE users DROP COLUMN age')
+        with self.assertRaises(OperationalError):
+            list(driver.fetch_many_by_keys('users', [1, 2], ignore_model=True))
+        self.assertEqual(len(list(driver.fetch_many_by_keys('users', [1, 2], ignore_model=True))), 2)
+        connection.set_trace_callback(None)
+
+        with self.assertRaises(AssertionError):
+            driver._columns('missing')
+
+    def test_trusted_rows(self):
+        driver = make_driver(rows=5)
+        validated = driver.fetch_one('users', 'id = 3')
+        trusted = driver.fetch_one('users', 'id = 3', trusted=True)
+        self.assertIs(type(trusted), UserModel)
+        self.assertEqual(trusted, validated)
+        self.assertEqual(trusted.__fields_set__, {'id', 'name'})
+        self.assertEqual([i.id for i in driver.fetch('users', 'id < 3', trusted=True)], [0, 1, 2])
+
+        ## Trusted rows skip validation
+        connection = driver._SQLiteDriver__connection
+        connection.execute("INSERT INTO users VALUES (7, X'41')")
+        self.assertEqual(driver.fetch_one('users', 'id = 7').name, 'A')
+        self.assertEqual(driver.fetch_one('users', 'id = 7', trusted=True).name, b'A')
+
+        class DefaultModel(Model):
+            id: int
+            name: str
+            tags: list = []
+
+            _config: Config = {'search_by': 'id'}
+
+        ## Fields missing from the table use their defaults, not shared between rows
+        connection.execute('CREATE TABLE tagged AS SELECT * FROM users')
+        first, second = driver.fetch_many_by_keys('tagged', [1, 2], DefaultModel, trusted=True)
+        self.assertEqual(first.tags, [])
+        self.assertIsNot(first.tags, second.tags)
+
+        ## Columns which aren't fields fall back to validation
+        connection.execute('CREATE TABLE extra (id INTEGER PRIMARY KEY, name TEXT, other TEXT)')
+        connection.execute("INSERT INTO extra VALUES ('1', 'x', 'y')")
+        self.assertEqual(driver.fetch_one('extra', model=UserModel, trusted=True).id, 1)
+        self.assertEqual(SQLiteDriver(':memory:', trusted=True)._SQLiteDriver__trusted, True)
+
+    def test_projection_and_deferred(self):
+        class PostModel(Model):
+            id: int
+            title: str
+            body: bytes
+
+            _config: Config = {'search_by': 'id', 'deferred': {'body'}}
+
+        driver = SQLiteDriver(':memory:', models={'posts': PostModel})
+        connection = driver._SQLiteDriver__connection
+        connection.execute('CREATE TABLE posts (id INTEGER PRIMARY KEY, title TEXT, body BLOB, views INTEGER)')
+        connection.executemany('INSERT INTO posts VALUES (?, ?, ?, 0)', [(i, f'Post {i}', b'x' * 1000) for i in range(5)])
+        statements = list()
+        connection.set_trace_callback(statements.append)
+
+        posts = list(driver.fetch('posts'))
+        self.assertTrue(any('SELECT "posts"."id","posts"."title" FROM posts' in i for i in statements))
+        self.assertEqual(posts[0].__dict__, {'id': 0, 'title': 'Post 0'})
+
+        ## Deferred fields load once on first access, only for the row accessed
+        statements.clear()
+        self.assertEqual(posts[1].body, b'x' * 1000)
+        self.assertEqual(posts[1].body, b'x' * 1000)
+        self.assertEqual(posts[2].dict(exclude={'body'}), {'id': 2, 'title': 'Post 2'})
+        self.assertNotIn('body', posts[2].__dict__)
+        self.assertEqual(posts[2].dict()['body'], b'x' * 1000)
+        self.assertEqual(dict(posts[3])['body'], b'x' * 1000)
+        self.assertEqual([i for i in statements if '"body"' in i],
+                         [f'SELECT "posts"."body" FROM posts WHERE "id" = {i}' for i in (1, 2, 3)])
+
+        ## Segments only load what's requested
+        manager = Manager(['posts'], {'posts': PostModel})
+        manager.populate_using_driver('posts', driver)
+        self.assertEqual(manager['posts'].get(4, 'title'), {'title': 'Post 4'})
+        self.assertNotIn('body', manager['posts'].get(4).__dict__)
+        self.assertEqual(manager['posts'].get(4, 'body'), {'body': b'x' * 1000})
+
+        ## Explicit projections, unselected fields of the model are loaded lazily too
+        post = driver.fetch_one('posts', 'id = 1', columns=['id'], trusted=True)
+        self.assertEqual(post.__dict__, {'id': 1})
+        self.assertEqual(post.title, 'Post 1')
+        self.assertEqual(list(driver.fetch('posts', 'id < 2', columns=['title', 'views'], ignore_model=True)),
+                         [{'title': 'Post 0', 'views': 0}, {'title': 'Post 1', 'views': 0}])
+        self.assertEqual(next(driver.fetch_many_by_keys('posts', [3], columns=['id', 'title'])).body, b'x' * 1000)
+        with self.assertRaises(AssertionError):
+            driver.fetch_one('posts', columns=['title'])
+        with self.assertRaises(AssertionError):
+            driver.fetch_one('posts', columns=['missing'])
+
+        ## Rows removed before being loaded
+        post = driver.fetch_one('posts', 'id = 0')
+        connection.execute('DELETE FROM posts WHERE id = 0')
+        with self.assertRaises(LookupError):
+            post.body
+
+        with self.assertRaises(ValueError):
+            class BadModel(Model):
+                id: int
+
+                _config: Config = {'search_by': 'id', 'deferred': {'id'}}
+
+    def test_deferred_rows(self):
+        class PostModel(Model):
+            id: int
+            title: str
+            body: bytes
+            notes: str
+
+            _config: Config = {'search_by': 'id', 'deferred': {'body', 'notes'}}
+
+        driver = SQLiteDriver(':memory:', models={'posts': PostModel})
+        connection = driver._SQLiteDriver__connection
+        connection.execute('CREATE TABLE posts (id INTEGER PRIMARY KEY, title TEXT, body BLOB, notes TEXT)')
+        connection.executemany('INSERT INTO posts VALUES (?, ?, ?, ?)', [(i, f'Post {i}', b'x' * i, str(i)) for i in range(12)])
+        statements = list()
+        connection.set_trace_callback(statements.append)
+
+        posts = list(driver.fetch('posts'))
+        statements.clear()
+
+        ## Every deferred field of a row is read by one query, rows which aren't accessed aren't read
+        self.assertEqual((posts[0].body, posts[0].notes), (b'', '0'))
+        self.assertEqual(statements, ['SELECT "posts"."body","posts"."notes" FROM posts WHERE "id" = 0'])
+        self.assertEqual([i.notes for i in posts[5:8]], ['5', '6', '7'])
+        self.assertEqual(len(statements), 4)
+        self.assertEqual([len(i.__dict__) for i in posts[1:5]], [2] * 4)
+
+        ## Fields set since fetching aren't replaced
+        post = driver.fetch_one('posts', 'id = 1')
+        post.notes = 'changed'
+        self.assertEqual(post.body, b'x')
+        self.assertEqual(post.notes, 'changed')
+        connection.set_trace_callback(None)
@@ -0,0 +1,139 @@
+from ezycore import AsyncSegment, ConcurrentSegment, Segment, ShardedSegment, SQLiteDriver
+from ezycore.manager import SingleFlight
+from ezycore.models import Model, Config
+from ezycore.exceptions import SegmentError
+from tempfile import TemporaryDirectory
+from sqlite3 import connect
+from os import path
+from threading import Barrier, Thread
+from asyncio import gather, sleep as async_sleep
+from time import sleep
+import unittest
+
+
+class UserModel(Model):
+    id: int
+    name: str
+
+    _config: Config = {'search_by': 'id'}
+
+
+class CountingLoader:
+    def __init__(self, delay: float = 0) -> None:
+        self.calls = list()
+        self.delay = delay
+
+    def __call__(self, key: int):
+        self.calls.append(key)
+        sleep(self.delay)
+        return {'id': key, 'name': f'User {key}'} if key < 100 else None
+
+
+class TestLoaders(unittest.TestCase):
+    def test_read_through(self):
+        loader = CountingLoader()
+        seg = Segment('users', UserModel, max_size=5)
+        seg.set_loader(loader)
+
+        self.assertEqual(seg.get(1).name, 'User 1')
+        self.assertEqual(seg.get(1, 'name'), {'name': 'User 1'})
+        self.assertEqual(loader.calls, [1])
+
+        self.assertIsNone(seg.get(100, default=None))
+        self.assertRaises(ValueError, seg.get, 100)
+        self.assertRaises(ValueError, seg.get, 2, load=False)
+
+        self.assertEqual([i.id for i in seg.get_many([1, 2, 3])], [1, 2, 3])
+        self.assertEqual(seg.get_many([4, 100], default=None)[1], None)
+        self.assertEqual(loader.calls, [1, 100, 100, 2, 3, 4, 100])
+
+        seg.set_loader(None)
+        self.assertRaises(ValueError, seg.get, 50)
+
+    def test_driver_loader(self):
+        driver = SQLiteDriver(':memory:', models={'users': UserModel}, check_same_thread=False)
+        with driver._SQLiteDriver__connection as conn:
+            conn.execute('CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT)')
+            conn.executemany('INSERT INTO users VALUES (?, ?)', [(i, f'User {i}') for i in range(10)])
+        driver._read_heads()
+
+        for seg in (Segment('users', UserModel), ShardedSegment('accounts', UserModel, shards=2)):
+            seg.set_loader(driver, location='users')
+            self.assertEqual(seg.get(3).name, 'User 3')
+            self.assertEqual(seg.size(), 1)
+            self.assertIsNone(seg.get(30, default=None))
+
+    def test_worker_thread_misses(self):
+        with TemporaryDirectory() as tmp:
+            database = path.join(tmp, 'users.db')
+            with connect(database) as conn:
+                conn.execute('CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT)')
+                conn.executemany('INSERT INTO users VALUES (?, ?)', [(i, f'User {i}') for i in range(10)])
+            conn.close()
+
+            ## A connection bound to this thread would fail on the worker thread
+            bound = SQLiteDriver(database, models={'users': UserModel})
+            self.assertTrue(bound.thread_bound)
+            for seg in (ConcurrentSegment('users', UserModel), ShardedSegment('users', UserModel, shards=2)):
+                self.assertRaises(SegmentError, seg.set_loader, bound)
+            bound.close()
+
+            for driver in (SQLiteDriver(database, models={'users': UserModel}, threaded=True),
+                           SQLiteDriver(database, models={'users': UserModel}, check_same_thread=False)):
+                for seg in (ConcurrentSegment('users', UserModel), ShardedSegment('users', UserModel, shards=2)):
+                    seg.set_loader(driver)
+                    results = list()
+                    worker = Thread(target=lambda: results.append(seg.get(3).name))
+                    worker.start()
+                    worker.join()
+                    self.assertEqual(results, ['User 3'])
+                driver.close()
+
+    def test_single_flight_threads(self):
+        loader = CountingLoader(delay=0.05)
+        seg = ConcurrentSegment('users', UserModel)
+        seg.set_loader(loader)
+
+        barrier = Barrier(8)
+        results = list()
+
+        def work() -> None:
+            barrier.wait()
+            results.append(seg.get(7).name)
+
+        threads = [Thread(target=work) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results, ['User 7'] * 8)
+        self.assertEqual(loader.calls, [7])
+
+    def test_single_flight_errors(self):
+        flights = SingleFlight()
+
+        def fail() -> None:
+            raise RuntimeError('Backend down')
+
+        self.assertRaises(RuntimeError, flights.do, 1, fail)
+        self.assertEqual(len(flights), 0)
+        self.assertEqual(flights.do(1, lambda: 5), 5)
+
+
+class TestAsyncLoaders(unittest.IsolatedAsyncioTestCase):
+    async def test_single_flight(self):
+        calls = list()
+
+        async def load(key: int):
+            calls.append(key)
+            await async_sleep(0.02)
+            return UserModel(id=key, name=f'User {key}')
+
+        users = AsyncSegment(Segment('users', UserModel), loader=load)
+        results = await gather(*(users.get_or_load(i % 2) for i in range(10)))
+
+        self.assertEqual([i.id for i in results], [i % 2 for i in range(10)])
+        self.assertEqual(sorted(calls), [0, 1])
+        self.assertEqual((await users.get_or_load(1)).name, 'User 1')
+        self.assertEqual(len(calls), 2)
@@ -1,6 +1,6 @@
 ## Crucial tests for main 
 from ezycore import Manager, Segment
-from ezycore.models import Model, Config
+from ezycore.models import Model, Config, PartialRef
 from ezycore.exceptions import SegmentError
 from typing import Union
 import unittest
@@ -21,6 +21,20 @@ class AlternateTestModel(Model):
     _config: Config = {'search_by': 'field_1'}
 
 
+class UserModel(Model):
+    id: int
+    username: str
+
+    _config: Config = {'search_by': 'id'}
+
+
+class TokenModel(Model):
+    id: int
+    owner: PartialRef[UserModel]
+
+    _config: Config = {'search_by': 'id', 'partials': {'owner': 'users'}}
+
+
 class TestManager(unittest.TestCase):
     def setUp(self) -> None:
         self.manager = Manager(locations=['test'], models={'test': BasicTestModel})
@@ -109,3 +123,28 @@ def test_methods(self):
         ## Enter exit
         with self.manager as M:
             self.assertEqual(M, self.manager, 'Failed __enter__')
+
+    def test_partials(self):
+        manager = Manager(locations=['users', 'tokens'], models={'users': UserModel, 'tokens': TokenModel})
+        manager.populate('users', data=[{'id': i, 'username': f'User {i}'} for i in range(3)])
+        manager.populate('tokens', data=[{'id': i, 'owner': i % 2} for i in range(4)] + [{'id': 4, 'owner': 10}])
+
+        users, tokens = manager['users'], manager['tokens']
+        self.assertEqual(users.first().id, 2)
+
+        self.assertEqual(tokens.get(1).owner, UserModel(id=1, username='User 1'))
+        self.assertEqual(tokens.get(1, 'owner'), {'owner': {'id': 1, 'username': 'User 1'}})
+        self.assertEqual(tokens.get(4).owner, 10)
+
+        ## Stored entries stay untouched, referenced segment recency isn't updated
+        self.assertEqual(tokens._Segment__data[1].owner, 1)
+        self.assertEqual(users.first().id, 2)
+        self.assertEqual(users.stats(1).fetches, 0)
+
+        self.assertEqual([i.owner.id for i in tokens.get_many([0, 1, 2])], [0, 1, 0])
+        self.assertEqual([i.id for i in tokens.search(lambda m: getattr(m.owner, 'username', None) == 'User 0')], [0, 2])
+        self.assertEqual([i.id for i in tokens.newest(limit=2)], [2, 1])
+        self.assertEqual([i.owner.id for i in tokens.newest(limit=2)], [0, 1])
+
+        users.update(1, username='Bar')
+        self.assertEqual(tokens.get(1).owner.username, 'Bar')
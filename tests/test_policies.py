@@ -0,0 +1,90 @@
+from ezycore import Segment
+from ezycore.manager import ARCPolicy, FIFOPolicy, LFUPolicy, LRUPolicy, TinyLFUPolicy
+from ezycore.models import Model, Config
+from ezycore.exceptions import SegmentError
+import unittest
+
+
+class BasicTestModel(Model):
+    field_1: int
+
+    _config: Config = {'search_by': 'field_1'}
+
+
+class TestPolicies(unittest.TestCase):
+    def make(self, policy, size: int = 3) -> Segment:
+        return Segment(name='Test', model=BasicTestModel, max_size=size, policy=policy)
+
+    def fill(self, segment: Segment, *keys) -> None:
+        for k in keys:
+            segment.add({'field_1': k})
+
+    def test_invalid_policy(self):
+        with self.assertRaises(SegmentError):
+            Segment('Test', BasicTestModel, policy='lru')
+
+    def test_lru(self):
+        seg = self.make(LRUPolicy())
+        self.fill(seg, 0, 1, 2)
+        seg.get(0)
+        self.fill(seg, 3)
+        self.assertEqual(sorted(seg.keys()), [0, 2, 3])
+
+    def test_fifo(self):
+        seg = self.make(FIFOPolicy())
+        self.fill(seg, 0, 1, 2)
+        seg.get(0)
+        self.fill(seg, 3)
+        self.assertEqual(sorted(seg.keys()), [1, 2, 3])
+
+    def test_lfu(self):
+        seg = self.make(LFUPolicy())
+        self.fill(seg, 0, 1, 2)
+        for _ in range(3):
+            seg.get(0)
+        seg.get(1)
+        self.fill(seg, 3)
+        self.assertEqual(sorted(seg.keys()), [0, 1, 3])
+        self.assertEqual(seg.policy.frequency(0), 4)
+
+        seg.remove(1)
+        self.fill(seg, 4, 5)
+        self.assertEqual(sorted(seg.keys()), [0, 4, 5])
+
+    def test_arc_resists_scans(self):
+        seg = self.make(ARCPolicy(), size=4)
+        self.fill(seg, 0, 1)
+        for _ in range(2):
+            seg.get(0)
+            seg.get(1)
+
+        ## One-off scan shouldn't flush frequently used keys
+        self.fill(seg, *range(100, 120))
+        self.assertIn(0, seg.keys())
+        self.assertIn(1, seg.keys())
+        self.assertEqual(seg.size(), 4)
+
+    def test_tinylfu_admission(self):
+        seg = self.make(TinyLFUPolicy(), size=10)
+        self.fill(seg, *range(10))
+        for _ in range(5):
+            for k in range(5):
+                seg.get(k)
+
+        self.fill(seg, *range(100, 150))
+        self.assertTrue(set(range(5)).issubset(seg.keys()))
+        self.assertEqual(seg.size(), 10)
+
+    def test_policy_tracks_segment(self):
+        for policy in (LRUPolicy(), FIFOPolicy(), LFUPolicy(), ARCPolicy(), TinyLFUPolicy()):
+            seg = self.make(policy, size=5)
+            for i in range(50):
+                seg.add({'field_1': i})
+                seg.get(i, default=None)
+                if i % 7 == 0:
+                    seg.remove(i, None)
+                self.assertLessEqual(seg.size(), 5, policy)
+
+            seg.clear()
+            self.fill(seg, 0, 1)
+            self.assertEqual(sorted(seg.keys()), [0, 1], policy)
@@ -0,0 +1,71 @@
+from ezycore import Segment
+from ezycore.manager.projection import ProjectionCache, ProjectionPlan
+from ezycore.models import Model, Config
+from pydantic import BaseModel
+from typing import List
+import unittest
+
+
+class Address(BaseModel):
+    city: str
+    street: str
+
+
+class UserModel(Model):
+    id: int
+    username: str
+    password: str
+    addresses: List[Address]
+
+    _config: Config = {'search_by': 'id', 'exclude': {'password'}}
+
+
+class NestedExcludeModel(Model):
+    id: int
+    address: Address
+
+    _config: Config = {'search_by': 'id', 'exclude': {'address': {'street'}}}
+
+
+USER = dict(id=1, username='Foo', password='Bar', addresses=[dict(city='A', street='B')])
+
+
+class TestProjection(unittest.TestCase):
+    def setUp(self) -> None:
+        self.segment = Segment('users', UserModel)
+        self.segment.add(USER)
+        self.model = UserModel(**USER)
+
+    def test_flags(self):
+        get = self.segment.get
+        self.assertEqual(get(1, 'id', 'username'), {'id': 1, 'username': 'Foo'})
+        self.assertEqual(get(1, 'id', 'password'), {'id': 1})
+        self.assertEqual(get(1), self.model.dict(exclude={'password'}))
+        self.assertEqual(get(1, '*'), self.model.dict())
+        self.assertEqual(get(1, 'addresses'), {'addresses': [{'city': 'A', 'street': 'B'}]})
+        self.assertEqual(get(1, ('addresses', {0: {'city'}})), {'addresses': [{'city': 'A'}]})
+        self.assertEqual(get(1, 'id', include={'username'}), {'username': 'Foo'})
+        self.assertEqual(get(1, exclude={'addresses'}), {'id': 1, 'username': 'Foo'})
+        self.assertEqual(get(1, exclude={'addresses': {0: {'street'}}}), 
+                         {'id': 1, 'username': 'Foo', 'addresses': [{'city': 'A'}]})
+
+    def test_nested_config_exclude(self):
+        segment = Segment('nested', NestedExcludeModel)
+        segment.add(dict(id=1, address=dict(city='A', street='B')))
+        self.assertEqual(segment.get(1), {'id': 1, 'address': {'city': 'A'}})
+
+    def test_plans(self):
+        self.assertTrue(ProjectionPlan.compile(Segment('x', NestedExcludeModel).model, (), {}).kwds)
+        self.assertEqual(ProjectionPlan.compile(UserModel, ('id', 'username'), {}).fields, ('id', 'username'))
+
+        cache = ProjectionCache(UserModel, max_size=2)
+        plan = cache.get(('id',), {})
+        self.assertIs(cache.get(('id',), {}), plan)
+        cache.get(('username',), {})
+        cache.get(('id',), {'exclude': {'password'}})
+        self.assertEqual(len(cache), 2)
+        self.assertIsNot(cache.get(('id',), {}), plan)
+
+        ## Unhashable flags are compiled without being cached
+        cache.get((('addresses', {0: True}),), {})
+        self.assertEqual(len(cache), 2)
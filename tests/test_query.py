@@ -0,0 +1,143 @@
+from ezycore import Segment, SQLiteDriver
+from ezycore.query import F, Query
+from ezycore.models import Model, Config
+from typing import Optional
+import unittest
+
+
+class TokenModel(Model):
+    id: int
+    owner: str
+    requests: int
+
+    _config: Config = {'search_by': 'id', 'indexes': {'owner': 'hash', 'requests': 'sorted'}}
+
+
+class PlainTokenModel(Model):
+    id: int
+    owner: str
+    requests: int
+
+    _config: Config = {'search_by': 'id'}
+
+
+ROWS = [
+    {'id': 0, 'owner': 'Foo', 'requests': 5},
+    {'id': 1, 'owner': 'Bar', 'requests': 50},
+    {'id': 2, 'owner': 'Foo', 'requests': 20},
+    {'id': 3, 'owner': 'Baz', 'requests': 80},
+    {'id': 4, 'owner': 'Foo', 'requests': 100},
+]
+
+class NullableModel(Model):
+    id: int
+    owner: Optional[str]
+    requests: Optional[int]
+
+    _config: Config = {'search_by': 'id', 'indexes': {'requests': 'sorted'}}
+
+
+NULL_ROWS = [
+    {'id': 0, 'owner': 'Foo', 'requests': 5},
+    {'id': 1, 'owner': None, 'requests': 50},
+    {'id': 2, 'owner': 'Bar', 'requests': None},
+    {'id': 3, 'owner': None, 'requests': None},
+]
+
+NULL_QUERIES = [
+    F('owner') != 'Foo',
+    ~(F('owner') == 'Foo'),
+    ~(F('requests') > 10),
+    ~F('owner').in_(['Foo']),
+    F('owner').in_(['Bar', None]),
+    ~F('owner').in_(['Bar', None]),
+    ~F('owner').startswith('F'),
+    (F('requests') < 100) | (F('owner') != 'Bar'),
+]
+
+QUERIES = [
+    (F('owner') == 'Foo', [0, 2, 4]),
+    ((F('owner') == 'Foo') & F('requests').between(10, 100), [2, 4]),
+    (F('owner').in_(['Bar', 'Baz']), [1, 3]),
+    (F('owner').startswith('Ba') & ~(F('requests') > 60), [1]),
+    ((F('requests') < 10) | (F('owner') == 'Baz'), [0, 3]),
+    (F('owner') != 'Foo', [1, 3]),
+]
+
+
+class TestQuery(unittest.TestCase):
+    def setUp(self) -> None:
+        self.indexed = Segment('tokens', TokenModel)
+        self.plain = Segment('tokens', PlainTokenModel)
+        for row in ROWS:
+            self.indexed.add(row)
+            self.plain.add(row)
+
+    def test_segment_query(self):
+        for expr, expected in QUERIES:
+            for seg in (self.indexed, self.plain):
+                self.assertEqual(sorted(i.id for i in seg.query(expr)), expected, (seg.model, expr))
+
+    def test_access_paths(self):
+        indexes = self.indexed.indexes
+        self.assertIsNone((F('id') == 1).access_path(indexes))
+        self.assertIsNone(((F('owner') == 'Foo') | (F('id') == 1)).access_path(indexes))
+
+        ## Most selective branch is chosen
+        cost, _ = ((F('owner') == 'Foo') & (F('requests') > 90)).access_path(indexes)
+        self.assertEqual(cost, 1)
+
+    def test_ordering(self):
+        for seg in (self.indexed, self.plain):
+            q = Query(F('owner') == 'Foo', order_by='requests', descending=True, limit=2)
+            self.assertEqual(seg.query(q, 'id'), [{'id': 4}, {'id': 2}])
+
+            q = Query(order_by='requests', limit=3)
+            self.assertEqual([i.id for i in seg.query(q)], [0, 2, 1])
+
+    def test_search_and_invalidate(self):
+        self.assertEqual(self.indexed.search(F('owner') == 'Bar', 'id'), [{'id': 1}])
+
+        removed = self.indexed.invalidate_all(F('requests') >= 50)
+        self.assertEqual(sorted(i.id for i in removed), [1, 3, 4])
+        self.assertEqual(self.indexed.query(F('requests') >= 50), [])
+
+    def test_sql_pushdown(self):
+        params = list()
+        sql = ((F('owner') == 'Foo') & F('owner').startswith('F') & (F('requests') == None)).to_sql(params)
+        self.assertEqual(sql, '("owner" = ? AND substr("owner", 1, ?) = ? AND "requests" IS NULL)')
+        self.assertEqual(params, ['Foo', 1, 'F'])
+
+        driver = SQLiteDriver(':memory:', models={'tokens': PlainTokenModel})
+        with driver._SQLiteDriver__connection as conn:
+            conn.execute('CREATE TABLE tokens (id INTEGER PRIMARY KEY, owner TEXT, requests INTEGER)')
+            conn.executemany('INSERT INTO tokens VALUES (?, ?, ?)', [tuple(r.values()) for r in ROWS])
+        driver._read_heads()
+
+        for expr, expected in QUERIES:
+            self.assertEqual(sorted(i.id for i in driver.fetch('tokens', expr) or ()), expected, expr)
+
+        q = Query(F('owner') == 'Foo', order_by='requests', descending=True, limit=2)
+        self.assertEqual([i.id for i in driver.fetch('tokens', q)], [4, 2])
+        self.assertEqual(driver.fetch_one('tokens', q).id, 4)
+        self.assertIsNone(driver.fetch('tokens', F('owner') == "'; DROP TABLE tokens; --"))
+
+    def test_null_parity(self):
+        segment = Segment('tokens', NullableModel)
+        segment.add_many(NULL_ROWS)
+        driver = SQLiteDriver(':memory:', models={'tokens': NullableModel})
+        with driver._SQLiteDriver__connection as conn:
+            conn.execute('CREATE TABLE tokens (id INTEGER PRIMARY KEY, owner TEXT, requests INTEGER)')
+            conn.executemany('INSERT INTO tokens VALUES (?, ?, ?)', [tuple(r.values()) for r in NULL_ROWS])
+
+        for expr in NULL_QUERIES:
+            cached = sorted(i.id for i in segment.query(expr))
+            self.assertEqual(sorted(i.id for i in driver.fetch('tokens', expr) or ()), cached, expr)
+
+        for descending in (False, True):
+            q = Query(order_by='requests', descending=descending)
+            fetched = [i.id for i in driver.fetch('tokens', q)]
+            self.assertEqual(fetched[:2], [i.id for i in segment.query(q)][:2])
+            self.assertEqual(fetched[:2], [1, 0] if descending else [0, 1])
+            ## NULLs come last in either direction
+            self.assertEqual(set(fetched[2:]), {2, 3})
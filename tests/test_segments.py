@@ -1,6 +1,9 @@
 from ezycore import Segment
 from ezycore.models import Model, Config
+from ezycore.exceptions import SegmentError
+from ezycore.manager.indexes import HashIndex, SortedIndex
 from pydantic import ValidationError
+from time import sleep
 import unittest
 
 class BasicTestModel(Model):
@@ -11,6 +14,26 @@ class BasicTestModel(Model):
     _config: Config = {'search_by': 'field_2'}
 
 
+class LimitedTestModel(Model):
+    field_1: int
+
+    _config: Config = {'search_by': 'field_1', 'invalidate_after': 2}
+
+
+class IndexedTestModel(Model):
+    id: int
+    owner: str
+    requests: int
+
+    _config: Config = {'search_by': 'id', 'indexes': {'owner': 'hash', 'requests': 'sorted'}}
+
+
+class ExpiringTestModel(Model):
+    field_1: int
+
+    _config: Config = {'search_by': 'field_1', 'ttl': 0.05}
+
+
 class TestSegments(unittest.TestCase):
     def setUp(self) -> None:
         self.segment = Segment(name='Test', model=BasicTestModel, max_size=10)
@@ -115,3 +138,168 @@ def test_segment_cache_invalidation(self):
             if i.field_2 % 2 != 0:
                 self.fail('Failed invalidate_all method')
                 return
+
+    def test_segment_recency(self):
+        for i in range(5):
+            self.segment.add(dict(field_1='Foo', field_2=i, field_3=False))
+
+        self.segment.get(0)
+        self.segment.get(2)
+        self.assertEqual(self.segment.first().field_2, 2)
+        self.assertEqual(self.segment.last().field_2, 1)
+
+        self.assertEqual([i.field_2 for i in self.segment.oldest()], [1, 3, 4, 0, 2])
+        self.assertEqual([i.field_2 for i in self.segment.newest(limit=2)], [2, 0])
+        self.assertEqual([i.field_2 for i in self.segment], [2, 0, 4, 3, 1])
+
+        self.segment.remove(4)
+        self.segment.add(dict(field_1='Bar', field_2=3, field_3=True), overwrite=True)
+        self.assertEqual([i.field_2 for i in self.segment], [3, 2, 0, 1])
+        self.assertEqual(self.segment.size(), 4)
+
+        self.segment.clear()
+
+    def test_segment_ttl(self):
+        segment = Segment(name='Expiring', model=ExpiringTestModel)
+        segment.add({'field_1': 0})
+        segment.add({'field_1': 1}, ttl=None)
+        segment.add({'field_1': 2}, ttl=10)
+        self.assertEqual(segment.get(0).field_1, 0)
+
+        sleep(0.06)
+        self.assertEqual(segment.get(0, default=None), None)
+        self.assertEqual(segment.get(1).field_1, 1)
+        self.assertEqual(sorted(segment.keys()), [1, 2])
+
+        segment.add({'field_1': 3})
+        segment.add({'field_1': 3}, overwrite=True, ttl=-1)
+        sleep(0.06)
+        self.assertEqual(segment.expire(), [])
+        self.assertEqual(sorted(segment.keys()), [1, 2, 3])
+
+    def test_segment_reaper(self):
+        segment = Segment(name='Expiring', model=ExpiringTestModel)
+        for i in range(5):
+            segment.add({'field_1': i})
+
+        segment.start_reaper(0.01)
+        try:
+            with self.assertRaises(SegmentError):
+                segment.start_reaper()
+            sleep(0.15)
+        finally:
+            segment.stop_reaper()
+        self.assertEqual(segment.size(), 0)
+
+    def test_segment_metadata(self):
+        segment = Segment(name='Limited', model=LimitedTestModel)
+        segment.add({'field_1': 0})
+        segment.add({'field_1': 1})
+
+        ## Fetches are counted per entry, not per model
+        segment.get(0)
+        segment.get(1)
+        self.assertEqual(segment.stats(0).fetches, 1)
+        self.assertFalse(segment._invalidated_last)
+
+        segment.get(0)
+        self.assertTrue(segment._invalidated_last)
+        self.assertEqual(list(segment.keys()), [1])
+
+        stats = segment.stats(1)
+        self.assertGreaterEqual(stats.accessed_at, stats.inserted_at)
+        self.assertIsNone(stats.expires_at)
+
+        segment.add({'field_1': 1}, overwrite=True, ttl=5)
+        self.assertEqual(segment.stats(1).fetches, 0)
+        self.assertIsNotNone(segment.stats(1).expires_at)
+        with self.assertRaises(KeyError):
+            segment.stats(0)
+
+    def test_segment_indexes(self):
+        segment = Segment(name='Indexed', model=IndexedTestModel, max_size=5)
+        self.assertIsInstance(segment.indexes['owner'], HashIndex)
+        self.assertIsInstance(segment.indexes['requests'], SortedIndex)
+
+        for i in range(5):
+            segment.add({'id': i, 'owner': 'Foo' if i % 2 else 'Bar', 'requests': i * 10})
+
+        self.assertEqual(segment.lookup('owner', 'Foo', 'id'), [{'id': 1}, {'id': 3}])
+        self.assertEqual([i.id for i in segment.lookup_range('requests', low=10, high=30)], [1, 2, 3])
+        self.assertEqual(
+            [i.id for i in segment.lookup_range('requests', low=10, high=30, include_high=False, reverse=True)], [2, 1])
+        self.assertEqual(len(segment.lookup_range('requests', limit=2)), 2)
+
+        ## Indexes follow updates, removals and evictions
+        segment.update(1, owner='Bar', requests=100)
+        segment.remove(3)
+        segment.add({'id': 5, 'owner': 'Foo', 'requests': 15})
+        segment.add({'id': 6, 'owner': 'Foo', 'requests': 25})
+
+        self.assertEqual(segment.lookup('owner', 'Foo', 'id'), [{'id': 5}, {'id': 6}])
+        self.assertEqual([i.id for i in segment.lookup_range('requests', low=50)], [1])
+        self.assertEqual(sorted(i.id for i in segment.lookup('owner', 'Bar')), [1, 2, 4])
+
+        with self.assertRaises(SegmentError):
+            segment.lookup('id', 0)
+        with self.assertRaises(SegmentError):
+            segment.lookup_range('owner', low='A')
+
+        segment.clear()
+        self.assertEqual(segment.lookup('owner', 'Foo'), [])
+
+    def test_invalid_index(self):
+        with self.assertRaises(ValueError):
+            class InvalidIndexModel(Model):
+                field_1: int
+
+                _config: Config = {'search_by': 'field_1', 'indexes': {'field_2': 'hash'}}
+
+    def test_segment_bulk(self):
+        self.segment.add(dict(field_1='Foo', field_2=0, field_3=False))
+        self.segment.add_many(dict(field_1='Foo', field_2=i, field_3=False) for i in range(1, 5))
+        self.assertEqual(self.segment.size(), 5)
+
+        with self.assertRaises(ValueError):
+            self.segment.add_many([dict(field_1='Bar', field_2=50, field_3=True), dict(field_1='Bar', field_2=0, field_3=True)])
+        self.assertEqual(self.segment.size(), 5)
+
+        ## Evicts least recently used, overwritten entries stay
+        self.segment.get(0)
+        self.segment.add_many([dict(field_1='Bar', field_2=i, field_3=True) for i in range(3, 12)], overwrite=True)
+        self.assertEqual(self.segment.size(), 10)
+        self.assertEqual(sorted(self.segment.keys()), [0] + list(range(3, 12)))
+        self.assertEqual(self.segment.first().field_2, 11)
+
+        self.assertEqual(self.segment.get_many([4, 0], 'field_1'), [{'field_1': 'Bar'}, {'field_1': 'Foo'}])
+        self.assertEqual(self.segment.first().field_2, 0)
+        self.assertEqual(self.segment.get_many([4, -1], default=None)[1], None)
+        with self.assertRaises(ValueError):
+            self.segment.get_many([4, -1])
+
+        with self.assertRaises(ValueError):
+            self.segment.remove_many([4, -1])
+        self.assertEqual(self.segment.size(), 10)
+        self.assertEqual([i.field_2 for i in self.segment.remove_many([4, 5])], [4, 5])
+        self.assertEqual(self.segment.remove_many([4], None), [None])
+
+        self.segment.clear()
+
+    def test_segment_trusted(self):
+        model = BasicTestModel(field_1='Foo', field_2=1, field_3=False)
+        self.segment.add(model, trusted=True)
+        self.assertIs(self.segment.get(1), model)
+
+        self.segment.add({'field_1': 'Bar', 'field_2': '2', 'field_3': False}, trusted=True)
+        self.assertEqual(self.segment.get('2').field_1, 'Bar')
+
+        self.segment.add(model, overwrite=True)
+        self.assertIsNot(self.segment.get(1), model)
+
+        segment = Segment(name='Trusted', model=BasicTestModel, trusted=True)
+        segment.add_many([model])
+        self.assertIs(segment.get(1), model)
+        with self.assertRaises(SegmentError):
+            Segment(name='Trusted', model=BasicTestModel, trusted='yes')
+
+        self.segment.clear()
@@ -0,0 +1,120 @@
+from ezycore import Manager, ShardedSegment
+from ezycore.manager import LFUPolicy
+from ezycore.models import Model, Config, PartialRef
+from ezycore.exceptions import SegmentError
+from ezycore.query import F, Query
+import unittest
+
+
+class AccountModel(Model):
+    id: int
+    owner: str
+    balance: int
+
+    _config: Config = {'search_by': 'id', 'indexes': {'owner': 'hash', 'balance': 'sorted'}}
+
+
+class SecretAccountModel(Model):
+    id: int
+    balance: int
+    secret: str
+
+    _config: Config = {'search_by': 'id', 'exclude': {'balance', 'secret'}, 'indexes': {'balance': 'sorted'}}
+
+
+class CardModel(Model):
+    id: int
+    account: PartialRef[AccountModel]
+
+    _config: Config = {'search_by': 'id', 'partials': {'account': 'accounts'}}
+
+
+class TestShardedSegment(unittest.TestCase):
+    def setUp(self) -> None:
+        self.segment = ShardedSegment('accounts', AccountModel, max_size=40, shards=4)
+        self.segment.add_many({'id': i, 'owner': f'User {i % 3}', 'balance': i * 10} for i in range(20))
+
+    def test_partitioning(self):
+        seg = self.segment
+        self.assertEqual([s.max_size for s in seg.shards], [10] * 4)
+        self.assertEqual(seg.size(), 20)
+        self.assertEqual(sorted(seg.keys()), list(range(20)))
+        self.assertEqual(sum(s.size() for s in seg.shards), 20)
+        for key in range(20):
+            self.assertIn(key, list(seg.shard_for(key).keys()))
+
+        seg.update_segment(max_size=10)
+        self.assertEqual([s.max_size for s in seg.shards], [3, 3, 2, 2])
+        self.assertRaises(SegmentError, ShardedSegment, 'accounts', AccountModel, shards=0)
+
+    def test_eviction_is_per_shard(self):
+        seg = ShardedSegment('accounts', AccountModel, max_size=4, shards=2, policy=LFUPolicy)
+        self.assertIsInstance(seg.shards[0].policy, LFUPolicy)
+        self.assertIsNot(seg.shards[0].policy, seg.shards[1].policy)
+
+        seg.add_many({'id': i, 'owner': 'Foo', 'balance': i} for i in range(10))
+        self.assertEqual([s.size() for s in seg.shards], [2, 2])
+
+    def test_access(self):
+        seg = self.segment
+        self.assertEqual(seg.get(5, 'balance'), {'balance': 50})
+        self.assertEqual([i.id for i in seg.get_many([3, 1, 2])], [3, 1, 2])
+        self.assertRaises(ValueError, seg.get_many, [1, 100])
+        self.assertEqual(seg.get_many([1, 100], default=None)[1], None)
+
+        seg.update(5, balance=0)
+        self.assertEqual(seg.get(5).balance, 0)
+        self.assertEqual(seg.first().id, 5)
+
+        self.assertEqual(seg.remove(5).id, 5)
+        self.assertIsNone(seg.remove(5, None))
+        self.assertRaises(ValueError, seg.remove_many, [1, 5])
+        self.assertEqual(seg.size(), 19)
+
+    def test_fan_out(self):
+        seg = self.segment
+        self.assertEqual(sorted(i.id for i in seg.search(lambda i: i.owner == 'User 0')), [0, 3, 6, 9, 12, 15, 18])
+        self.assertEqual(len(seg.search(lambda i: True, limit=5)), 5)
+        self.assertEqual(sorted(i['id'] for i in seg.search_using_re('1[0-2]', 'id')), [10, 11, 12])
+        self.assertEqual(sorted(i.id for i in seg.lookup('owner', 'User 1')), [1, 4, 7, 10, 13, 16, 19])
+
+        q = Query(F('owner') == 'User 0', order_by='balance', descending=True, limit=3)
+        self.assertEqual(seg.query(q, 'id'), [{'id': 18}, {'id': 15}, {'id': 12}])
+        self.assertEqual([i.id for i in seg.lookup_range('balance', low=40, high=80, include_high=False)], [4, 5, 6, 7])
+        self.assertRaises(SegmentError, seg.lookup_range, 'owner')
+
+        self.assertEqual(len(list(seg)), 20)
+        self.assertEqual(len(seg.invalidate_all(F('balance') >= 100)), 10)
+        self.assertEqual(seg.size(), 10)
+
+        seg.clear()
+        self.assertEqual(seg.size(), 0)
+
+    def test_ordering_excluded_fields(self):
+        seg = ShardedSegment('secrets', SecretAccountModel, shards=3)
+        seg.add_many({'id': i, 'balance': (i * 7) % 10, 'secret': 'x'} for i in range(10))
+
+        q = Query(order_by='balance', descending=True, limit=3)
+        self.assertEqual(seg.query(q), [{'id': 7}, {'id': 4}, {'id': 1}])
+        self.assertEqual(seg.lookup_range('balance', low=2, high=4), [{'id': 6}, {'id': 9}, {'id': 2}])
+
+    def test_manager(self):
+        accounts = ShardedSegment('accounts', AccountModel, shards=3)
+        manager = Manager(locations=['cards'], models={'cards': CardModel})
+        manager.add_segment(accounts)
+
+        manager.populate('accounts', data=[{'id': i, 'owner': 'Foo', 'balance': i} for i in range(5)])
+        manager.populate('cards', data=[{'id': i, 'account': i % 5} for i in range(10)])
+
+        self.assertIs(manager['accounts'], accounts)
+        self.assertEqual(manager['cards'].get(7).account.id, 2)
+        self.assertEqual(accounts.stats(2).fetches, 0)
+
+        manager.update_segment('accounts', name='banks')
+        self.assertEqual([s.name for s in manager['banks'].shards], ['banks[0]', 'banks[1]', 'banks[2]'])
+        ## Shards aren't registered with the manager when renamed or remodelled
+        self.assertEqual(sorted(s.name for s in manager.segments()), ['banks', 'cards'])
+        self.assertEqual(sorted(manager._modify_mod()), ['banks', 'cards'])
+        manager.update_segment('banks', model=AccountModel)
+        self.assertEqual(sorted(manager._modify_mod()), ['banks', 'cards'])
+        self.assertIs(manager['banks'].shards[0]._get_manager(), manager)
@@ -0,0 +1,152 @@
+from ezycore import TieredSegment, F
+from ezycore.exceptions import SegmentError
+from ezycore.models import Model, Config
+from tempfile import TemporaryDirectory
+from sqlite3 import connect
+from time import sleep
+from gc import collect
+from os import path
+import unittest
+
+
+class UserModel(Model):
+    id: int
+    name: str
+
+    _config: Config = {'search_by': 'id'}
+
+
+class TestTieredSegment(unittest.TestCase):
+    def test_spill_and_promote(self):
+        seg = TieredSegment('users', UserModel, max_size=3)
+        seg.add_many({'id': i, 'name': f'User {i}'} for i in range(5))
+        self.assertEqual((seg.size(), seg.disk_size, seg.spilled), (3, 2, 2))
+        self.assertEqual(sorted(seg.keys()), [2, 3, 4])
+
+        ## Promoting a spilled entry spills the least recently used one
+        self.assertEqual(seg.get(0).name, 'User 0')
+        self.assertEqual(sorted(seg.keys()), [0, 3, 4])
+        self.assertEqual((seg.disk_size, seg.promoted), (2, 1))
+
+        self.assertEqual([i.id for i in seg.get_many([1, 4])], [1, 4])
+        self.assertEqual(seg.get(9, default=None), None)
+        self.assertGreater(seg.disk_bytes, 0)
+        seg.close()
+
+    def test_loader_fallback(self):
+        seg = TieredSegment('users', UserModel, max_size=2)
+        loads = list()
+        seg.set_loader(lambda key: loads.append(key) or {'id': key, 'name': 'Loaded'})
+        seg.add_many({'id': i, 'name': f'User {i}'} for i in range(3))
+
+        self.assertEqual(seg.get(0).name, 'User 0')
+        self.assertEqual(seg.get(7).name, 'Loaded')
+        self.assertEqual(loads, [7])
+        seg.close()
+
+    def test_disk_budgets(self):
+        seg = TieredSegment('users', UserModel, max_size=1, disk_max_size=2)
+        seg.add_many({'id': i, 'name': str(i)} for i in range(5))
+        self.assertEqual(seg.disk_size, 2)
+        ## Entries spilled first are dropped first
+        self.assertEqual(seg.get(0, default=None), None)
+        self.assertEqual(seg.get(2).id, 2)
+        seg.close()
+
+        seg = TieredSegment('users', UserModel, max_size=1, disk_max_size=-1, disk_max_bytes=1)
+        seg.add_many({'id': i, 'name': str(i)} for i in range(3))
+        self.assertEqual((seg.disk_size, seg.spilled), (0, 0))
+        seg.close()
+
+    def test_writes_reach_both_tiers(self):
+        seg = TieredSegment('users', UserModel, max_size=2)
+        removed = list()
+        seg.subscribe(lambda key, obj: removed.append(key) if obj is None else None)
+        seg.add_many({'id': i, 'name': f'User {i}'} for i in range(4))
+
+        self.assertRaises(ValueError, seg.add, {'id': 0, 'name': 'Duplicate'})
+        seg.add({'id': 1, 'name': 'Replaced'}, overwrite=True)
+        self.assertEqual(seg.get(1).name, 'Replaced')
+
+        seg.update(0, name='Updated')
+        self.assertEqual(seg.get(0).name, 'Updated')
+
+        ## Removing spilled entries is reported like any other removal
+        spilled = [key for key in range(4) if key not in seg.keys()]
+        seg.remove_many(spilled)
+        self.assertEqual(removed, spilled)
+        self.assertRaises(ValueError, seg.remove_many, [spilled[0]])
+        self.assertEqual(seg.size() + seg.disk_size, 2)
+        seg.close()
+
+    def test_overwrite_batch(self):
+        seg = TieredSegment('users', UserModel, max_size=20)
+        seg.add_many({'id': i, 'name': 'Old'} for i in range(20))
+
+        ## Objects which don't fit are spilled, older copies evicted to make space don't replace them
+        seg.add_many(({'id': i, 'name': 'New'} for i in range(24)), overwrite=True)
+        self.assertEqual((seg.size(), seg.disk_size), (20, 4))
+        self.assertEqual([seg.get(i).name for i in range(24)], ['New'] * 24)
+        seg.close()
+
+    def test_invalidation(self):
+        seg = TieredSegment('users', UserModel, max_size=2)
+        ## Scans of the disk tier span several chunks
+        seg._TieredSegment__disk._CHUNK = 1
+        seg.add_many({'id': i, 'name': 'even' if i % 2 == 0 else 'odd'} for i in range(6))
+        self.assertEqual(sorted(i.id for i in seg.invalidate([0, 5])), [0, 5])
+        self.assertEqual(sorted(i.id for i in seg.invalidate_all(F('name') == 'even')), [2, 4])
+        self.assertEqual(sorted(i.id for i in seg.invalidate_all(lambda i: i.id == 1)), [1])
+        self.assertEqual(seg.size() + seg.disk_size, 1)
+
+        seg.clear()
+        self.assertEqual((seg.size(), seg.disk_size, seg.disk_bytes), (0, 0, 0))
+        seg.close()
+
+    def test_ttl(self):
+        class TimedModel(Model):
+            id: int
+
+            _config: Config = {'search_by': 'id', 'ttl': 0.05}
+
+        seg = TieredSegment('timed', TimedModel, max_size=1)
+        seg.add_many({'id': i} for i in range(2))
+        self.assertEqual(seg.get(0).id, 0)
+        sleep(0.06)
+        self.assertEqual(seg.get(1, default=None), None)
+        seg.close()
+
+    def test_path(self):
+        with TemporaryDirectory() as tmp:
+            database = path.join(tmp, 'tier.db')
+            seg = TieredSegment('users', UserModel, max_size=1, path=database)
+            seg.add_many({'id': i, 'name': str(i)} for i in range(3))
+            seg.close()
+            self.assertTrue(path.exists(database))
+
+            ## Entries of a previous segment aren't served again
+            seg = TieredSegment('users', UserModel, max_size=1, path=database)
+            self.assertEqual(seg.get(0, default=None), None)
+            seg.close()
+
+            ## Other tables of the file are left untouched
+            other = connect(database)
+            other.execute('CREATE TABLE entries (id INTEGER PRIMARY KEY)')
+            other.execute('INSERT INTO entries VALUES (1)')
+            other.commit()
+            with TieredSegment('users', UserModel, max_size=1, path=database) as seg:
+                seg.add_many({'id': i, 'name': str(i)} for i in range(3))
+                self.assertEqual(seg.disk_size, 2)
+            self.assertEqual(other.execute('SELECT * FROM entries').fetchall(), [(1,)])
+            other.close()
+
+        ## Temporary files are removed once segments which weren't closed are collected
+        seg = TieredSegment('users', UserModel, max_size=1)
+        seg.add_many({'id': i, 'name': str(i)} for i in range(3))
+        temporary = seg._TieredSegment__disk._DiskTier__finalizer.peek()[2][1]
+        self.assertTrue(path.exists(temporary))
+        del seg
+        collect()
+        self.assertFalse(path.exists(temporary))
+
+        self.assertRaises(SegmentError, TieredSegment, 'users', UserModel, max_size=-1)
@@ -0,0 +1,179 @@
+from ezycore import ChangeWatcher, Segment, ShardedSegment, SQLiteDriver, TieredSegment, WriteBehind
+from ezycore.exceptions import SegmentError
+from ezycore.models import Model, Config
+from tempfile import TemporaryDirectory
+from sqlite3 import connect
+from os import path
+import unittest
+
+
+class UserModel(Model):
+    id: int
+    name: str
+
+    _config: Config = {'search_by': 'id'}
+
+
+class TestChangeWatcher(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = TemporaryDirectory()
+        self.database = path.join(self.tmp.name, 'users.db')
+        ## Stands in for another process writing to the database
+        self.other = connect(self.database)
+        self.other.execute('CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT)')
+        self.other.executemany('INSERT INTO users VALUES (?, ?)', [(i, f'User {i}') for i in range(5)])
+        self.other.commit()
+
+    def tearDown(self) -> None:
+        self.other.close()
+        self.tmp.cleanup()
+
+    def driver(self) -> SQLiteDriver:
+        return SQLiteDriver(self.database, models={'users': UserModel})
+
+    def populated(self, segment: Segment) -> Segment:
+        segment.add_many(SQLiteDriver(self.database, models={'users': UserModel}).fetch('users'), dirty=False)
+        return segment
+
+    def test_data_version(self):
+        seg = Segment('users', UserModel)
+        with ChangeWatcher(self.driver, interval=60) as watcher:
+            watcher.watch(seg)
+            self.populated(seg)
+            watcher.poll()
+            self.assertEqual(seg.size(), 5)
+
+            self.other.execute("UPDATE users SET name = 'Changed' WHERE id = 1")
+            self.other.commit()
+            watcher.poll()
+            ## Without a change log every entry is stale
+            self.assertEqual((seg.size(), watcher.invalidated), (0, 5))
+
+    def test_change_log(self):
+        seg = Segment('users', UserModel)
+        deleted = list()
+        seg.subscribe(lambda key, obj: deleted.append(key) if obj is None else None)
+
+        with ChangeWatcher(self.driver, interval=60, change_log=True) as watcher:
+            watcher.watch(seg)
+            self.populated(seg)
+
+            self.other.execute("UPDATE users SET name = 'Changed' WHERE id = 1")
+            self.other.execute('DELETE FROM users WHERE id = 2')
+            self.other.execute("INSERT INTO users VALUES (9, 'Not cached')")
+            self.other.commit()
+            watcher.poll()
+
+            self.assertEqual(sorted(seg.keys()), [0, 3, 4])
+            self.assertEqual(watcher.invalidated, 2)
+            ## Invalidations aren't deletions
+            self.assertEqual(deleted, [])
+
+            ## Changing the key logs both keys
+            self.other.execute('UPDATE users SET id = 10 WHERE id = 3')
+            self.other.commit()
+            watcher.poll()
+            self.assertEqual(sorted(seg.keys()), [0, 4])
+
+    def test_changes_before_watch(self):
+        seg = Segment('users', UserModel)
+        with ChangeWatcher(self.driver, interval=60, change_log=True) as watcher:
+            ## Polled before any change log is installed
+            watcher.poll()
+            self.other.execute("UPDATE users SET name = 'Early' WHERE id = 0")
+            self.other.commit()
+            watcher.poll()
+            self.assertIsNone(watcher.last_error)
+
+            watcher.watch(seg)
+            self.populated(seg)
+            self.assertEqual(seg.get(0).name, 'Early')
+
+            self.other.execute("UPDATE users SET name = 'Changed' WHERE id = 1")
+            self.other.commit()
+            watcher.poll()
+            self.assertEqual(sorted(seg.keys()), [0, 2, 3, 4])
+
+    def test_tiered(self):
+        seg = TieredSegment('users', UserModel, max_size=2)
+        with ChangeWatcher(self.driver, interval=60, change_log=True) as watcher:
+            watcher.watch(seg)
+            self.populated(seg)
+            self.assertEqual(sorted(seg.keys()), [3, 4])
+
+            ## Spilled entries are invalidated too, instead of being promoted with stale values
+            self.other.execute("UPDATE users SET name = 'Changed' WHERE id IN (0, 4)")
+            self.other.commit()
+            watcher.poll()
+            self.assertEqual(watcher.invalidated, 2)
+            self.assertEqual(seg.get(0, default=None), None)
+            self.assertEqual(seg.get(1).name, 'User 1')
+        seg.close()
+
+    def test_refresh(self):
+        seg = ShardedSegment('users', UserModel, shards=2)
+        with ChangeWatcher(self.driver, interval=60, change_log=True) as watcher:
+            watcher.watch(seg, refresh=True)
+            self.populated(seg)
+
+            self.other.execute("UPDATE users SET name = 'Changed' WHERE id = 1")
+            self.other.execute('DELETE FROM users WHERE id = 2')
+            self.other.commit()
+            watcher.poll()
+
+            self.assertEqual(sorted(seg.keys()), [0, 1, 3, 4])
+            self.assertEqual(seg.get(1).name, 'Changed')
+
+    def test_pruned_log(self):
+        seg = Segment('users', UserModel)
+        with ChangeWatcher(self.driver, interval=60, change_log=True) as watcher:
+            watcher.watch(seg)
+            self.populated(seg)
+
+            self.other.execute("UPDATE users SET name = 'Changed' WHERE id = 1")
+            self.other.commit()
+            self.other.execute('DELETE FROM _ezycore_changes')
+            self.other.commit()
+            watcher.poll()
+            ## Changes were lost, so anything may be stale
+            self.assertEqual(seg.size(), 0)
+
+        driver = self.driver()
+        self.other.execute("UPDATE users SET name = 'Again' WHERE id = 1")
+        self.other.commit()
+        self.assertEqual(driver.prune_change_log(float('inf')), 1)
+
+    def test_local_writes(self):
+        seg = Segment('users', UserModel)
+        with ChangeWatcher(self.driver, interval=60, change_log=True) as watcher:
+            watcher.watch(seg)
+            self.populated(seg)
+            with WriteBehind(seg, self.driver) as writer:
+                seg.add({'id': 1, 'name': 'Local'}, overwrite=True)
+                writer.flush()
+
+            watcher.poll()
+            ## Persisted keys are seen as changes, but they aren't deleted
+            self.assertNotIn(1, seg.keys())
+            self.assertEqual(self.other.execute('SELECT name FROM users WHERE id = 1').fetchone(), ('Local',))
+
+    def test_invalid(self):
+        self.assertRaises(SegmentError, ChangeWatcher, self.driver, interval=0)
+        with ChangeWatcher(self.driver, interval=60) as watcher:
+            self.assertRaises(SegmentError, watcher.watch, Segment('users', UserModel), refresh=True)
+
+        with ChangeWatcher(self.driver, interval=60, change_log=True) as watcher:
+            self.assertRaises(SegmentError, watcher.watch, Segment('missing', UserModel))
+            self.assertIsInstance(watcher.last_error, AssertionError)
+
+
+class TestInvalidate(unittest.TestCase):
+    def test_invalidate(self):
+        for seg in (Segment('users', UserModel), ShardedSegment('users', UserModel, shards=3)):
+            removed = list()
+            seg.subscribe(lambda key, obj: removed.append(key))
+            seg.add_many(({'id': i, 'name': str(i)} for i in range(6)), dirty=False)
+
+            self.assertEqual(sorted(i.id for i in seg.invalidate([1, 3, 3, 7])), [1, 3])
+            self.assertEqual(sorted(seg.keys()), [0, 2, 4, 5])
+            self.assertEqual(removed, [])
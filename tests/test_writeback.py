@@ -0,0 +1,133 @@
+from ezycore import Driver, Manager, Segment, ShardedSegment, SQLiteDriver, WriteBehind
+from ezycore.models import Model, Config
+from tempfile import TemporaryDirectory
+from sqlite3 import connect
+from os import path
+import unittest
+
+
+class UserModel(Model):
+    id: int
+    name: str
+
+    _config: Config = {'search_by': 'id'}
+
+
+class RecordingDriver(Driver):
+    def __init__(self, failures: int = 0) -> None:
+        self.failures = failures
+        self.exported = list()
+        self.deleted = list()
+        self.commits = 0
+
+    def fetch(self, location, *args, **kwds):
+        return [UserModel(id=i, name=f'User {i}') for i in range(3)]
+
+    def fetch_one(self, location, *args, **kwds):
+        return None
+
+    def map_to_model(self, **kwds) -> None:
+        pass
+
+    def export(self, location, stream) -> None:
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError('Backend down')
+        self.exported.append([(i.id, i.name) for i in stream])
+
+    def delete(self, location, keys, *, key=None) -> None:
+        self.deleted.append(list(keys))
+
+    def commit(self) -> None:
+        self.commits += 1
+
+
+class TestWriteBehind(unittest.TestCase):
+    def test_coalescing(self):
+        seg = Segment('users', UserModel)
+        driver = RecordingDriver()
+        with WriteBehind(seg, driver, interval=60) as writer:
+            seg.add({'id': 1, 'name': 'Foo'})
+            seg.update(1, name='Bar')
+            seg.add({'id': 2, 'name': 'Baz'})
+            seg.add({'id': 3, 'name': 'Qux'})
+            seg.remove(3)
+            self.assertEqual(writer.pending, 3)
+
+            writer.flush()
+            self.assertEqual(driver.exported, [[(1, 'Bar'), (2, 'Baz')]])
+            self.assertEqual(driver.deleted, [[3]])
+            self.assertEqual((writer.pending, writer.written), (0, 3))
+
+            ## Evictions, invalidations and driver loads aren't writes
+            seg.invalidate_all(lambda i: i.id == 1)
+            seg.add_many([{'id': 5, 'name': 'Loaded'}], dirty=False)
+            self.assertEqual(writer.pending, 0)
+            seg.add({'id': 4, 'name': 'Last'})
+
+        self.assertEqual(driver.exported[-1], [(4, 'Last')])
+        seg.add({'id': 6, 'name': 'Untracked'})
+        self.assertEqual(writer.pending, 0)
+
+    def test_size_trigger_and_retry(self):
+        seg = ShardedSegment('users', UserModel, shards=2)
+        driver = RecordingDriver(failures=1)
+        writer = WriteBehind(seg, driver, batch_size=2, interval=0.05, max_pending=4)
+
+        seg.add({'id': 1, 'name': 'Foo'})
+        try:
+            writer.flush()
+            ## Flusher failed on its own before flush() was called, then succeeded
+            self.assertEqual(driver.exported, [[(1, 'Foo')]])
+        except ConnectionError:
+            self.assertIsInstance(writer.last_error, ConnectionError)
+        self.assertEqual(driver.failures, 0)
+
+        seg.add_many({'id': i, 'name': str(i)} for i in range(2, 10))
+        writer.close()
+        self.assertEqual(sorted(i for batch in driver.exported for i, _ in batch), list(range(1, 10)))
+        self.assertTrue(all(len(batch) <= 2 for batch in driver.exported))
+        self.assertIsNone(writer.last_error)
+
+    def test_oversized_batch(self):
+        seg = Segment('users', UserModel, max_size=2, make_space=True)
+        written = list()
+        seg.subscribe(lambda key, obj: written.append(key))
+        driver = RecordingDriver()
+        with WriteBehind(seg, driver, interval=60) as writer:
+            ## Objects evicted straight away are still writes, like when added one by one
+            seg.add_many({'id': i, 'name': str(i)} for i in range(4))
+            self.assertEqual(written, [0, 1, 2, 3])
+            self.assertEqual(sorted(seg.keys()), [2, 3])
+            writer.flush()
+        self.assertEqual(sorted(i for batch in driver.exported for i, _ in batch), [0, 1, 2, 3])
+
+    def test_populate_is_clean(self):
+        manager = Manager(['users'], {'users': UserModel})
+        driver = RecordingDriver()
+        writer = WriteBehind(manager['users'], driver, interval=60)
+        manager.populate_using_driver('users', driver)
+        self.assertEqual((manager['users'].size(), writer.pending), (3, 0))
+        writer.close()
+        self.assertEqual(driver.exported, [])
+
+    def test_sqlite(self):
+        with TemporaryDirectory() as tmp:
+            database = path.join(tmp, 'users.db')
+            with connect(database) as conn:
+                conn.execute('CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT)')
+                conn.executemany('INSERT INTO users VALUES (?, ?)', [(i, f'User {i}') for i in range(5)])
+            conn.close()
+
+            seg = Segment('users', UserModel)
+            writer = WriteBehind(seg, lambda: SQLiteDriver(database, models={'users': UserModel}))
+            seg.add({'id': 10, 'name': 'New'})
+            seg.add({'id': 1, 'name': 'Renamed'}, overwrite=True)
+            seg.add({'id': 2, 'name': 'Gone'}, overwrite=True)
+            seg.remove(2)
+            writer.close()
+
+            with connect(database) as conn:
+                rows = conn.execute('SELECT id, name FROM users ORDER BY id').fetchall()
+            conn.close()
+            self.assertEqual(rows, [(0, 'User 0'), (1, 'Renamed'), (3, 'User 3'), (4, 'User 4'), (10, 'New')])